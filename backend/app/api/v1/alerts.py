@@ -8,6 +8,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.api.websocket import manager as ws_manager
 from app.core.exceptions import NotFoundError, ValidationError
+from app.core.responses import DocumentResponse
 from app.dependencies import get_db
 from app.models.alert import AlertStatus
 from app.schemas.alert import (
@@ -63,18 +64,36 @@ async def create_alert(
 @router.get("", response_model=PaginatedResponse[AlertResponse])
 async def list_alerts(
     status_filter: Optional[AlertStatus] = Query(default=None, alias="status"),
-    page: int = Query(default=1, ge=1),
+    cursor: Optional[str] = Query(default=None, description="next_cursor or prev_cursor of a page"),
+    page: Optional[int] = Query(default=None, ge=1, description="Legacy offset pagination"),
     page_size: int = Query(default=20, ge=1, le=100),
+    count: Optional[str] = Query(
+        default=None,
+        pattern="^(exact|estimated|capped|none)$",
+        description="How to count total; defaults to the server setting",
+    ),
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated item fields to return; _id is always included",
+    ),
     service: AlertService = Depends(get_alert_service),
 ):
-    """List alerts with optional status filter."""
-    result = await service.get_alerts(status_filter, page, page_size)
-    return PaginatedResponse.create(
-        items=[AlertResponse.model_validate(a.model_dump(by_alias=True)) for a in result.items],
-        total=result.total,
-        page=result.page,
-        page_size=result.page_size,
-    )
+    """List alerts with optional status filter, newest first.
+
+    Pages are walked with ``next_cursor``/``prev_cursor``, which cost the
+    same at any depth; ``page`` selects the legacy offset mode. Alerts are
+    serialised straight from the stored documents, reading only ``fields``
+    when given.
+    """
+    if page is not None and cursor is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Use either page or cursor"
+        )
+    try:
+        result = await service.get_alerts(status_filter, page, page_size, cursor, count, fields)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    return DocumentResponse(result)
 
 
 @router.get("/stats", response_model=AlertStats)
@@ -1,17 +1,31 @@
 """Logs endpoints."""
 
-from typing import Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.dependencies import get_db
+from app.config import get_settings
+from app.core.exceptions import ConflictError, ExternalServiceError, ValidationError
+from app.core.idempotency import run_idempotent
+from app.core.responses import DocumentResponse
+from app.dependencies import (
+    get_db,
+    get_idempotency_body_hash,
+    get_idempotency_key,
+    log_batch_documents,
+)
 from app.models.log import LogLevel
-from app.schemas.common import MessageResponse, PaginatedResponse
+from app.schemas.common import BatchIngestResponse, MessageResponse, PaginatedResponse
 from app.schemas.log import LogBatchCreate, LogCreate, LogQuery, LogResponse, LogStats
 from app.services.log_service import LogService
+from app.utils.export import EXPORT_MEDIA_TYPES, until_disconnected
+from app.utils.ingest_formats import batch_openapi
 
 router = APIRouter()
+settings = get_settings()
 
 
 def get_log_service(db: AsyncIOMotorDatabase = Depends(get_db)) -> LogService:
@@ -28,14 +42,62 @@ async def create_log(
     return LogResponse.model_validate(log.model_dump(by_alias=True))
 
 
-@router.post("/batch", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/batch",
+    response_model=BatchIngestResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": BatchIngestResponse, "description": "Queued"}},
+    openapi_extra=batch_openapi(LogBatchCreate),
+)
 async def create_logs_batch(
-    data: LogBatchCreate,
+    response: Response,
+    documents: List[Dict[str, Any]] = Depends(log_batch_documents),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
+    body_hash: Optional[str] = Depends(get_idempotency_body_hash),
     service: LogService = Depends(get_log_service),
 ):
-    """Create multiple log entries at once."""
-    count = await service.create_batch(data.logs)
-    return MessageResponse(message=f"Created {count} log entries")
+    """Create multiple log entries at once, reporting rejected items by index.
+
+    Retries carrying the same ``Idempotency-Key`` are answered with the
+    original response without writing again. With ``INGEST_MODE=queue`` the
+    batch is published to RabbitMQ and answered with 202; the workers write it.
+    """
+    queued = settings.ingest_mode == "queue"
+
+    async def ingest():
+        if queued:
+            await service.enqueue_batch(documents, idempotency_key)
+            return BatchIngestResponse(
+                message=f"Queued {len(documents)} log entries",
+                success=True,
+                accepted=len(documents),
+            ).model_dump(mode="json")
+        result = await service.create_batch(documents)
+        return BatchIngestResponse(
+            message=f"Created {result.accepted} log entries",
+            success=not result.errors,
+            accepted=result.accepted,
+            rejected=len(result.errors),
+            errors=result.errors,
+        ).model_dump(mode="json")
+
+    try:
+        body, replayed = await run_idempotent(idempotency_key, body_hash, ingest)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.message
+        ) from e
+    except ConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.message) from e
+    except ExternalServiceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=e.message
+        ) from e
+    if queued:
+        response.status_code = status.HTTP_202_ACCEPTED
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
 
 
 @router.get("", response_model=PaginatedResponse[LogResponse])
@@ -47,11 +109,38 @@ async def list_logs(
     pod_name: Optional[str] = None,
     container_name: Optional[str] = None,
     search: Optional[str] = None,
-    page: int = Query(default=1, ge=1),
+    search_mode: Optional[str] = Query(
+        default=None,
+        pattern="^(text|substring|regex)$",
+        description="How search matches messages: text (words, default), substring or regex",
+    ),
+    cursor: Optional[str] = Query(default=None, description="next_cursor or prev_cursor of a page"),
+    page: Optional[int] = Query(default=None, ge=1, description="Legacy offset pagination"),
     page_size: int = Query(default=50, ge=1, le=100),
+    count: Optional[str] = Query(
+        default=None,
+        pattern="^(exact|estimated|capped|none)$",
+        description="How to count total; defaults to the server setting",
+    ),
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated item fields to return; _id is always included",
+    ),
     service: LogService = Depends(get_log_service),
 ):
-    """List logs with filters."""
+    """List logs with filters, newest first.
+
+    Pages are walked with ``next_cursor``/``prev_cursor``, which cost the
+    same at any depth; ``page`` selects the legacy offset mode. Entries are
+    serialised straight from the stored documents, reading only ``fields``
+    when given. ``search_mode=substring|regex`` looks up the trigrams of
+    the search text and checks the matching messages; the search must
+    contain three consecutive literal characters.
+    """
+    if page is not None and cursor is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Use either page or cursor"
+        )
     query = LogQuery(
         level=level,
         source=source,
@@ -60,8 +149,13 @@ async def list_logs(
         pod_name=pod_name,
         container_name=container_name,
         search=search,
+        search_mode=search_mode,
     )
-    return await service.query_logs(query, page, page_size)
+    try:
+        result = await service.query_logs(query, page, page_size, cursor, count, fields)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    return DocumentResponse(result)
 
 
 @router.get("/stats", response_model=LogStats)
@@ -77,15 +171,71 @@ async def get_log_stats(
     return LogStats(**stats)
 
 
-@router.get("/source/{source}")
+@router.get("/export")
+async def export_logs(
+    request: Request,
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    level: Optional[LogLevel] = None,
+    source: Optional[str] = None,
+    namespace: Optional[str] = None,
+    cluster: Optional[str] = None,
+    pod_name: Optional[str] = None,
+    container_name: Optional[str] = None,
+    search: Optional[str] = None,
+    search_mode: Optional[str] = Query(
+        default=None,
+        pattern="^(text|substring|regex)$",
+        description="How search matches messages: text (words, default), substring or regex",
+    ),
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    service: LogService = Depends(get_log_service),
+):
+    """Stream all matching log entries, oldest first, as NDJSON or CSV.
+
+    Entries are read from a database cursor in batches, so memory use
+    does not grow with the result; the cursor is closed if the client
+    disconnects.
+    """
+    query = LogQuery(
+        level=level,
+        source=source,
+        namespace=namespace,
+        cluster=cluster,
+        pod_name=pod_name,
+        container_name=container_name,
+        search=search,
+        search_mode=search_mode,
+        start_time=start_time,
+        end_time=end_time,
+    )
+    try:
+        chunks = service.export_logs(query, format)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    return StreamingResponse(
+        until_disconnected(chunks, request.is_disconnected),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="logs.{format}"'},
+    )
+
+
+@router.get("/source/{source}", response_model=List[LogResponse])
 async def get_logs_by_source(
     source: str,
     limit: int = Query(default=50, ge=1, le=200),
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated item fields to return; _id is always included",
+    ),
     service: LogService = Depends(get_log_service),
 ):
-    """Get latest logs for a source."""
-    logs = await service.get_latest_by_source(source, limit)
-    return [LogResponse.model_validate(log.model_dump(by_alias=True)) for log in logs]
+    """Get latest logs for a source, reading only ``fields`` when given."""
+    try:
+        logs = await service.get_latest_by_source(source, limit, fields)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    return DocumentResponse(logs)
 
 
 @router.get("/{log_id}", response_model=LogResponse)
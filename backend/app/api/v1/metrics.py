@@ -1,24 +1,43 @@
 """Metrics endpoints."""
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.api.websocket import manager as ws_manager
-from app.dependencies import get_db
+from app.config import get_settings
+from app.core.exceptions import ConflictError, ExternalServiceError, ValidationError
+from app.core.idempotency import run_idempotent
+from app.core.responses import DocumentResponse
+from app.dependencies import (
+    get_db,
+    get_idempotency_body_hash,
+    get_idempotency_key,
+    metric_batch_documents,
+)
 from app.models.metric import MetricType
-from app.schemas.common import MessageResponse, PaginatedResponse
+from app.schemas.common import BatchIngestResponse, MessageResponse, PaginatedResponse
 from app.schemas.metric import (
     MetricAggregation,
     MetricBatchCreate,
     MetricCreate,
+    MetricHistogram,
     MetricQuery,
+    MetricRangeResult,
     MetricResponse,
+    MetricStreamResult,
 )
 from app.services.metric_service import MetricService
+from app.utils.export import EXPORT_MEDIA_TYPES, until_disconnected
+from app.utils.formatters import parse_duration
+from app.utils.ingest_formats import batch_openapi
+from app.utils.ndjson import iter_ndjson_lines
 
 router = APIRouter()
+settings = get_settings()
 
 
 def get_metric_service(db: AsyncIOMotorDatabase = Depends(get_db)) -> MetricService:
@@ -37,14 +56,75 @@ async def create_metric(
     return response
 
 
-@router.post("/batch", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/batch",
+    response_model=BatchIngestResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": BatchIngestResponse, "description": "Queued"}},
+    openapi_extra=batch_openapi(MetricBatchCreate, protobuf=True),
+)
 async def create_metrics_batch(
-    data: MetricBatchCreate,
+    response: Response,
+    documents: List[Dict[str, Any]] = Depends(metric_batch_documents),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
+    body_hash: Optional[str] = Depends(get_idempotency_body_hash),
+    service: MetricService = Depends(get_metric_service),
+):
+    """Create multiple metrics at once, reporting rejected items by index.
+
+    Retries carrying the same ``Idempotency-Key`` are answered with the
+    original response without writing again. With ``INGEST_MODE=queue`` the
+    batch is published to RabbitMQ and answered with 202; the workers write it.
+    """
+    queued = settings.ingest_mode == "queue"
+
+    async def ingest():
+        if queued:
+            await service.enqueue_batch(documents, idempotency_key)
+            return BatchIngestResponse(
+                message=f"Queued {len(documents)} metrics",
+                success=True,
+                accepted=len(documents),
+            ).model_dump(mode="json")
+        result = await service.create_batch(documents)
+        return BatchIngestResponse(
+            message=f"Created {result.accepted} metrics",
+            success=not result.errors,
+            accepted=result.accepted,
+            rejected=len(result.errors),
+            errors=result.errors,
+        ).model_dump(mode="json")
+
+    try:
+        body, replayed = await run_idempotent(idempotency_key, body_hash, ingest)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.message
+        ) from e
+    except ConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.message) from e
+    except ExternalServiceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=e.message
+        ) from e
+    if queued:
+        response.status_code = status.HTTP_202_ACCEPTED
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
+
+
+@router.post("/stream", response_model=MetricStreamResult)
+async def stream_metrics(
+    request: Request,
+    chunk_size: Optional[int] = Query(default=None, ge=1, le=10000),
     service: MetricService = Depends(get_metric_service),
 ):
-    """Create multiple metrics at once."""
-    count = await service.create_batch(data.metrics)
-    return MessageResponse(message=f"Created {count} metrics")
+    """Ingest newline-delimited JSON metrics in fixed-size chunks."""
+    lines = iter_ndjson_lines(request.stream(), settings.ingest_stream_max_line_bytes)
+    return await service.ingest_stream(
+        lines, chunk_size or settings.ingest_stream_chunk_size
+    )
 
 
 @router.get("", response_model=PaginatedResponse[MetricResponse])
@@ -54,19 +134,50 @@ async def list_metrics(
     namespace: Optional[str] = None,
     cluster: Optional[str] = None,
     name: Optional[str] = None,
-    page: int = Query(default=1, ge=1),
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    resolution: Optional[str] = Query(default=None, pattern="^(auto|raw|1m|5m|1h)$"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor or prev_cursor of a page"),
+    page: Optional[int] = Query(default=None, ge=1, description="Legacy offset pagination"),
     page_size: int = Query(default=20, ge=1, le=100),
+    count: Optional[str] = Query(
+        default=None,
+        pattern="^(exact|estimated|capped|none)$",
+        description="How to count total; defaults to the server setting",
+    ),
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated item fields to return; _id is always included",
+    ),
     service: MetricService = Depends(get_metric_service),
 ):
-    """List metrics with filters."""
+    """List metrics with filters, newest first.
+
+    Pages are walked with ``next_cursor``/``prev_cursor``, which cost the
+    same at any depth; ``page`` selects the legacy offset mode. Long time
+    ranges are read from rollups unless ``resolution=raw``. Samples are
+    serialised straight from the stored documents, reading only ``fields``
+    when given.
+    """
+    if page is not None and cursor is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Use either page or cursor"
+        )
     query = MetricQuery(
         metric_type=metric_type,
         source=source,
         namespace=namespace,
         cluster=cluster,
         name=name,
+        start_time=start_time,
+        end_time=end_time,
+        resolution=resolution,
     )
-    return await service.query_metrics(query, page, page_size)
+    try:
+        result = await service.query_metrics(query, page, page_size, cursor, count, fields)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    return DocumentResponse(result)
 
 
 @router.get("/aggregations", response_model=List[MetricAggregation])
@@ -75,6 +186,14 @@ async def get_aggregations(
     source: Optional[str] = None,
     namespace: Optional[str] = None,
     cluster: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    resolution: Optional[str] = Query(default=None, pattern="^(auto|raw|1m|5m|1h)$"),
+    percentiles: Optional[str] = Query(
+        default=None,
+        pattern="^(mongo|numpy)$",
+        description="Add p50/p90/p95/p99 computed by MongoDB or NumPy",
+    ),
     service: MetricService = Depends(get_metric_service),
 ):
     """Get metric aggregations."""
@@ -83,19 +202,166 @@ async def get_aggregations(
         source=source,
         namespace=namespace,
         cluster=cluster,
+        start_time=start_time,
+        end_time=end_time,
+        resolution=resolution,
     )
-    return await service.get_aggregations(query)
+    try:
+        return await service.get_aggregations(query, percentiles)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
+@router.get("/histogram", response_model=List[MetricHistogram])
+async def get_histograms(
+    name: Optional[str] = None,
+    metric_type: Optional[MetricType] = None,
+    source: Optional[str] = None,
+    namespace: Optional[str] = None,
+    cluster: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    bins: int = Query(default=20, ge=1, le=1000),
+    service: MetricService = Depends(get_metric_service),
+):
+    """Get value histograms per metric name."""
+    query = MetricQuery(
+        name=name,
+        metric_type=metric_type,
+        source=source,
+        namespace=namespace,
+        cluster=cluster,
+        start_time=start_time,
+        end_time=end_time,
+    )
+    try:
+        return await service.get_histograms(query, bins)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
+@router.get("/range", response_model=MetricRangeResult)
+async def query_range(
+    name: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+    step: str = Query(default="1m", description="Bucket width, e.g. 30s, 5m, 1h"),
+    agg: str = Query(default="avg", pattern="^(avg|min|max|sum|count|first|last)$"),
+    source: Optional[str] = None,
+    namespace: Optional[str] = None,
+    cluster: Optional[str] = None,
+    resolution: Optional[str] = Query(default=None, pattern="^(auto|raw|1m|5m|1h)$"),
+    service: MetricService = Depends(get_metric_service),
+):
+    """Get one array of ``[ts, value]`` points per series, bucketed by ``step``."""
+    try:
+        step_seconds = int(parse_duration(step).total_seconds())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    if step_seconds <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="step must be positive")
+
+    query = MetricQuery(
+        name=name,
+        source=source,
+        namespace=namespace,
+        cluster=cluster,
+        start_time=start,
+        end_time=end,
+        resolution=resolution,
+    )
+    try:
+        return await service.query_range(query, step_seconds, agg)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
+@router.get("/export")
+async def export_metrics(
+    request: Request,
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    name: Optional[str] = None,
+    metric_type: Optional[MetricType] = None,
+    source: Optional[str] = None,
+    namespace: Optional[str] = None,
+    cluster: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    service: MetricService = Depends(get_metric_service),
+):
+    """Stream all matching raw metrics, oldest first, as NDJSON or CSV.
+
+    Documents are read from a database cursor in batches, so memory use
+    does not grow with the result; the cursor is closed if the client
+    disconnects.
+    """
+    query = MetricQuery(
+        name=name,
+        metric_type=metric_type,
+        source=source,
+        namespace=namespace,
+        cluster=cluster,
+        start_time=start_time,
+        end_time=end_time,
+    )
+    chunks = service.export_metrics(query, format)
+    return StreamingResponse(
+        until_disconnected(chunks, request.is_disconnected),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="metrics.{format}"'},
+    )
+
+
+@router.get("/names", response_model=List[str])
+async def list_metric_names(
+    prefix: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    service: MetricService = Depends(get_metric_service),
+):
+    """List metric names known to the series catalog."""
+    return await service.list_names(prefix, limit)
+
+
+@router.get("/labels", response_model=List[str])
+async def list_label_keys(
+    name: Optional[str] = None,
+    service: MetricService = Depends(get_metric_service),
+):
+    """List label keys, optionally for one metric name."""
+    return await service.list_label_keys(name)
+
+
+@router.get("/labels/{key}/values", response_model=List[str])
+async def list_label_values(
+    key: str,
+    name: Optional[str] = None,
+    prefix: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    service: MetricService = Depends(get_metric_service),
+):
+    """List values of a label key; ``source``, ``namespace`` and ``cluster`` work too."""
+    try:
+        return await service.list_label_values(key, name, prefix, limit)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
 
 
-@router.get("/source/{source}")
+@router.get("/source/{source}", response_model=List[MetricResponse])
 async def get_metrics_by_source(
     source: str,
     limit: int = Query(default=10, ge=1, le=100),
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated item fields to return; _id is always included",
+    ),
     service: MetricService = Depends(get_metric_service),
 ):
-    """Get latest metrics for a source."""
-    metrics = await service.get_latest_by_source(source, limit)
-    return [MetricResponse.model_validate(m.model_dump(by_alias=True)) for m in metrics]
+    """Get latest metrics for a source, reading only ``fields`` when given."""
+    try:
+        metrics = await service.get_latest_by_source(source, limit, fields)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    return DocumentResponse(metrics)
 
 
 @router.get("/{metric_id}", response_model=MetricResponse)
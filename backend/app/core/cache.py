@@ -0,0 +1,104 @@
+"""Shared Redis cache for expensive read endpoints.
+
+Entries are keyed by a namespace and a hash of the normalised query
+parameters. Each namespace has a version counter that is part of every
+key, so invalidating a namespace is a single INCR and stale entries simply
+expire.
+"""
+
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+from redis.exceptions import RedisError
+
+from app.config import get_settings
+from app.core.logging import get_logger
+from app.core.singleflight import SingleFlight
+from app.db.redis import get_redis
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Cache namespaces; the workers bump the same version keys
+METRIC_AGGREGATIONS = "metric_aggregations"
+LOG_STATS = "log_stats"
+ALERT_STATS = "alert_stats"
+
+_JSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+_flights = SingleFlight("response_cache")
+
+
+def version_key(namespace: str) -> str:
+    """Redis key of the version counter of a namespace."""
+    return f"cache:{namespace}:version"
+
+
+def params_digest(params: Optional[Dict[str, Any]]) -> str:
+    """Stable hash of normalised query parameters."""
+    return hashlib.sha1(orjson.dumps(params or {}, option=_JSON_OPTIONS, default=str)).hexdigest()
+
+
+def cache_key(namespace: str, version: int, params: Optional[Dict[str, Any]]) -> str:
+    """Redis key of an entry for normalised query parameters."""
+    return f"cache:{namespace}:{version}:{params_digest(params)}"
+
+
+async def cached(
+    namespace: str,
+    params: Optional[Dict[str, Any]],
+    ttl_seconds: int,
+    compute: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Return the cached result for ``params`` or compute and store it.
+
+    Concurrent calls with the same parameters share one lookup and one
+    computation. Results round-trip through JSON. When the cache is
+    disabled or Redis is unavailable the result is computed directly.
+    """
+    return await _flights.do(
+        (namespace, params_digest(params)),
+        lambda: _load(namespace, params, ttl_seconds, compute),
+    )
+
+
+async def _load(
+    namespace: str,
+    params: Optional[Dict[str, Any]],
+    ttl_seconds: int,
+    compute: Callable[[], Awaitable[Any]],
+) -> Any:
+    if not settings.response_cache_enabled or ttl_seconds <= 0:
+        return await compute()
+
+    redis = get_redis()
+    try:
+        version = int(await redis.get(version_key(namespace)) or 0)
+        key = cache_key(namespace, version, params)
+        hit = await redis.get(key)
+    except RedisError as e:
+        logger.warning("Response cache unavailable", namespace=namespace, error=str(e))
+        return await compute()
+    if hit is not None:
+        return orjson.loads(hit)
+
+    result = await compute()
+    try:
+        await redis.set(key, orjson.dumps(result, option=_JSON_OPTIONS, default=str), ex=ttl_seconds)
+    except RedisError as e:
+        logger.warning("Failed to store cached response", namespace=namespace, error=str(e))
+    return result
+
+
+async def invalidate(*namespaces: str) -> None:
+    """Drop every cached entry of the namespaces."""
+    if not settings.response_cache_enabled:
+        return
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for namespace in namespaces:
+                pipe.incr(version_key(namespace))
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Failed to invalidate response cache", namespaces=namespaces, error=str(e))
@@ -0,0 +1,282 @@
+"""Compressed request and response bodies.
+
+Request bodies sent with ``Content-Encoding: gzip`` or ``zstd`` are
+decompressed as the application reads them, up to a size limit. Responses
+are compressed with the best encoding the client accepts once they reach a
+size threshold; streamed responses are compressed chunk by chunk.
+"""
+
+import zlib
+from typing import Optional, Tuple
+
+import zstandard
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Response encodings, preferred first when the client accepts several equally
+RESPONSE_ENCODINGS = ("zstd", "gzip")
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Content types worth compressing; anything else is sent as is
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Largest output of one zstd block, and the fewest input bytes encoding one
+_ZSTD_BLOCK_SIZE = 131072
+_ZSTD_MIN_BLOCK_BYTES = 4
+
+
+class _Decoder:
+    """Incremental decompressor that fails once output exceeds ``limit``."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.size = 0
+
+    def decode(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        return b""
+
+    def _accept(self, chunk: bytes) -> bytes:
+        self.size += len(chunk)
+        if self.size > self.limit:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Decompressed request body exceeds {self.limit} bytes",
+            )
+        return chunk
+
+
+class _GzipDecoder(_Decoder):
+    """Gzip decoder reading every member of a multi-member body."""
+
+    def __init__(self, limit: int):
+        super().__init__(limit)
+        self._d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decode(self, data: bytes) -> bytes:
+        out = []
+        try:
+            while data:
+                if self._d.eof:
+                    self._d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                # Never inflate more than one byte past the limit per call
+                out.append(self._accept(self._d.decompress(data, self.limit - self.size + 1)))
+                data = self._d.unused_data if self._d.eof else self._d.unconsumed_tail
+        except zlib.error as e:
+            raise _corrupt("gzip", e) from e
+        return b"".join(out)
+
+    def finish(self) -> bytes:
+        if not self._d.eof:
+            raise _corrupt("gzip", "truncated stream")
+        return b""
+
+
+class _ZstdDecoder(_Decoder):
+    """Zstd decoder reading every frame of a multi-frame body.
+
+    A decompression object inflates all input it is given, so input is fed
+    in slices small enough to stay about one block past the limit.
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(limit)
+        self._dctx = zstandard.ZstdDecompressor()
+        self._d = self._dctx.decompressobj()
+
+    def decode(self, data: bytes) -> bytes:
+        out = []
+        position = 0
+        try:
+            while position < len(data):
+                if self._d.eof:
+                    self._d = self._dctx.decompressobj()
+                blocks = max(1, (self.limit - self.size) // _ZSTD_BLOCK_SIZE)
+                end = position + _ZSTD_MIN_BLOCK_BYTES * blocks
+                out.append(self._accept(self._d.decompress(data[position:end])))
+                position = end
+                if self._d.eof and self._d.unused_data:
+                    data, position = self._d.unused_data + data[position:], 0
+        except zstandard.ZstdError as e:
+            raise _corrupt("zstd", e) from e
+        return b"".join(out)
+
+    def finish(self) -> bytes:
+        if not self._d.eof:
+            raise _corrupt("zstd", "truncated frame")
+        return b""
+
+
+_DECODERS = {"gzip": _GzipDecoder, "zstd": _ZstdDecoder}
+
+
+def _corrupt(encoding: str, reason: object) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Invalid {encoding} request body: {reason}",
+    )
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the response encoding from an ``Accept-Encoding`` header.
+
+    Returns None when the client accepts none of ``RESPONSE_ENCODINGS``.
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in RESPONSE_ENCODINGS:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Encoder:
+    """Streaming compressor for one response."""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._c = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._sync = zlib.Z_SYNC_FLUSH
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress ``data`` and flush it so the client can decode it now."""
+        return self._c.compress(data) + self._c.flush(self._sync)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._c.compress(data) + self._c.flush()
+
+
+class CompressionMiddleware:
+    """Decompress gzip/zstd request bodies and compress large responses."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = headers.get("content-encoding", "identity").strip().lower()
+        if encoding != "identity":
+            decoder_class = _DECODERS.get(encoding)
+            if decoder_class is None:
+                response = JSONResponse(
+                    {"detail": f"Unsupported Content-Encoding: {encoding}"},
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                )
+                await response(scope, receive, send)
+                return
+            scope, receive = _decoded(
+                scope, receive, decoder_class(settings.request_max_decompressed_bytes)
+            )
+
+        if settings.response_compression_enabled:
+            accepted = negotiate_encoding(headers.get("accept-encoding", ""))
+            if accepted:
+                send = _CompressingSend(send, accepted, settings.response_compression_min_bytes)
+
+        await self.app(scope, receive, send)
+
+
+def _decoded(scope: Scope, receive: Receive, decoder: _Decoder) -> Tuple[Scope, Receive]:
+    """Scope and receive channel presenting the decompressed body."""
+    scope = dict(scope)
+    scope["headers"] = [
+        (name, value)
+        for name, value in scope["headers"]
+        if name not in (b"content-encoding", b"content-length")
+    ]
+
+    async def receive_decoded() -> Message:
+        message = await receive()
+        if message["type"] == "http.request":
+            body = decoder.decode(message.get("body", b""))
+            if not message.get("more_body", False):
+                body += decoder.finish()
+            message = {**message, "body": body}
+        return message
+
+    return scope, receive_decoded
+
+
+class _CompressingSend:
+    """Send channel compressing the response body once it is worth it.
+
+    The start message is held back until the first body chunk shows the
+    response size: a complete body below ``min_bytes``, a body that is
+    already encoded or of another content type is passed through.
+    """
+
+    def __init__(self, send: Send, encoding: str, min_bytes: int):
+        self.send = send
+        self.encoding = encoding
+        self.min_bytes = min_bytes
+        self.start: Optional[Message] = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            if not self._compress(body, more_body):
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.encoder = _Encoder(self.encoding)
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.encoder.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({**message, "body": body})
+                return
+            await self.send(self.start)
+
+        body = self.encoder.chunk(body) if more_body else self.encoder.finish(body)
+        await self.send({**message, "body": body})
+
+    def _compress(self, body: bytes, more_body: bool) -> bool:
+        headers = Headers(raw=self.start["headers"])
+        if "content-encoding" in headers:
+            return False
+        if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            return False
+        return more_body or len(body) >= self.min_bytes
@@ -63,6 +63,16 @@ class AuthorizationError(InfraWatchException):
         super().__init__(message=message, status_code=403)
 
 
+class ConflictError(InfraWatchException):
+    """Conflicting request exception."""
+
+    def __init__(
+        self,
+        message: str = "Request conflicts with another request in progress",
+    ):
+        super().__init__(message=message, status_code=409)
+
+
 class DatabaseError(InfraWatchException):
     """Database operation error."""
 
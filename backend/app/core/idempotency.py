@@ -0,0 +1,187 @@
+"""Idempotency keys for replay-safe ingest endpoints."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+import orjson
+from redis.exceptions import RedisError
+
+from app.config import get_settings
+from app.core.exceptions import ConflictError, ValidationError
+from app.core.logging import get_logger
+from app.db.redis import get_redis
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# How long a key stays reserved while its first request is still running
+PENDING_TTL_SECONDS = 60
+
+# Stored per key: hash of the request body and the response, None while pending
+_Entry = Tuple[str, Optional[Dict[str, Any]]]
+
+
+def _replay(entry: _Entry, body_hash: str) -> Dict[str, Any]:
+    """Response stored for a key whose request is repeated with ``body_hash``."""
+    stored_hash, response = entry
+    if stored_hash != body_hash:
+        raise ValidationError("Idempotency key was already used with a different request body")
+    if response is None:
+        raise ConflictError("A request with this idempotency key is in progress")
+    return response
+
+
+class MemoryIdempotencyStore:
+    """Per-process LRU of completed responses keyed by idempotency key."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, _Entry]]" = OrderedDict()
+        self._first_used: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+    async def begin(self, key: str, body_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the stored response for ``key`` or reserve the key."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            response = _replay(entry[1], body_hash)
+            self._entries.move_to_end(key)
+            return response
+        self._set(key, (body_hash, None), now + PENDING_TTL_SECONDS)
+        return None
+
+    async def complete(self, key: str, body_hash: str, response: Dict[str, Any]) -> None:
+        """Store the response for ``key``."""
+        self._set(key, (body_hash, response), time.monotonic() + self.ttl_seconds)
+
+    async def release(self, key: str) -> None:
+        """Drop a reservation after the request failed."""
+        self._entries.pop(key, None)
+
+    async def first_used_at(self, key: str) -> int:
+        """Epoch second ``key`` was first used, kept for the TTL across retries."""
+        now = time.monotonic()
+        entry = self._first_used.get(key)
+        if entry is None or entry[0] <= now:
+            entry = (now + self.ttl_seconds, int(time.time()))
+        self._first_used[key] = entry
+        self._first_used.move_to_end(key)
+        while len(self._first_used) > self.max_entries:
+            self._first_used.popitem(last=False)
+        return entry[1]
+
+    def _set(self, key: str, entry: _Entry, expires_at: float) -> None:
+        self._entries[key] = (expires_at, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisIdempotencyStore:
+    """Idempotency store shared by all API replicas through Redis."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    async def begin(self, key: str, body_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the stored response for ``key`` or reserve the key."""
+        redis = get_redis()
+        reservation = orjson.dumps([body_hash, None])
+        while True:
+            if await redis.set(key, reservation, nx=True, ex=PENDING_TTL_SECONDS):
+                return None
+            value = await redis.get(key)
+            # A key expiring between SET and GET is reserved on the next pass
+            if value is not None:
+                return _replay(orjson.loads(value), body_hash)
+
+    async def complete(self, key: str, body_hash: str, response: Dict[str, Any]) -> None:
+        """Store the response for ``key``."""
+        await get_redis().set(key, orjson.dumps([body_hash, response]), ex=self.ttl_seconds)
+
+    async def release(self, key: str) -> None:
+        """Drop a reservation after the request failed."""
+        await get_redis().delete(key)
+
+    async def first_used_at(self, key: str) -> int:
+        """Epoch second ``key`` was first used, kept for the TTL across retries."""
+        redis = get_redis()
+        first_used_key = f"{key}:first_used"
+        while True:
+            await redis.set(first_used_key, int(time.time()), nx=True, ex=self.ttl_seconds)
+            value = await redis.get(first_used_key)
+            if value is not None:
+                return int(value)
+
+
+_store: Optional[Union[MemoryIdempotencyStore, RedisIdempotencyStore]] = None
+
+
+def get_idempotency_store() -> Union[MemoryIdempotencyStore, RedisIdempotencyStore]:
+    """Get the configured idempotency store."""
+    global _store
+
+    if _store is None:
+        if settings.idempotency_backend == "redis":
+            _store = RedisIdempotencyStore(settings.idempotency_ttl_seconds)
+        else:
+            _store = MemoryIdempotencyStore(
+                settings.idempotency_ttl_seconds,
+                settings.idempotency_memory_max_entries,
+            )
+    return _store
+
+
+async def run_idempotent(
+    key: Optional[str],
+    body_hash: Optional[str],
+    operation: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Tuple[Dict[str, Any], bool]:
+    """Run ``operation`` once per idempotency key.
+
+    Returns the response and whether it was replayed from the store. A key
+    is bound to the body hash of its first request; reusing it with another
+    body raises ``ValidationError``. A store outage is logged and the
+    operation runs without deduplication.
+    """
+    if key is None:
+        return await operation(), False
+
+    store = get_idempotency_store()
+    try:
+        stored = await store.begin(key, body_hash)
+    except RedisError as e:
+        logger.warning("Idempotency store unavailable", error=str(e))
+        return await operation(), False
+    if stored is not None:
+        return stored, True
+
+    try:
+        response = await operation()
+    except BaseException:
+        try:
+            await store.release(key)
+        except RedisError as e:
+            logger.warning("Failed to release idempotency key", error=str(e))
+        raise
+
+    try:
+        await store.complete(key, body_hash, response)
+    except RedisError as e:
+        logger.warning("Failed to store idempotent response", error=str(e))
+    return response, False
+
+
+async def first_used_at(key: str) -> Optional[int]:
+    """Epoch second an idempotency key was first used, None if unavailable.
+
+    Every retry within the TTL gets the same second, including retries of
+    a request that failed and released its reservation.
+    """
+    try:
+        return await get_idempotency_store().first_used_at(key)
+    except RedisError as e:
+        logger.warning("Idempotency store unavailable", error=str(e))
+        return None
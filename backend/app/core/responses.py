@@ -0,0 +1,97 @@
+"""JSON responses serialised straight from stored documents.
+
+List endpoints read projected documents and encode them once with orjson,
+skipping the model round-trips; data is validated when it is ingested.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+from pydantic.fields import FieldInfo
+
+from app.core.exceptions import ValidationError
+
+# Datetimes are rendered like Pydantic's JSON output
+_JSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class DocumentResponse(Response):
+    """JSON response for raw documents; ObjectIds are rendered as strings."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_JSON_OPTIONS)
+
+
+@lru_cache(maxsize=None)
+def _response_fields(model: Type[BaseModel]) -> Tuple[Tuple[str, FieldInfo], ...]:
+    return tuple((field.alias or name, field) for name, field in model.model_fields.items())
+
+
+def select_fields(model: Type[BaseModel], fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse a comma-separated ``fields`` parameter against ``model``.
+
+    Returns None when every field is wanted. ``_id`` is always returned
+    and need not be listed.
+    """
+    if not fields:
+        return None
+    keys = {key for key, _ in _response_fields(model)}
+    selected = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in keys]
+    if unknown:
+        raise ValidationError(
+            f"Unknown fields: {', '.join(unknown)}; allowed: {', '.join(sorted(keys))}"
+        )
+    return selected or None
+
+
+def response_projection(
+    model: Type[BaseModel],
+    fields: Optional[Tuple[str, ...]] = None,
+    required: Tuple[str, ...] = (),
+) -> Dict[str, int]:
+    """MongoDB projection of the fields a response model exposes.
+
+    ``fields`` narrows it to a selection from ``select_fields``;
+    ``required`` names fields read for paging even when not selected.
+    """
+    if fields is None:
+        return {key: 1 for key, _ in _response_fields(model)}
+    return dict.fromkeys(("_id", *fields, *required), 1)
+
+
+def as_response(
+    documents: List[Dict[str, Any]],
+    model: Type[BaseModel],
+    fields: Optional[Tuple[str, ...]] = None,
+) -> List[Dict[str, Any]]:
+    """Shape projected documents as ``model``, or the ``fields`` of it.
+
+    Missing optional fields get their defaults and, with ``fields``, any
+    other key is dropped. Documents are updated in place and returned.
+    """
+    wanted = _response_fields(model)
+    if fields is not None:
+        wanted = tuple((key, field) for key, field in wanted if key in fields or key == "_id")
+    defaults = [(key, field) for key, field in wanted if not field.is_required()]
+    keep = {key for key, _ in wanted}
+    for doc in documents:
+        if fields is not None:
+            for key in [key for key in doc if key not in keep]:
+                del doc[key]
+        for key, field in defaults:
+            if key not in doc:
+                doc[key] = field.get_default(call_default_factory=True)
+    return documents
@@ -0,0 +1,54 @@
+"""Coalescing of identical concurrent reads.
+
+While a read for a key is in flight, later callers with the same key await
+the same result instead of issuing their own query.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from prometheus_client import Counter
+
+from app.config import get_settings
+
+settings = get_settings()
+
+SINGLEFLIGHT_REQUESTS = Counter(
+    "infrawatch_singleflight_requests_total",
+    "Reads through a single-flight group, by whether they ran or joined one in flight",
+    ["group", "result"],
+)
+
+
+class SingleFlight:
+    """A group of reads deduplicated by key while in flight."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` unless a call for ``key`` is in flight, then share its result.
+
+        The call runs in its own task, so a caller that is cancelled does
+        not cancel the read for the others waiting on it.
+        """
+        if not settings.singleflight_enabled:
+            return await fn()
+
+        task = self._calls.get(key)
+        if task is None:
+            SINGLEFLIGHT_REQUESTS.labels(self.name, "leader").inc()
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            SINGLEFLIGHT_REQUESTS.labels(self.name, "coalesced").inc()
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every caller went away
+            task.exception()
@@ -3,11 +3,31 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pymongo import ASCENDING, DESCENDING, IndexModel
 
+from app.config import get_settings
 from app.core.logging import get_logger
+from app.db.timeseries import ensure_metrics_timeseries
+from app.utils.rollups import ROLLUP_RESOLUTIONS, rollup_collection, rollup_ttl_seconds
 
+settings = get_settings()
 logger = get_logger(__name__)
 
 
+async def set_ttl(db: AsyncIOMotorDatabase, collection: str, index: str, seconds: int) -> None:
+    """Change the expiry of an existing TTL index to ``seconds``.
+
+    ``create_indexes`` fails with IndexOptionsConflict when an index exists
+    with another ``expireAfterSeconds``, so retention changes go through
+    ``collMod``, as they do for the time-series collection.
+    """
+    existing = (await db[collection].index_information()).get(index)
+    if existing is None or existing.get("expireAfterSeconds") == seconds:
+        return
+    await db.command(
+        "collMod", collection, index={"name": index, "expireAfterSeconds": seconds}
+    )
+    logger.info("Changed TTL index expiry", collection=collection, index=index, seconds=seconds)
+
+
 async def create_indexes(db: AsyncIOMotorDatabase) -> None:
     """Create all indexes for the database."""
     logger.info("Creating database indexes...")
@@ -21,29 +41,93 @@ async def create_indexes(db: AsyncIOMotorDatabase) -> None:
     await db.users.create_indexes(users_indexes)
 
     # Metrics collection indexes
-    metrics_indexes = [
-        IndexModel([("timestamp", DESCENDING)]),
-        IndexModel([("source", ASCENDING), ("timestamp", DESCENDING)]),
-        IndexModel([("metric_type", ASCENDING), ("timestamp", DESCENDING)]),
-        IndexModel([("namespace", ASCENDING), ("timestamp", DESCENDING)]),
-        IndexModel(
-            [("timestamp", ASCENDING)],
-            expireAfterSeconds=604800,  # 7 days TTL
-            name="timestamp_1",
-        ),
+    if settings.metrics_storage_layout == "timeseries":
+        # Retention is the collection's expireAfterSeconds, not a TTL index
+        if await ensure_metrics_timeseries(db):
+            metrics_indexes = [
+                IndexModel([("meta.name", ASCENDING), ("timestamp", DESCENDING)]),
+                IndexModel([("meta.source", ASCENDING), ("timestamp", DESCENDING)]),
+                IndexModel([("meta.namespace", ASCENDING), ("timestamp", DESCENDING)]),
+                IndexModel([("metric_type", ASCENDING), ("timestamp", DESCENDING)]),
+            ]
+            await db.metrics.create_indexes(metrics_indexes)
+    else:
+        # _id is the keyset pagination tiebreak
+        metrics_indexes = [
+            IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("source", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("metric_type", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("namespace", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel(
+                [("timestamp", ASCENDING)],
+                expireAfterSeconds=settings.metrics_ttl_seconds,
+                name="timestamp_1",
+            ),
+        ]
+        await set_ttl(db, "metrics", "timestamp_1", settings.metrics_ttl_seconds)
+        await db.metrics.create_indexes(metrics_indexes)
+
+    # Metric buckets collection indexes (buckets storage layout)
+    if settings.metrics_storage_layout == "buckets":
+        metric_buckets_indexes = [
+            IndexModel(
+                [("series_key", ASCENDING), ("bucket_start", ASCENDING)],
+                unique=True,
+            ),
+            IndexModel([("name", ASCENDING), ("bucket_start", DESCENDING)]),
+            IndexModel([("source", ASCENDING), ("bucket_start", DESCENDING)]),
+            IndexModel([("metric_type", ASCENDING), ("bucket_start", DESCENDING)]),
+            IndexModel([("namespace", ASCENDING), ("bucket_start", DESCENDING)]),
+            IndexModel(
+                [("bucket_end", ASCENDING)],
+                expireAfterSeconds=settings.metrics_ttl_seconds,
+                name="bucket_end_1",
+            ),
+        ]
+        await set_ttl(db, "metric_buckets", "bucket_end_1", settings.metrics_ttl_seconds)
+        await db.metric_buckets.create_indexes(metric_buckets_indexes)
+
+    # Metric rollup collection indexes, one TTL per resolution
+    for resolution in ROLLUP_RESOLUTIONS:
+        rollup_indexes = [
+            IndexModel([("name", ASCENDING), ("timestamp", DESCENDING)]),
+            IndexModel([("source", ASCENDING), ("timestamp", DESCENDING)]),
+            IndexModel([("metric_type", ASCENDING), ("timestamp", DESCENDING)]),
+            IndexModel([("namespace", ASCENDING), ("timestamp", DESCENDING)]),
+            IndexModel(
+                [("timestamp", ASCENDING)],
+                expireAfterSeconds=rollup_ttl_seconds(resolution),
+                name="timestamp_1",
+            ),
+        ]
+        collection = rollup_collection(resolution)
+        await set_ttl(db, collection, "timestamp_1", rollup_ttl_seconds(resolution))
+        await db[collection].create_indexes(rollup_indexes)
+
+    # Series catalog collection indexes
+    series_indexes = [
+        IndexModel([("series_key", ASCENDING)], unique=True),
+        IndexModel([("name", ASCENDING)]),
+        IndexModel([("label_keys", ASCENDING)]),
+        IndexModel([("source", ASCENDING)]),
+        IndexModel([("namespace", ASCENDING)]),
+        IndexModel([("last_seen", DESCENDING)]),
     ]
-    await db.metrics.create_indexes(metrics_indexes)
+    await db.series.create_indexes(series_indexes)
 
     # Logs collection indexes
     logs_indexes = [
-        IndexModel([("timestamp", DESCENDING)]),
-        IndexModel([("level", ASCENDING), ("timestamp", DESCENDING)]),
-        IndexModel([("source", ASCENDING), ("timestamp", DESCENDING)]),
-        IndexModel([("namespace", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("level", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("source", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("namespace", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
         IndexModel(
             [("message", "text"), ("source", "text")],
             name="message_text_source_text",
         ),
+        # Trigram index for substring and regex search (app.utils.ngrams)
+        IndexModel([("_trigrams", ASCENDING)], name="trigrams_1"),
+        IndexModel([("_trigrams_partial", ASCENDING)], sparse=True, name="trigrams_partial_1"),
         IndexModel(
             [("timestamp", ASCENDING)],
             expireAfterSeconds=2592000,  # 30 days TTL
@@ -54,13 +138,18 @@ async def create_indexes(db: AsyncIOMotorDatabase) -> None:
 
     # Alerts collection indexes
     alerts_indexes = [
-        IndexModel([("created_at", DESCENDING)]),
-        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
         IndexModel([("severity", ASCENDING), ("created_at", DESCENDING)]),
         IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
     ]
     await db.alerts.create_indexes(alerts_indexes)
 
+    # Alert counters collection indexes (top sources for /alerts/stats)
+    await db.alert_counters.create_indexes(
+        [IndexModel([("field", ASCENDING), ("count", DESCENDING)])]
+    )
+
     # Alert rules collection indexes
     alert_rules_indexes = [
         IndexModel([("name", ASCENDING)], unique=True),
@@ -0,0 +1,209 @@
+"""Convert the ``metrics`` collection into a time-series collection.
+
+Usage::
+
+    python -m app.db.migrate_timeseries [--chunk-size N] [--concurrency N]
+
+The regular collection is renamed to ``metrics_legacy`` and copied into a
+new time-series ``metrics`` collection in ``_id`` ranges, several ranges at
+a time. Finished ranges are recorded in the ``migrations`` collection so an
+interrupted run resumes where it stopped; a range that was only partly
+copied is cleared and copied again. The last range ends at the newest
+legacy ``_id`` recorded when the run was planned, so clearing a range never
+touches samples written since. Run the API with
+``METRICS_STORAGE_LAYOUT=timeseries`` so new samples land in the new
+collection while the copy is in progress.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError
+
+from app.core.logging import get_logger, setup_logging
+from app.db.mongodb import close_mongodb, connect_mongodb, get_database
+from app.db.timeseries import (
+    METRICS_COLLECTION,
+    ensure_metrics_timeseries,
+    is_timeseries_collection,
+    to_timeseries_document,
+)
+
+logger = get_logger(__name__)
+
+LEGACY_COLLECTION = "metrics_legacy"
+CHECKPOINT_ID = "metrics_timeseries"
+INSERT_BATCH_SIZE = 1000
+
+
+async def plan_chunks(
+    source: AsyncIOMotorCollection,
+    chunk_size: int,
+) -> Tuple[List[ObjectId], Optional[ObjectId]]:
+    """Get the lower ``_id`` bound of every chunk of ``chunk_size`` documents.
+
+    Also returns the last ``_id``, the inclusive upper bound of the last chunk.
+    """
+    boundaries = []
+    last_id = None
+    position = 0
+    async for doc in source.find({}, {"_id": 1}).sort("_id", ASCENDING):
+        if position % chunk_size == 0:
+            boundaries.append(doc["_id"])
+        last_id = doc["_id"]
+        position += 1
+    return boundaries, last_id
+
+
+async def copy_chunk(
+    source: AsyncIOMotorCollection,
+    target: AsyncIOMotorCollection,
+    lower: ObjectId,
+    upper: ObjectId,
+    inclusive: bool = False,
+) -> Tuple[int, int]:
+    """Copy the ``_id`` range from ``lower`` to ``upper`` and return the
+    copied and skipped counts; ``upper`` is included if ``inclusive``.
+    """
+    range_filter = {"_id": {"$gte": lower, "$lte" if inclusive else "$lt": upper}}
+
+    # Time-series collections do not enforce unique _id, so drop anything a
+    # previous interrupted run left behind for this range
+    await target.delete_many(range_filter)
+
+    copied = skipped = 0
+    batch: List[Dict[str, Any]] = []
+    async for doc in source.find(range_filter):
+        batch.append(to_timeseries_document(doc))
+        if len(batch) >= INSERT_BATCH_SIZE:
+            inserted = await _insert(target, batch)
+            copied += inserted
+            skipped += len(batch) - inserted
+            batch = []
+    if batch:
+        inserted = await _insert(target, batch)
+        copied += inserted
+        skipped += len(batch) - inserted
+    return copied, skipped
+
+
+async def _insert(target: AsyncIOMotorCollection, documents: List[Dict[str, Any]]) -> int:
+    try:
+        await target.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        logger.warning(
+            "Skipped documents that are not valid time-series samples",
+            count=len(errors),
+            first_error=errors[0].get("errmsg") if errors else None,
+        )
+        return e.details.get("nInserted", 0)
+    return len(documents)
+
+
+async def migrate_metrics(
+    db: AsyncIOMotorDatabase,
+    chunk_size: int = 10000,
+    concurrency: int = 4,
+) -> Dict[str, int]:
+    """Copy ``metrics`` into a time-series collection, resuming if possible."""
+    names = await db.list_collection_names()
+    if not await is_timeseries_collection(db, METRICS_COLLECTION):
+        if METRICS_COLLECTION in names:
+            if LEGACY_COLLECTION in names:
+                raise RuntimeError(
+                    f"Both {METRICS_COLLECTION} and {LEGACY_COLLECTION} exist; "
+                    "resolve manually before migrating"
+                )
+            await db[METRICS_COLLECTION].rename(LEGACY_COLLECTION)
+            logger.info("Renamed metrics collection", to=LEGACY_COLLECTION)
+        await ensure_metrics_timeseries(db)
+
+    checkpoint = await db.migrations.find_one({"_id": CHECKPOINT_ID})
+    if checkpoint is None:
+        boundaries, last_id = await plan_chunks(db[LEGACY_COLLECTION], chunk_size)
+        checkpoint = {
+            "_id": CHECKPOINT_ID,
+            "boundaries": boundaries,
+            "last_id": last_id,
+            "done": [],
+            "started_at": datetime.now(timezone.utc),
+        }
+        await db.migrations.insert_one(checkpoint)
+    elif checkpoint.get("completed_at"):
+        logger.info("Metrics already migrated", completed_at=checkpoint["completed_at"])
+        return {"copied": 0, "skipped": 0, "chunks": 0}
+
+    boundaries = checkpoint["boundaries"]
+    last_id = checkpoint["last_id"]
+    done = set(checkpoint["done"])
+    pending = [index for index in range(len(boundaries)) if index not in done]
+    logger.info(
+        "Migrating metrics to time-series collection",
+        chunks=len(boundaries),
+        remaining=len(pending),
+    )
+
+    source = db[LEGACY_COLLECTION]
+    target = db[METRICS_COLLECTION]
+    semaphore = asyncio.Semaphore(concurrency)
+    totals = {"copied": 0, "skipped": 0, "chunks": 0}
+
+    async def run(index: int) -> None:
+        last = index + 1 == len(boundaries)
+        upper = last_id if last else boundaries[index + 1]
+        async with semaphore:
+            copied, skipped = await copy_chunk(
+                source, target, boundaries[index], upper, inclusive=last
+            )
+            await db.migrations.update_one(
+                {"_id": CHECKPOINT_ID}, {"$addToSet": {"done": index}}
+            )
+        totals["copied"] += copied
+        totals["skipped"] += skipped
+        totals["chunks"] += 1
+        logger.info(
+            "Migrated chunk",
+            chunk=index,
+            copied=copied,
+            progress=f"{len(done) + totals['chunks']}/{len(boundaries)}",
+        )
+
+    await asyncio.gather(*(run(index) for index in pending))
+
+    await db.migrations.update_one(
+        {"_id": CHECKPOINT_ID},
+        {"$set": {"completed_at": datetime.now(timezone.utc)}},
+    )
+    logger.info(
+        "Metrics migration completed; drop metrics_legacy once verified",
+        **totals,
+    )
+    return totals
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_logging()
+    await connect_mongodb()
+    try:
+        await migrate_metrics(
+            await get_database(),
+            chunk_size=args.chunk_size,
+            concurrency=args.concurrency,
+        )
+    finally:
+        await close_mongodb()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
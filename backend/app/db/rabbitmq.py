@@ -0,0 +1,97 @@
+"""RabbitMQ publishing for queued ingest."""
+
+import asyncio
+import hashlib
+import struct
+from typing import Any, Dict, List, Optional
+
+import aio_pika
+import orjson
+from aio_pika.abc import AbstractChannel, AbstractRobustConnection
+from bson import ObjectId
+
+from app.config import get_settings
+from app.core.exceptions import ExternalServiceError
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+_connection: Optional[AbstractRobustConnection] = None
+_channel: Optional[AbstractChannel] = None
+_lock = asyncio.Lock()
+
+
+async def get_channel() -> AbstractChannel:
+    """Get the shared publisher channel, connecting on first use.
+
+    The channel uses publisher confirms and the ingest queues are declared
+    durable, as the workers' ingest consumer declares them.
+    """
+    global _connection, _channel
+
+    async with _lock:
+        if _channel is None or _channel.is_closed:
+            if _connection is None:
+                logger.info("Connecting to RabbitMQ...", url=settings.rabbitmq_url.split("@")[-1])
+                _connection = await aio_pika.connect_robust(settings.rabbitmq_url)
+            _channel = await _connection.channel(publisher_confirms=True)
+            for queue in (settings.ingest_queue_metrics, settings.ingest_queue_logs):
+                await _channel.declare_queue(queue, durable=True)
+    return _channel
+
+
+def assign_ids(
+    documents: List[Dict[str, Any]],
+    seed: Optional[str] = None,
+    first_used_at: Optional[int] = None,
+) -> None:
+    """Give queued documents their ``_id`` before they are published.
+
+    The consumer's inserts then reject a batch delivered or published twice
+    as duplicate keys. With a ``seed``, such as the request's idempotency
+    key, and the epoch second it was first used, IDs are derived from both,
+    so a client retry of a batch whose publish timed out gets the same IDs.
+    Derived IDs keep that second as their timestamp, so they still sort
+    after the documents written before the key was first used.
+    """
+    for index, document in enumerate(documents):
+        if seed is None or first_used_at is None:
+            document["_id"] = ObjectId()
+        else:
+            digest = hashlib.sha256(f"{seed}:{index}".encode()).digest()
+            document["_id"] = ObjectId(struct.pack(">I", first_used_at) + digest[:8])
+
+
+async def publish_documents(queue: str, documents: List[Dict[str, Any]]) -> None:
+    """Publish a batch of ingest documents as one persistent message.
+
+    Returns once the broker has confirmed the message; raises
+    ``ExternalServiceError`` when it cannot be published in time.
+    """
+    message = aio_pika.Message(
+        orjson.dumps(documents, default=str),
+        content_type="application/json",
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+    )
+    try:
+        channel = await asyncio.wait_for(
+            get_channel(), settings.ingest_publish_timeout_seconds
+        )
+        await channel.default_exchange.publish(
+            message, routing_key=queue, timeout=settings.ingest_publish_timeout_seconds
+        )
+    except (aio_pika.exceptions.AMQPError, ConnectionError, asyncio.TimeoutError) as e:
+        logger.warning("Failed to publish ingest batch", queue=queue, error=str(e))
+        raise ExternalServiceError("rabbitmq", "ingest batch could not be queued") from e
+
+
+async def close_rabbitmq() -> None:
+    """Close RabbitMQ connection."""
+    global _connection, _channel
+
+    if _connection is not None:
+        logger.info("Closing RabbitMQ connection...")
+        await _connection.close()
+        _connection = None
+        _channel = None
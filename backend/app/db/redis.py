@@ -0,0 +1,37 @@
+"""Redis connection management."""
+
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from app.config import get_settings
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+_client: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """Get the shared Redis client, creating it on first use."""
+    global _client
+
+    if _client is None:
+        logger.info("Connecting to Redis...", url=settings.redis_url.split("@")[-1])
+        _client = Redis.from_url(
+            settings.redis_url,
+            socket_timeout=2,
+            socket_connect_timeout=2,
+        )
+    return _client
+
+
+async def close_redis() -> None:
+    """Close Redis connection."""
+    global _client
+
+    if _client is not None:
+        logger.info("Closing Redis connection...")
+        await _client.aclose()
+        _client = None
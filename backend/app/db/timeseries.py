@@ -0,0 +1,93 @@
+"""MongoDB time-series collection support for metrics."""
+
+from typing import Any, Dict
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import get_settings
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+METRICS_COLLECTION = "metrics"
+META_FIELD = "meta"
+# Fields identifying a series, stored under the metaField
+META_FIELDS = ("name", "source", "namespace", "cluster", "labels")
+MEASUREMENT_FIELDS = ("metric_type", "value", "unit", "metadata", "timestamp")
+
+
+def to_timeseries_document(sample: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a flat metric sample to the time-series document shape."""
+    document = {k: v for k, v in sample.items() if k not in META_FIELDS}
+    document[META_FIELD] = {field: sample[field] for field in META_FIELDS if field in sample}
+    return document
+
+
+def from_timeseries_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a time-series document back to a flat metric sample."""
+    sample = {k: v for k, v in document.items() if k != META_FIELD}
+    sample.update(document.get(META_FIELD) or {})
+    return sample
+
+
+def timeseries_filter(filter_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Rewrite flat sample paths in a filter or sort spec to the metaField."""
+    rewritten = {}
+    for key, value in filter_dict.items():
+        field = key.split(".", 1)[0]
+        rewritten[f"{META_FIELD}.{key}" if field in META_FIELDS else key] = value
+    return rewritten
+
+
+def flatten_stage() -> Dict[str, Any]:
+    """Projection turning time-series documents into flat samples."""
+    return {
+        "$project": {
+            **{field: f"${META_FIELD}.{field}" for field in META_FIELDS},
+            **dict.fromkeys(MEASUREMENT_FIELDS, 1),
+        }
+    }
+
+
+async def is_timeseries_collection(db: AsyncIOMotorDatabase, name: str) -> bool:
+    """Whether ``name`` exists and is a time-series collection."""
+    collections = await db.list_collections(filter={"name": name})
+    async for info in collections:
+        return info.get("type") == "timeseries"
+    return False
+
+
+async def ensure_metrics_timeseries(db: AsyncIOMotorDatabase) -> bool:
+    """Create ``metrics`` as a time-series collection or sync its TTL.
+
+    Returns False when ``metrics`` already exists as a regular collection;
+    it then has to be converted with ``python -m app.db.migrate_timeseries``.
+    """
+    names = await db.list_collection_names(filter={"name": METRICS_COLLECTION})
+    if not names:
+        await db.create_collection(
+            METRICS_COLLECTION,
+            timeseries={
+                "timeField": "timestamp",
+                "metaField": META_FIELD,
+                "granularity": settings.metrics_timeseries_granularity,
+            },
+            expireAfterSeconds=settings.metrics_ttl_seconds,
+        )
+        logger.info("Created time-series metrics collection")
+        return True
+
+    if not await is_timeseries_collection(db, METRICS_COLLECTION):
+        logger.warning(
+            "Metrics collection is not a time-series collection; "
+            "run `python -m app.db.migrate_timeseries` to convert it"
+        )
+        return False
+
+    await db.command(
+        "collMod",
+        METRICS_COLLECTION,
+        expireAfterSeconds=settings.metrics_ttl_seconds,
+    )
+    return True
@@ -0,0 +1,158 @@
+"""Coalescing write-behind buffer for single-document inserts."""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+
+from app.config import get_settings
+from app.core.logging import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+
+class WriteBuffer:
+    """Gathers inserts from concurrent callers into ``insert_many`` flushes.
+
+    A flush happens once ``batch_size`` documents are pending or the oldest
+    pending document has waited ``max_linger_ms``. The batch size adapts to
+    observed flush latency: it grows while flushes finish under
+    ``target_latency_ms`` and halves when they do not.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        max_batch_size: int = 500,
+        max_linger_ms: int = 10,
+        target_latency_ms: int = 50,
+        min_batch_size: int = 16,
+    ):
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.min_batch_size = min(min_batch_size, max_batch_size)
+        self.max_linger = max_linger_ms / 1000
+        self.target_latency = target_latency_ms / 1000
+        self.batch_size = self.min_batch_size
+        self.loop = asyncio.get_running_loop()
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._not_empty = asyncio.Event()
+        self._full = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def insert(self, document: Dict[str, Any]) -> ObjectId:
+        """Queue a document and wait until it has been written."""
+        if self._closed:
+            raise RuntimeError("Write buffer is closed")
+        document.setdefault("_id", ObjectId())
+        future = self.loop.create_future()
+        self._pending.append((document, future))
+        self._not_empty.set()
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await future
+        return document["_id"]
+
+    async def close(self) -> None:
+        """Flush everything still pending and stop the flusher."""
+        self._closed = True
+        self._not_empty.set()
+        self._full.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while self._pending or not self._closed:
+            if not self._pending:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+
+            deadline = self.loop.time() + self.max_linger
+            while len(self._pending) < self.batch_size and not self._closed:
+                remaining = deadline - self.loop.time()
+                if remaining <= 0:
+                    break
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._pending[: self.batch_size]
+            del self._pending[: len(batch)]
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        failed: Dict[int, Exception] = {}
+        started = time.perf_counter()
+        try:
+            await self.collection.insert_many(
+                [document for document, _ in batch], ordered=False
+            )
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = BulkWriteError(
+                    {"writeErrors": [error], "nInserted": 0}
+                )
+        except Exception as e:
+            logger.error(
+                "Write buffer flush failed",
+                collection=self.collection.name,
+                size=len(batch),
+                error=str(e),
+            )
+            failed = dict.fromkeys(range(len(batch)), e)
+        self._adapt(time.perf_counter() - started, len(batch))
+
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(failed[index])
+            else:
+                future.set_result(None)
+
+    def _adapt(self, latency: float, size: int) -> None:
+        """Adjust the batch size from the latency of the last flush."""
+        if latency > self.target_latency:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+        elif size >= self.batch_size:
+            self.batch_size = min(
+                self.max_batch_size, self.batch_size + self.min_batch_size
+            )
+
+
+_buffers: Dict[str, WriteBuffer] = {}
+
+
+def get_write_buffer(collection: AsyncIOMotorCollection) -> WriteBuffer:
+    """Get the shared write buffer for a collection on the running loop."""
+    buffer = _buffers.get(collection.full_name)
+    if buffer is None or buffer.loop is not asyncio.get_running_loop():
+        buffer = WriteBuffer(
+            collection,
+            max_batch_size=settings.write_buffer_max_batch_size,
+            max_linger_ms=settings.write_buffer_max_linger_ms,
+            target_latency_ms=settings.write_buffer_target_latency_ms,
+        )
+        _buffers[collection.full_name] = buffer
+    return buffer
+
+
+async def close_write_buffers() -> None:
+    """Drain and close all write buffers."""
+    if _buffers:
+        logger.info("Draining write buffers...", count=len(_buffers))
+    buffers = list(_buffers.values())
+    _buffers.clear()
+    for buffer in buffers:
+        await buffer.close()
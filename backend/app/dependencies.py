@@ -1,13 +1,79 @@
 """Dependency injection for FastAPI."""
 
-from typing import AsyncGenerator
+import hashlib
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
 
+import pydantic
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.config import get_settings
+from app.core.exceptions import ValidationError
 from app.db.mongodb import get_database
+from app.utils.ingest_formats import decode_log_batch, decode_metric_batch
+
+settings = get_settings()
 
 
 async def get_db() -> AsyncGenerator[AsyncIOMotorDatabase, None]:
     """Get database dependency."""
     db = await get_database()
     yield db
+
+
+async def get_idempotency_key(
+    request: Request,
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
+) -> Optional[str]:
+    """Resolve the idempotency key for an ingest request.
+
+    Uses the ``Idempotency-Key`` header, or a hash of the request body when
+    content hashing is enabled. Keys are scoped to the request path.
+    """
+    if idempotency_key:
+        key = idempotency_key
+    elif settings.idempotency_hash_batches:
+        key = await _body_hash(request)
+    else:
+        return None
+    return f"idempotency:{request.url.path}:{key}"
+
+
+async def get_idempotency_body_hash(
+    request: Request,
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
+) -> Optional[str]:
+    """Hash of the body an idempotency key is bound to, None without a key."""
+    if idempotency_key is None:
+        return None
+    return await _body_hash(request)
+
+
+async def _body_hash(request: Request) -> str:
+    if not hasattr(request.state, "body_hash"):
+        request.state.body_hash = hashlib.sha256(await request.body()).hexdigest()
+    return request.state.body_hash
+
+
+async def _batch_documents(
+    request: Request, decode: Callable[[bytes, Optional[str]], List[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    try:
+        return decode(await request.body(), request.headers.get("content-type"))
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    except pydantic.ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        ) from e
+
+
+async def metric_batch_documents(request: Request) -> List[Dict[str, Any]]:
+    """Metric documents of a JSON, MessagePack or protobuf batch body."""
+    return await _batch_documents(request, decode_metric_batch)
+
+
+async def log_batch_documents(request: Request) -> List[Dict[str, Any]]:
+    """Log documents of a JSON or MessagePack batch body."""
+    return await _batch_documents(request, decode_log_batch)
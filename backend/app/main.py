@@ -2,17 +2,22 @@
 
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from fastapi import WebSocket
 
 from app.api.v1.router import api_router
 from app.api.websocket import websocket_endpoint
 from app.config import get_settings
+from app.core.compression import CompressionMiddleware
 from app.core.logging import setup_logging
 from app.db.init_db import init_database
 from app.db.mongodb import close_mongodb, connect_mongodb, get_database
+from app.db.rabbitmq import close_rabbitmq
+from app.db.redis import close_redis
+from app.db.write_buffer import close_write_buffers
 
 settings = get_settings()
 
@@ -27,6 +32,9 @@ async def lifespan(app: FastAPI):
     await init_database(db)
     yield
     # Shutdown
+    await close_write_buffers()
+    await close_rabbitmq()
+    await close_redis()
     await close_mongodb()
 
 
@@ -49,6 +57,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressed request bodies and responses (outermost, so it sees final bodies)
+app.add_middleware(CompressionMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.api_v1_prefix)
 
@@ -70,6 +81,12 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus metrics of this process."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint."""
@@ -3,6 +3,7 @@
 from app.models.alert import Alert, AlertRule
 from app.models.log import Log
 from app.models.metric import Metric
+from app.models.series import Series
 from app.models.user import User
 
-__all__ = ["User", "Metric", "Log", "Alert", "AlertRule"]
+__all__ = ["User", "Metric", "Series", "Log", "Alert", "AlertRule"]
@@ -0,0 +1,42 @@
+"""Series catalog model for MongoDB."""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pydantic import BaseModel, Field
+
+
+class Series(BaseModel):
+    """A metric series: one name/source/namespace/cluster/labels combination."""
+
+    id: Optional[str] = Field(default=None, alias="_id")
+    series_key: str
+    name: str
+    source: str
+    namespace: Optional[str] = Field(default="default")
+    cluster: Optional[str] = Field(default="default")
+    labels: Dict[str, str] = Field(default_factory=dict)
+    label_keys: List[str] = Field(default_factory=list)
+    first_seen: datetime
+    last_seen: datetime
+
+    class Config:
+        populate_by_name = True
+        json_encoders = {ObjectId: str, datetime: lambda v: v.isoformat()}
+
+    def to_mongo(self) -> dict:
+        """Convert to MongoDB document."""
+        data = self.model_dump(by_alias=True, exclude_none=True)
+        if "_id" in data and data["_id"]:
+            data["_id"] = ObjectId(data["_id"])
+        return data
+
+    @classmethod
+    def from_mongo(cls, data: dict) -> "Series":
+        """Create from MongoDB document."""
+        if data is None:
+            return None
+        if "_id" in data:
+            data["_id"] = str(data["_id"])
+        return cls(**data)
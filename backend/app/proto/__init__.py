@@ -0,0 +1 @@
+"""Protocol buffer schemas of binary ingest bodies."""
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: app/proto/metrics.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17\x61pp/proto/metrics.proto\x12\x14infrawatch.ingest.v1\"\xdf\x02\n\x06Metric\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x35\n\x0bmetric_type\x18\x02 \x01(\x0e\x32 .infrawatch.ingest.v1.MetricType\x12\r\n\x05value\x18\x03 \x01(\x01\x12\x11\n\x04unit\x18\x04 \x01(\tH\x00\x88\x01\x01\x12\x13\n\x06source\x18\x05 \x01(\tH\x01\x88\x01\x01\x12\x16\n\tnamespace\x18\x06 \x01(\tH\x02\x88\x01\x01\x12\x14\n\x07\x63luster\x18\x07 \x01(\tH\x03\x88\x01\x01\x12\x38\n\x06labels\x18\x08 \x03(\x0b\x32(.infrawatch.ingest.v1.Metric.LabelsEntry\x12\x14\n\x0ctimestamp_ms\x18\t \x01(\x03\x1a-\n\x0bLabelsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x42\x07\n\x05_unitB\t\n\x07_sourceB\x0c\n\n_namespaceB\n\n\x08_cluster\"\x82\x02\n\x0bMetricBatch\x12\x0e\n\x06source\x18\x01 \x01(\t\x12\x16\n\tnamespace\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x14\n\x07\x63luster\x18\x03 \x01(\tH\x01\x88\x01\x01\x12=\n\x06labels\x18\x04 \x03(\x0b\x32-.infrawatch.ingest.v1.MetricBatch.LabelsEntry\x12-\n\x07metrics\x18\x05 \x03(\x0b\x32\x1c.infrawatch.ingest.v1.Metric\x1a-\n\x0bLabelsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x42\x0c\n\n_namespaceB\n\n\x08_cluster*\xff\x01\n\nMetricType\x12\x1b\n\x17METRIC_TYPE_UNSPECIFIED\x10\x00\x12\x13\n\x0fMETRIC_TYPE_CPU\x10\x01\x12\x16\n\x12METRIC_TYPE_MEMORY\x10\x02\x12\x14\n\x10METRIC_TYPE_DISK\x10\x03\x12\x17\n\x13METRIC_TYPE_NETWORK\x10\x04\x12\x13\n\x0fMETRIC_TYPE_POD\x10\x05\x12\x14\n\x10METRIC_TYPE_NODE\x10\x06\x12\x1a\n\x16METRIC_TYPE_DEPLOYMENT\x10\x07\x12\x19\n\x15METRIC_TYPE_CONTAINER\x10\x08\x12\x16\n\x12METRIC_TYPE_CUSTOM\x10\tb\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'app.proto.metrics_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _METRIC_LABELSENTRY._options = None
+  _METRIC_LABELSENTRY._serialized_options = b'8\001'
+  _METRICBATCH_LABELSENTRY._options = None
+  _METRICBATCH_LABELSENTRY._serialized_options = b'8\001'
+  _METRICTYPE._serialized_start=665
+  _METRICTYPE._serialized_end=920
+  _METRIC._serialized_start=50
+  _METRIC._serialized_end=401
+  _METRIC_LABELSENTRY._serialized_start=310
+  _METRIC_LABELSENTRY._serialized_end=355
+  _METRICBATCH._serialized_start=404
+  _METRICBATCH._serialized_end=662
+  _METRICBATCH_LABELSENTRY._serialized_start=310
+  _METRICBATCH_LABELSENTRY._serialized_end=355
+# @@protoc_insertion_point(module_scope)
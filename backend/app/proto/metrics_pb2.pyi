@@ -0,0 +1,70 @@
+from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from typing import ClassVar as _ClassVar, Iterable as _Iterable, Mapping as _Mapping, Optional as _Optional, Union as _Union
+
+DESCRIPTOR: _descriptor.FileDescriptor
+METRIC_TYPE_CONTAINER: MetricType
+METRIC_TYPE_CPU: MetricType
+METRIC_TYPE_CUSTOM: MetricType
+METRIC_TYPE_DEPLOYMENT: MetricType
+METRIC_TYPE_DISK: MetricType
+METRIC_TYPE_MEMORY: MetricType
+METRIC_TYPE_NETWORK: MetricType
+METRIC_TYPE_NODE: MetricType
+METRIC_TYPE_POD: MetricType
+METRIC_TYPE_UNSPECIFIED: MetricType
+
+class Metric(_message.Message):
+    __slots__ = ["cluster", "labels", "metric_type", "name", "namespace", "source", "timestamp_ms", "unit", "value"]
+    class LabelsEntry(_message.Message):
+        __slots__ = ["key", "value"]
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+    CLUSTER_FIELD_NUMBER: _ClassVar[int]
+    LABELS_FIELD_NUMBER: _ClassVar[int]
+    METRIC_TYPE_FIELD_NUMBER: _ClassVar[int]
+    NAMESPACE_FIELD_NUMBER: _ClassVar[int]
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    SOURCE_FIELD_NUMBER: _ClassVar[int]
+    TIMESTAMP_MS_FIELD_NUMBER: _ClassVar[int]
+    UNIT_FIELD_NUMBER: _ClassVar[int]
+    VALUE_FIELD_NUMBER: _ClassVar[int]
+    cluster: str
+    labels: _containers.ScalarMap[str, str]
+    metric_type: MetricType
+    name: str
+    namespace: str
+    source: str
+    timestamp_ms: int
+    unit: str
+    value: float
+    def __init__(self, name: _Optional[str] = ..., metric_type: _Optional[_Union[MetricType, str]] = ..., value: _Optional[float] = ..., unit: _Optional[str] = ..., source: _Optional[str] = ..., namespace: _Optional[str] = ..., cluster: _Optional[str] = ..., labels: _Optional[_Mapping[str, str]] = ..., timestamp_ms: _Optional[int] = ...) -> None: ...
+
+class MetricBatch(_message.Message):
+    __slots__ = ["cluster", "labels", "metrics", "namespace", "source"]
+    class LabelsEntry(_message.Message):
+        __slots__ = ["key", "value"]
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: str
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+    CLUSTER_FIELD_NUMBER: _ClassVar[int]
+    LABELS_FIELD_NUMBER: _ClassVar[int]
+    METRICS_FIELD_NUMBER: _ClassVar[int]
+    NAMESPACE_FIELD_NUMBER: _ClassVar[int]
+    SOURCE_FIELD_NUMBER: _ClassVar[int]
+    cluster: str
+    labels: _containers.ScalarMap[str, str]
+    metrics: _containers.RepeatedCompositeFieldContainer[Metric]
+    namespace: str
+    source: str
+    def __init__(self, source: _Optional[str] = ..., namespace: _Optional[str] = ..., cluster: _Optional[str] = ..., labels: _Optional[_Mapping[str, str]] = ..., metrics: _Optional[_Iterable[_Union[Metric, _Mapping]]] = ...) -> None: ...
+
+class MetricType(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = []
@@ -4,12 +4,14 @@ from app.repositories.alert_repository import AlertRepository, AlertRuleReposito
 from app.repositories.base_repository import BaseRepository
 from app.repositories.log_repository import LogRepository
 from app.repositories.metric_repository import MetricRepository
+from app.repositories.series_repository import SeriesRepository
 from app.repositories.user_repository import UserRepository
 
 __all__ = [
     "BaseRepository",
     "UserRepository",
     "MetricRepository",
+    "SeriesRepository",
     "LogRepository",
     "AlertRepository",
     "AlertRuleRepository",
@@ -1,14 +1,23 @@
 """Alert repository for database operations."""
 
+from collections import Counter
 from datetime import datetime, timezone
+from enum import Enum
 from typing import Any, Dict, List, Optional
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo import DESCENDING
+from pymongo import DESCENDING, ReplaceOne, UpdateOne
 
 from app.models.alert import Alert, AlertRule, AlertSeverity, AlertStatus
 from app.repositories.base_repository import BaseRepository
+from app.utils.cursors import Cursor, keyset_filter, keyset_sort
+
+# Alert fields counted in alert_counters, one document per (field, value)
+COUNTED_FIELDS = ("status", "severity", "source")
+STATS_TOP_SOURCES = 10
+# Marks that the counters were built from the alerts collection
+COUNTERS_META_ID = "_meta"
 
 
 class AlertRepository(BaseRepository[Alert]):
@@ -16,6 +25,7 @@ class AlertRepository(BaseRepository[Alert]):
 
     def __init__(self, db: AsyncIOMotorDatabase):
         super().__init__(db, "alerts", Alert)
+        self.counters = db["alert_counters"]
 
     async def create_alert(
         self,
@@ -43,7 +53,9 @@ class AlertRepository(BaseRepository[Alert]):
             "rule_id": rule_id,
             "created_at": datetime.now(timezone.utc),
         }
-        return await self.create(alert_data)
+        alert = await self.create(alert_data)
+        await self._count_transition(None, alert_data)
+        return alert
 
     async def get_active_alerts(
         self,
@@ -72,6 +84,24 @@ class AlertRepository(BaseRepository[Alert]):
             sort=[("created_at", DESCENDING)],
         )
 
+    async def list_alert_documents(
+        self,
+        status: Optional[AlertStatus] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """List raw alerts newest first, or reading away from ``cursor``."""
+        filter = {"status": status.value} if status else {}
+        return await self.find_documents(
+            filter=keyset_filter(filter, cursor, "created_at"),
+            skip=skip,
+            limit=limit,
+            sort=keyset_sort(cursor, "created_at"),
+            projection=projection,
+        )
+
     async def acknowledge(
         self,
         alert_id: str,
@@ -104,48 +134,122 @@ class AlertRepository(BaseRepository[Alert]):
             {"status": AlertStatus.SILENCED.value},
         )
 
+    async def update(self, id: str, data: Dict[str, Any]) -> Optional[Alert]:
+        """Update an alert by ID, keeping the counters in step."""
+        if not ObjectId.is_valid(id):
+            return None
+        before = await self.collection.find_one_and_update(
+            {"_id": ObjectId(id)},
+            {"$set": data},
+        )
+        if before is None:
+            return None
+        after = {**before, **data}
+        await self._count_transition(before, after)
+        return Alert.from_mongo(after)
+
+    async def delete(self, id: str) -> bool:
+        """Delete an alert by ID, keeping the counters in step."""
+        if not ObjectId.is_valid(id):
+            return False
+        before = await self.collection.find_one_and_delete({"_id": ObjectId(id)})
+        if before is None:
+            return False
+        await self._count_transition(before, None)
+        return True
+
     async def get_stats(self) -> Dict[str, Any]:
-        """Get alert statistics."""
+        """Get alert statistics from the maintained counters.
+
+        The counters are built from the alerts collection on first use.
+        """
+        if not await self.counters.find_one({"_id": COUNTERS_META_ID}, {"_id": 1}):
+            await self.rebuild_counters()
+
+        totals = await self.counters.find(
+            {"field": {"$in": ["status", "severity"]}, "count": {"$gt": 0}}
+        ).to_list(length=None)
+        sources = (
+            await self.counters.find({"field": "source", "count": {"$gt": 0}})
+            .sort("count", DESCENDING)
+            .limit(STATS_TOP_SOURCES)
+            .to_list(length=STATS_TOP_SOURCES)
+        )
+        status_counts = {c["value"]: c["count"] for c in totals if c["field"] == "status"}
+
+        return {
+            "total_active": status_counts.get(AlertStatus.ACTIVE.value, 0),
+            "total_acknowledged": status_counts.get(AlertStatus.ACKNOWLEDGED.value, 0),
+            "total_resolved": status_counts.get(AlertStatus.RESOLVED.value, 0),
+            "by_severity": {c["value"]: c["count"] for c in totals if c["field"] == "severity"},
+            "by_source": {c["value"]: c["count"] for c in sources},
+        }
+
+    async def rebuild_counters(self) -> None:
+        """Recount every counter from the alerts collection."""
         pipeline = [
             {
                 "$facet": {
-                    "by_status": [
-                        {"$group": {"_id": "$status", "count": {"$sum": 1}}},
-                    ],
-                    "by_severity": [
-                        {"$group": {"_id": "$severity", "count": {"$sum": 1}}},
-                    ],
-                    "by_source": [
-                        {"$group": {"_id": "$source", "count": {"$sum": 1}}},
-                        {"$sort": {"count": -1}},
-                        {"$limit": 10},
-                    ],
+                    field: [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+                    for field in COUNTED_FIELDS
                 }
             },
         ]
+        result = await self.collection.aggregate(pipeline).to_list(length=1)
+        ids = []
+        operations = []
+        for field, groups in (result[0] if result else {}).items():
+            for group in groups:
+                if group["_id"] is None:
+                    continue
+                counter_id = _counter_id(field, group["_id"])
+                ids.append(counter_id)
+                document = {"field": field, "value": group["_id"], "count": group["count"]}
+                operations.append(ReplaceOne({"_id": counter_id}, document, upsert=True))
+        operations.append(
+            UpdateOne(
+                {"_id": COUNTERS_META_ID},
+                {"$set": {"rebuilt_at": datetime.now(timezone.utc)}},
+                upsert=True,
+            )
+        )
+        await self.counters.bulk_write(operations, ordered=False)
+        await self.counters.update_many(
+            {"_id": {"$nin": ids}, "field": {"$exists": True}}, {"$set": {"count": 0}}
+        )
 
-        cursor = self.collection.aggregate(pipeline)
-        result = await cursor.to_list(length=1)
+    async def _count_transition(
+        self,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]],
+    ) -> None:
+        """Apply the counter changes of an alert going from ``before`` to ``after``."""
+        deltas: Counter = Counter()
+        for field in COUNTED_FIELDS:
+            if before is not None:
+                deltas[(field, _counted_value(before.get(field)))] -= 1
+            if after is not None:
+                deltas[(field, _counted_value(after.get(field)))] += 1
+        operations = [
+            UpdateOne(
+                {"_id": _counter_id(field, value)},
+                {"$inc": {"count": delta}, "$setOnInsert": {"field": field, "value": value}},
+                upsert=True,
+            )
+            for (field, value), delta in deltas.items()
+            if delta and value is not None
+        ]
+        if operations:
+            await self.counters.bulk_write(operations, ordered=False)
 
-        if not result:
-            return {
-                "total_active": 0,
-                "total_acknowledged": 0,
-                "total_resolved": 0,
-                "by_severity": {},
-                "by_source": {},
-            }
 
-        data = result[0]
-        status_counts = {item["_id"]: item["count"] for item in data["by_status"]}
+def _counted_value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
 
-        return {
-            "total_active": status_counts.get(AlertStatus.ACTIVE.value, 0),
-            "total_acknowledged": status_counts.get(AlertStatus.ACKNOWLEDGED.value, 0),
-            "total_resolved": status_counts.get(AlertStatus.RESOLVED.value, 0),
-            "by_severity": {item["_id"]: item["count"] for item in data["by_severity"]},
-            "by_source": {item["_id"]: item["count"] for item in data["by_source"]},
-        }
+
+def _counter_id(field: str, value: Any) -> str:
+    """ID of the counter of alerts whose ``field`` equals ``value``."""
+    return f"{field}:{value}"
 
 
 class AlertRuleRepository(BaseRepository[AlertRule]):
@@ -1,10 +1,18 @@
 """Base repository with common CRUD operations."""
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
+from typing import Any, AsyncIterator, Dict, Generic, List, Optional, Type, TypeVar
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
 from pydantic import BaseModel
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError
+
+from app.config import get_settings
+from app.db.write_buffer import get_write_buffer
+from app.schemas.common import BatchItemError, BatchWriteResult
+
+settings = get_settings()
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -23,6 +31,42 @@ class BaseRepository(Generic[T]):
         data["_id"] = str(result.inserted_id)
         return self.model.from_mongo(data)
 
+    async def create_buffered(self, data: Dict[str, Any]) -> T:
+        """Create a new document through the shared write buffer if enabled."""
+        data["_id"] = await self.insert_buffered(data)
+        return self.model.from_mongo(data)
+
+    async def insert_buffered(self, document: Dict[str, Any]) -> str:
+        """Insert a raw document through the write buffer if enabled."""
+        if not settings.write_buffer_enabled:
+            result = await self.collection.insert_one(document)
+            return str(result.inserted_id)
+        return str(await get_write_buffer(self.collection).insert(document))
+
+    async def insert_many_unordered(
+        self,
+        documents: List[Dict[str, Any]],
+    ) -> BatchWriteResult:
+        """Insert documents without stopping at the first failure.
+
+        Uses the ingest write concern and reports the index and reason of
+        every document the server rejected.
+        """
+        if not documents:
+            return BatchWriteResult(accepted=0)
+        collection = self.collection.with_options(write_concern=ingest_write_concern())
+        try:
+            result = await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            return BatchWriteResult(
+                accepted=e.details.get("nInserted", 0),
+                errors=[
+                    BatchItemError(index=error["index"], reason=error.get("errmsg", ""))
+                    for error in e.details.get("writeErrors", [])
+                ],
+            )
+        return BatchWriteResult(accepted=len(result.inserted_ids))
+
     async def get_by_id(self, id: str) -> Optional[T]:
         """Get a document by ID."""
         if not ObjectId.is_valid(id):
@@ -40,18 +84,58 @@ class BaseRepository(Generic[T]):
         sort: Optional[List[tuple]] = None,
     ) -> List[T]:
         """Get all documents with optional filtering and pagination."""
-        filter = filter or {}
-        cursor = self.collection.find(filter).skip(skip).limit(limit)
+        docs = await self.find_documents(filter, skip, limit, sort)
+        return [self.model.from_mongo(doc) for doc in docs]
+
+    async def find_documents(
+        self,
+        filter: Optional[Dict[str, Any]] = None,
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[List[tuple]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get raw documents like ``get_all``, without building models."""
+        cursor = self.collection.find(filter or {}, projection).skip(skip).limit(limit)
         if sort:
             cursor = cursor.sort(sort)
-        docs = await cursor.to_list(length=limit)
-        return [self.model.from_mongo(doc) for doc in docs]
+        return await cursor.to_list(length=limit)
+
+    async def iter_documents(
+        self,
+        filter: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[tuple]] = None,
+        batch_size: int = 1000,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate raw matching documents without loading them all.
+
+        The cursor is closed when iteration stops early.
+        """
+        cursor = self.collection.find(filter or {}, projection, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            async for doc in cursor:
+                yield doc
+        finally:
+            await cursor.close()
 
-    async def count(self, filter: Optional[Dict[str, Any]] = None) -> int:
-        """Count documents matching the filter."""
+    async def count(
+        self,
+        filter: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> int:
+        """Count documents matching the filter, stopping at ``limit`` if given."""
         filter = filter or {}
+        if limit:
+            return await self.collection.count_documents(filter, limit=limit)
         return await self.collection.count_documents(filter)
 
+    async def estimated_count(self) -> Optional[int]:
+        """Count all documents from collection metadata without scanning."""
+        return await self.collection.estimated_document_count()
+
     async def update(
         self,
         id: str,
@@ -85,3 +169,9 @@ class BaseRepository(Generic[T]):
         """Check if a document exists."""
         doc = await self.collection.find_one(filter, {"_id": 1})
         return doc is not None
+
+
+def ingest_write_concern() -> WriteConcern:
+    """Build the write concern used by ingest paths."""
+    w = settings.ingest_write_concern
+    return WriteConcern(w=int(w) if w.isdigit() else w)
@@ -1,14 +1,25 @@
 """Log repository for database operations."""
 
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo import DESCENDING
+from pymongo import ASCENDING, DESCENDING
 
+from app.config import get_settings
 from app.models.log import Log, LogLevel
 from app.repositories.base_repository import BaseRepository
+from app.schemas.common import BatchWriteResult
 from app.schemas.log import LogQuery
+from app.utils.cursors import Cursor, keyset_filter, keyset_sort
+from app.utils.ngrams import index_fields, search_filter
+
+settings = get_settings()
+
+# Trigram index fields are internal and never returned
+INDEX_FIELDS_EXCLUDED = {"_trigrams": 0, "_trigrams_partial": 0}
+# LogQuery fields matched by equality
+MATCH_FIELDS = ("source", "namespace", "cluster", "pod_name", "container_name")
 
 
 class LogRepository(BaseRepository[Log]):
@@ -42,38 +53,64 @@ class LogRepository(BaseRepository[Log]):
             "labels": labels or {},
             "metadata": metadata or {},
             "timestamp": timestamp or datetime.now(timezone.utc),
+            **index_fields(message, settings.log_search_max_indexed_chars),
         }
-        return await self.create(log_data)
+        return await self.create_buffered(log_data)
 
-    async def create_batch(self, logs: List[Dict[str, Any]]) -> int:
+    async def create_batch(self, logs: List[Dict[str, Any]]) -> BatchWriteResult:
         """Create multiple log entries at once."""
-        if not logs:
-            return 0
         for log in logs:
             if "timestamp" not in log or log["timestamp"] is None:
                 log["timestamp"] = datetime.now(timezone.utc)
-        result = await self.collection.insert_many(logs)
-        return len(result.inserted_ids)
+            log.update(index_fields(log["message"], settings.log_search_max_indexed_chars))
+        return await self.insert_many_unordered(logs)
 
     async def query_logs(
         self,
         query: LogQuery,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[Cursor] = None,
     ) -> List[Log]:
-        """Query logs with filters."""
+        """Query logs with filters, newest first or reading away from ``cursor``."""
+        docs = await self.query_log_documents(query, skip, limit, cursor)
+        return [Log.from_mongo(doc) for doc in docs]
+
+    async def query_log_documents(
+        self,
+        query: LogQuery,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Query raw log entries like ``query_logs``."""
         filter_dict = self._build_filter(query)
-        return await self.get_all(
-            filter=filter_dict,
+        return await self.find_documents(
+            filter=keyset_filter(filter_dict, cursor),
             skip=skip,
             limit=limit,
-            sort=[("timestamp", DESCENDING)],
+            sort=keyset_sort(cursor),
+            projection=projection,
+        )
+
+    def iter_logs(
+        self,
+        query: LogQuery,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate raw log entries matching a query, oldest first."""
+        return self.iter_documents(
+            self._build_filter(query),
+            sort=[("timestamp", ASCENDING)],
+            batch_size=batch_size,
+            projection=INDEX_FIELDS_EXCLUDED,
         )
 
-    async def count_query(self, query: LogQuery) -> int:
-        """Count logs matching query."""
+    async def count_query(self, query: LogQuery, limit: Optional[int] = None) -> int:
+        """Count logs matching query, stopping at ``limit`` if given."""
         filter_dict = self._build_filter(query)
-        return await self.count(filter_dict)
+        return await self.count(filter_dict, limit)
 
     def _build_filter(self, query: LogQuery) -> Dict[str, Any]:
         """Build MongoDB filter from query."""
@@ -81,18 +118,16 @@ class LogRepository(BaseRepository[Log]):
 
         if query.level:
             filter_dict["level"] = query.level.value
-        if query.source:
-            filter_dict["source"] = query.source
-        if query.namespace:
-            filter_dict["namespace"] = query.namespace
-        if query.cluster:
-            filter_dict["cluster"] = query.cluster
-        if query.pod_name:
-            filter_dict["pod_name"] = query.pod_name
-        if query.container_name:
-            filter_dict["container_name"] = query.container_name
-
-        if query.search:
+        for field in MATCH_FIELDS:
+            value = getattr(query, field)
+            if value:
+                filter_dict[field] = value
+
+        if query.search and query.search_mode in ("substring", "regex"):
+            filter_dict.update(
+                search_filter(query.search, query.search_mode, settings.log_search_max_grams)
+            )
+        elif query.search:
             filter_dict["$text"] = {"$search": query.search}
 
         if query.start_time or query.end_time:
@@ -108,12 +143,14 @@ class LogRepository(BaseRepository[Log]):
         self,
         source: str,
         limit: int = 50,
-    ) -> List[Log]:
-        """Get latest logs for a source."""
-        return await self.get_all(
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get the latest raw log entries for a source."""
+        return await self.find_documents(
             filter={"source": source},
             limit=limit,
             sort=[("timestamp", DESCENDING)],
+            projection=projection,
         )
 
     async def get_stats(
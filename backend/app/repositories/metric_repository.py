@@ -1,21 +1,102 @@
 """Metric repository for database operations."""
 
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from array import array
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+import numpy as np
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo import DESCENDING
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
+from app.config import get_settings
+from app.db.timeseries import (
+    flatten_stage,
+    from_timeseries_document,
+    timeseries_filter,
+    to_timeseries_document,
+)
 from app.models.metric import Metric, MetricType
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, ingest_write_concern
+from app.schemas.common import BatchItemError, BatchWriteResult
 from app.schemas.metric import MetricQuery
+from app.utils.cursors import Cursor, keyset_filter, keyset_sort
+from app.utils.rollups import (
+    ROLLUP_RESOLUTIONS,
+    choose_resolution,
+    choose_step_resolution,
+    rollup_checkpoint,
+    rollup_collection,
+    split_at_checkpoint,
+)
+from app.utils.series import bucket_start, series_key
+from app.utils.stats import PERCENTILES
+
+settings = get_settings()
+
+# Fields shared by every sample of a series, stored once per bucket
+SERIES_FIELDS = ("name", "metric_type", "unit", "source", "namespace", "cluster", "labels")
+# Fields identifying a series in range query results
+SERIES_IDENTITY = ("name", "source", "namespace", "cluster", "labels")
+
+# Range query aggregation -> $group accumulator over raw samples
+RANGE_AGGREGATIONS = {
+    "avg": {"$avg": "$value"},
+    "min": {"$min": "$value"},
+    "max": {"$max": "$value"},
+    "sum": {"$sum": "$value"},
+    "count": {"$sum": 1},
+    "first": {"$first": "$value"},
+    "last": {"$last": "$value"},
+}
+# Aggregations that can be computed from rollup windows
+ROLLUP_AGGREGATIONS = ("avg", "min", "max", "sum", "count")
+# $group accumulators summarising raw samples, and rollup windows, as a window
+WINDOW_ACCUMULATORS = {
+    "count": {"$sum": 1},
+    "sum": {"$sum": "$value"},
+    "min": {"$min": "$value"},
+    "max": {"$max": "$value"},
+}
+ROLLUP_ACCUMULATORS = {
+    "count": {"$sum": "$count"},
+    "sum": {"$sum": "$sum"},
+    "min": {"$min": "$min"},
+    "max": {"$max": "$max"},
+}
 
 
 class MetricRepository(BaseRepository[Metric]):
-    """Repository for metric operations."""
+    """Repository for metric operations.
+
+    Samples are stored either one document per sample in ``metrics`` or,
+    with the ``buckets`` layout, one document per series per time bucket in
+    ``metric_buckets`` holding parallel ``timestamps``, ``values`` and
+    ``metadata`` arrays.
+    With the ``timeseries`` layout ``metrics`` is a MongoDB time-series
+    collection whose series fields live under the ``meta`` metaField.
+    Reads go through ``_sample_pipeline`` so every layout returns the same
+    flat sample documents. Long-range reads are served from the rollup
+    collections written by the workers when rollups are enabled; windows
+    past the workers' rollup checkpoint are computed from raw samples.
+    """
 
     def __init__(self, db: AsyncIOMotorDatabase):
         super().__init__(db, "metrics", Metric)
+        self.layout = settings.metrics_storage_layout
+        self.buckets = db["metric_buckets"]
+
+    @property
+    def bucketed(self) -> bool:
+        """Whether samples are stored in series buckets."""
+        return self.layout == "buckets"
+
+    @property
+    def timeseries(self) -> bool:
+        """Whether ``metrics`` is a time-series collection."""
+        return self.layout == "timeseries"
 
     async def create_metric(
         self,
@@ -43,37 +124,181 @@ class MetricRepository(BaseRepository[Metric]):
             "metadata": metadata or {},
             "timestamp": timestamp or datetime.now(timezone.utc),
         }
-        return await self.create(metric_data)
+        if self.bucketed:
+            return await self._create_in_bucket(metric_data)
+        if self.timeseries:
+            metric_data["_id"] = await self.insert_buffered(
+                to_timeseries_document(metric_data)
+            )
+            return Metric.from_mongo(metric_data)
+        return await self.create_buffered(metric_data)
 
-    async def create_batch(self, metrics: List[Dict[str, Any]]) -> int:
+    async def create_batch(self, metrics: List[Dict[str, Any]]) -> BatchWriteResult:
         """Create multiple metrics at once."""
-        if not metrics:
-            return 0
         for metric in metrics:
             if "timestamp" not in metric or metric["timestamp"] is None:
                 metric["timestamp"] = datetime.now(timezone.utc)
-        result = await self.collection.insert_many(metrics)
-        return len(result.inserted_ids)
+        if self.bucketed:
+            return await self._create_batch_in_buckets(metrics)
+        if self.timeseries:
+            return await self.insert_many_unordered(
+                [to_timeseries_document(metric) for metric in metrics]
+            )
+        return await self.insert_many_unordered(metrics)
+
+    async def get_by_id(self, id: str) -> Optional[Metric]:
+        """Get a metric by ID.
+
+        In the buckets layout IDs have the form ``<bucket id>-<index>``.
+        """
+        if self.timeseries:
+            if not ObjectId.is_valid(id):
+                return None
+            doc = await self.collection.find_one({"_id": ObjectId(id)})
+            return Metric.from_mongo(from_timeseries_document(doc)) if doc else None
+        if not self.bucketed:
+            return await super().get_by_id(id)
+        location = _parse_sample_id(id)
+        if location is None:
+            return None
+        bucket_id, index = location
+        bucket = await self.buckets.find_one(
+            {"_id": bucket_id, "count": {"$gt": index}},
+            {
+                **dict.fromkeys(SERIES_FIELDS, 1),
+                "metadata": {"$slice": [index, 1]},
+                "timestamps": {"$slice": [index, 1]},
+                "values": {"$slice": [index, 1]},
+            },
+        )
+        if not bucket:
+            return None
+        return Metric.from_mongo(_sample_from_bucket(bucket, index))
+
+    async def delete(self, id: str) -> bool:
+        """Delete a metric by ID.
+
+        Individual samples cannot be removed from a bucket without shifting
+        the IDs of later samples, so this always fails in the buckets layout.
+        """
+        if self.bucketed:
+            return False
+        return await super().delete(id)
 
     async def query_metrics(
         self,
         query: MetricQuery,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[Cursor] = None,
     ) -> List[Metric]:
-        """Query metrics with filters."""
+        """Query metrics with filters, newest first or reading away from ``cursor``.
+
+        When a rollup resolution applies, each returned metric is one
+        window with the average as value and count/min/max in metadata.
+        """
+        docs = await self.query_metric_documents(query, skip, limit, cursor)
+        return [Metric.from_mongo(doc) for doc in docs]
+
+    async def query_metric_documents(
+        self,
+        query: MetricQuery,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Query raw flat samples like ``query_metrics``.
+
+        ``projection`` applies to raw samples; rollup windows always have
+        the sample fields only.
+        """
         filter_dict = self._build_filter(query)
-        return await self.get_all(
-            filter=filter_dict,
+        resolution, rolled_up_until = await self._rollup_read(query)
+        if resolution:
+            docs = await self._find_windows(
+                filter_dict, resolution, rolled_up_until, skip, limit, cursor
+            )
+            return [_sample_from_rollup(doc, resolution) for doc in docs]
+        return await self._find_samples(
+            filter_dict,
             skip=skip,
             limit=limit,
-            sort=[("timestamp", DESCENDING)],
+            sort=keyset_sort(cursor),
+            keyset=keyset_filter({}, cursor) if cursor else None,
+            projection=projection,
+        )
+
+    async def iter_samples(
+        self,
+        query: MetricQuery,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate raw samples matching a query, oldest first."""
+        filter_dict = self._build_filter(query)
+        if not (self.bucketed or self.timeseries):
+            async with aclosing(
+                self.iter_documents(
+                    filter_dict, sort=[("timestamp", ASCENDING)], batch_size=batch_size
+                )
+            ) as docs:
+                async for doc in docs:
+                    yield doc
+            return
+
+        pipeline = self._sample_pipeline(filter_dict)
+        if self.timeseries:
+            pipeline.insert(1, {"$sort": {"timestamp": 1}})
+        else:
+            pipeline.append({"$sort": {"timestamp": 1}})
+        cursor = self.sample_collection.aggregate(
+            pipeline, allowDiskUse=True, batchSize=batch_size
         )
+        try:
+            async for doc in cursor:
+                yield doc
+        finally:
+            await cursor.close()
 
-    async def count_query(self, query: MetricQuery) -> int:
-        """Count metrics matching query."""
+    async def count_query(self, query: MetricQuery, limit: Optional[int] = None) -> int:
+        """Count metrics matching query, stopping at ``limit`` if given."""
         filter_dict = self._build_filter(query)
-        return await self.count(filter_dict)
+        resolution, rolled_up_until = await self._rollup_read(query)
+        if resolution:
+            rolled, raw = split_at_checkpoint(filter_dict, rolled_up_until)
+            count = len(await self._raw_windows(raw, resolution)) if raw else 0
+            if rolled and not (limit and count >= limit):
+                limit_option = {"limit": limit - count} if limit else {}
+                count += await self.db[rollup_collection(resolution)].count_documents(
+                    rolled, **limit_option
+                )
+            return min(count, limit) if limit else count
+        if self.timeseries:
+            return await self.count(timeseries_filter(filter_dict), limit)
+        if not self.bucketed:
+            return await self.count(filter_dict, limit)
+        if "timestamp" not in filter_dict:
+            pipeline = [
+                {"$match": filter_dict},
+                {"$group": {"_id": None, "count": {"$sum": "$count"}}},
+            ]
+        else:
+            pipeline = self._sample_pipeline(filter_dict)
+            if limit:
+                pipeline.append({"$limit": limit})
+            pipeline.append({"$count": "count"})
+        result = await self.buckets.aggregate(pipeline).to_list(length=1)
+        return result[0]["count"] if result else 0
+
+    async def estimated_count(self) -> Optional[int]:
+        """Count all samples from collection metadata.
+
+        Only the documents layout stores one sample per document, so the
+        other layouts return None.
+        """
+        if self.bucketed or self.timeseries:
+            return None
+        return await super().estimated_count()
 
     def _build_filter(self, query: MetricQuery) -> Dict[str, Any]:
         """Build MongoDB filter from query."""
@@ -103,47 +328,595 @@ class MetricRepository(BaseRepository[Metric]):
         self,
         source: str,
         limit: int = 10,
-    ) -> List[Metric]:
-        """Get latest metrics for a source."""
-        return await self.get_all(
-            filter={"source": source},
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get the latest raw samples for a source."""
+        return await self._find_samples(
+            {"source": source},
             limit=limit,
             sort=[("timestamp", DESCENDING)],
+            projection=projection,
         )
 
     async def get_aggregations(
         self,
         query: MetricQuery,
+        percentiles: bool = False,
     ) -> List[Dict[str, Any]]:
-        """Get metric aggregations."""
+        """Get metric aggregations.
+
+        With ``percentiles`` the server computes approximate p50/p90/p95/p99
+        with ``$percentile`` (MongoDB 7.0+); rollups are not used then.
+        """
+        filter_dict = self._build_filter(query)
+        resolution, rolled_up_until = (
+            (None, None) if percentiles else await self._rollup_read(query)
+        )
+        if resolution:
+            return await self._window_aggregations(filter_dict, resolution, rolled_up_until)
+
+        group: Dict[str, Any] = {
+            "_id": {
+                "name": "$name",
+                "metric_type": "$metric_type",
+            },
+            "avg_value": {"$avg": "$value"},
+            "min_value": {"$min": "$value"},
+            "max_value": {"$max": "$value"},
+            "count": {"$sum": 1},
+        }
+        if percentiles:
+            group["percentiles"] = {
+                "$percentile": {
+                    "input": "$value",
+                    "p": [q / 100 for q in PERCENTILES],
+                    "method": "approximate",
+                }
+            }
+        pipeline = self._sample_pipeline(filter_dict) + [{"$group": group}]
+
+        projection: Dict[str, Any] = {
+            "_id": 0,
+            "name": "$_id.name",
+            "metric_type": "$_id.metric_type",
+            "avg_value": {"$round": ["$avg_value", 2]},
+            "min_value": {"$round": ["$min_value", 2]},
+            "max_value": {"$round": ["$max_value", 2]},
+            "count": 1,
+        }
+        if percentiles:
+            for i, q in enumerate(PERCENTILES):
+                projection[f"p{q}"] = {"$round": [{"$arrayElemAt": ["$percentiles", i]}, 2]}
+        pipeline.append({"$project": projection})
+
+        cursor = self.sample_collection.aggregate(pipeline)
+        return await cursor.to_list(length=100)
+
+    async def collect_values(
+        self,
+        query: MetricQuery,
+        max_values: int,
+    ) -> Dict[Tuple[str, str], np.ndarray]:
+        """Stream raw sample values into one float64 array per name and type.
+
+        Reading stops after ``max_values`` values, so callers can detect an
+        oversized range by asking for one more than they accept.
+        """
         filter_dict = self._build_filter(query)
+        pipeline = self._sample_pipeline(filter_dict) + [
+            {"$project": {"_id": 0, "name": 1, "metric_type": 1, "value": 1}}
+        ]
+        columns: Dict[Tuple[str, str], array] = {}
+        total = 0
+        async for doc in self.sample_collection.aggregate(pipeline, batchSize=10000):
+            columns.setdefault((doc["name"], doc["metric_type"]), array("d")).append(doc["value"])
+            total += 1
+            if total >= max_values:
+                break
+        return {
+            key: np.frombuffer(values, dtype=np.float64)
+            for key, values in columns.items()
+        }
+
+    async def query_range(
+        self,
+        query: MetricQuery,
+        step_seconds: int,
+        agg: str = "avg",
+        max_series: int = 500,
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """Aggregate samples into step buckets per series.
+
+        Buckets start at multiples of ``step_seconds`` since the epoch, so
+        the same step always yields the same bucket boundaries. Returns the
+        resolution read ("raw" or a rollup) and one dict per series whose
+        ``points`` are ``(unix seconds, value)`` pairs, oldest first.
+        """
+        resolution, reads = await self._range_reads(query, step_seconds, agg)
+        merged: Dict[str, Dict[str, Any]] = {}
+        for collection, stages, accumulators in reads:
+            stages += _step_stages(step_seconds, accumulators, max_series)
+            async for doc in collection.aggregate(stages, allowDiskUse=True):
+                _merge_range_series(merged, doc, windows=bool(resolution))
+
+        ordered = sorted(merged.values(), key=lambda s: (s["name"] or "", s["source"] or ""))
+        series = []
+        for doc in ordered[:max_series]:
+            points = [
+                (t // 1000, _range_value(point, agg, rollup=bool(resolution)))
+                for t, point in sorted(doc["points"].items())
+            ]
+            series.append({**doc, "points": points})
+        return resolution or "raw", series
+
+    async def _range_reads(
+        self,
+        query: MetricQuery,
+        step_seconds: int,
+        agg: str,
+    ) -> Tuple[Optional[str], List[Tuple[Any, List[Dict[str, Any]], Dict[str, Any]]]]:
+        """Pick the resolution of a range query and the reads it takes.
+
+        Each read is a collection, the stages yielding its flat samples or
+        windows and the step bucket accumulators. With a rollup resolution,
+        buckets from the rollup checkpoint on are summed from raw samples.
+        """
+        filter_dict = self._build_filter(query)
+        resolution = None
+        if agg in ROLLUP_AGGREGATIONS and query.resolution != "raw":
+            if query.resolution in ROLLUP_RESOLUTIONS:
+                if step_seconds % ROLLUP_RESOLUTIONS[query.resolution] == 0:
+                    resolution = query.resolution
+            elif query.start_time is not None:
+                resolution = choose_step_resolution(step_seconds, query.start_time)
+
+        if resolution:
+            rolled_up_until = await self._rolled_up_until(resolution)
+            rolled, raw = split_at_checkpoint(filter_dict, rolled_up_until)
+            reads = []
+            if rolled:
+                reads.append((
+                    self.db[rollup_collection(resolution)],
+                    [{"$match": rolled}],
+                    ROLLUP_ACCUMULATORS,
+                ))
+            if raw:
+                reads.append(
+                    (self.sample_collection, self._sample_pipeline(raw), WINDOW_ACCUMULATORS)
+                )
+            if rolled or query.resolution in ROLLUP_RESOLUTIONS:
+                return resolution, reads
+
+        stages = self._sample_pipeline(filter_dict)
+        if agg in ("first", "last"):
+            stages.append({"$sort": {"timestamp": 1}})
+        return None, [(self.sample_collection, stages, {"value": RANGE_AGGREGATIONS[agg]})]
+
+    async def _rollup_read(
+        self, query: MetricQuery
+    ) -> Tuple[Optional[str], Optional[datetime]]:
+        """Rollup resolution to read for a query and how far it is rolled up.
+
+        Returns ``(None, None)`` for raw samples. A resolution chosen from
+        the time range is not used while none of the range is rolled up.
+        """
+        if query.resolution == "raw":
+            return None, None
+        if query.resolution in ROLLUP_RESOLUTIONS:
+            resolution = query.resolution
+            return resolution, await self._rolled_up_until(resolution)
 
-        pipeline = [
-            {"$match": filter_dict},
+        resolution = choose_resolution(query.start_time, query.end_time)
+        if resolution is None:
+            return None, None
+        rolled_up_until = await self._rolled_up_until(resolution)
+        rolled, _ = split_at_checkpoint(self._build_filter(query), rolled_up_until)
+        return (resolution, rolled_up_until) if rolled else (None, None)
+
+    async def _rolled_up_until(self, resolution: str) -> Optional[datetime]:
+        """End of the range the workers have rolled up at ``resolution``."""
+        checkpoint = await self.db.checkpoints.find_one({"_id": rollup_checkpoint(resolution)})
+        if not checkpoint:
+            return None
+        position = checkpoint["position"]
+        return position.replace(tzinfo=timezone.utc) if position.tzinfo is None else position
+
+    async def _raw_windows(
+        self,
+        filter_dict: Dict[str, Any],
+        resolution: str,
+    ) -> List[Dict[str, Any]]:
+        """Roll up raw samples matching a filter into rollup-shaped windows.
+
+        Used for the windows the workers have not rolled up yet; IDs match
+        the ones the rollup tasks give the same windows.
+        """
+        timestamp_ms = {"$toLong": "$timestamp"}
+        window_ms = ROLLUP_RESOLUTIONS[resolution] * 1000
+        pipeline = self._sample_pipeline(filter_dict) + [
             {
                 "$group": {
                     "_id": {
-                        "name": "$name",
-                        "metric_type": "$metric_type",
+                        **{field: f"${field}" for field in SERIES_IDENTITY},
+                        "t": {"$subtract": [timestamp_ms, {"$mod": [timestamp_ms, window_ms]}]},
                     },
-                    "avg_value": {"$avg": "$value"},
-                    "min_value": {"$min": "$value"},
-                    "max_value": {"$max": "$value"},
-                    "count": {"$sum": 1},
+                    "metric_type": {"$first": "$metric_type"},
+                    "unit": {"$first": "$unit"},
+                    **WINDOW_ACCUMULATORS,
                 }
             },
+        ]
+        windows = []
+        async for group in self.sample_collection.aggregate(pipeline, allowDiskUse=True):
+            window = {**group.pop("_id"), **group}
+            window["labels"] = window.get("labels") or {}
+            epoch = window.pop("t") // 1000
+            key = series_key(
+                window["name"], window["source"], window.get("namespace"),
+                window.get("cluster"), window["labels"],
+            )
+            window.update(
+                _id=f"{key}:{epoch}",
+                series_key=key,
+                timestamp=datetime.fromtimestamp(epoch, tz=timezone.utc),
+                avg=window["sum"] / window["count"],
+            )
+            windows.append(window)
+        return windows
+
+    async def _find_windows(
+        self,
+        filter_dict: Dict[str, Any],
+        resolution: str,
+        rolled_up_until: Optional[datetime],
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+    ) -> List[Dict[str, Any]]:
+        """Find rollup windows, newest first or reading away from ``cursor``.
+
+        Windows from ``rolled_up_until`` on are computed from raw samples;
+        they are all newer than the stored windows.
+        """
+        rolled, raw = split_at_checkpoint(filter_dict, rolled_up_until)
+        recent = [
+            window
+            for window in (await self._raw_windows(raw, resolution) if raw else [])
+            if _past_cursor(window, cursor)
+        ]
+        newest_first = cursor is None or not cursor.before
+        recent.sort(key=lambda window: (window["timestamp"], window["_id"]), reverse=newest_first)
+
+        stored_collection = self.db[rollup_collection(resolution)]
+
+        async def stored(skip: int, limit: int) -> List[Dict[str, Any]]:
+            if not rolled or limit <= 0:
+                return []
+            return (
+                await stored_collection.find(keyset_filter(rolled, cursor))
+                .sort(keyset_sort(cursor))
+                .skip(skip)
+                .limit(limit)
+                .to_list(length=limit)
+            )
+
+        if newest_first:
+            page = recent[skip:skip + limit]
+            return page + await stored(max(0, skip - len(recent)), limit - len(page))
+
+        page = await stored(skip, limit)
+        if skip and rolled:
+            skip = max(0, skip - await stored_collection.count_documents(
+                keyset_filter(rolled, cursor)
+            ))
+        else:
+            skip = 0
+        return page + recent[skip:skip + limit - len(page)]
+
+    async def _window_aggregations(
+        self,
+        filter_dict: Dict[str, Any],
+        resolution: str,
+        rolled_up_until: Optional[datetime],
+    ) -> List[Dict[str, Any]]:
+        """Aggregations like ``get_aggregations`` from rollup windows.
+
+        Windows the workers have not rolled up yet are added from raw samples.
+        """
+        rolled, raw = split_at_checkpoint(filter_dict, rolled_up_until)
+        group_id = {"_id": {"name": "$name", "metric_type": "$metric_type"}}
+        reads = []
+        if rolled:
+            reads.append((
+                self.db[rollup_collection(resolution)],
+                [{"$match": rolled}, {"$group": {**group_id, **ROLLUP_ACCUMULATORS}}],
+            ))
+        if raw:
+            reads.append((
+                self.sample_collection,
+                self._sample_pipeline(raw) + [{"$group": {**group_id, **WINDOW_ACCUMULATORS}}],
+            ))
+
+        totals: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for collection, pipeline in reads:
+            async for group in collection.aggregate(pipeline):
+                key = (group["_id"]["name"], group["_id"]["metric_type"])
+                totals[key] = _merge_windows(totals.get(key), group)
+        return [
+            {
+                "name": name,
+                "metric_type": metric_type,
+                "avg_value": round(total["sum"] / total["count"], 2),
+                "min_value": round(total["min"], 2),
+                "max_value": round(total["max"], 2),
+                "count": total["count"],
+            }
+            for (name, metric_type), total in list(totals.items())[:100]
+        ]
+
+    @property
+    def sample_collection(self):
+        """Collection that ``_sample_pipeline`` runs against."""
+        return self.buckets if self.bucketed else self.collection
+
+    def _sample_pipeline(self, filter_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Build aggregation stages yielding flat sample documents.
+
+        ``filter_dict`` uses the sample schema; in the buckets layout the
+        timestamp bounds are first applied to whole buckets so only buckets
+        overlapping the range are unwound.
+        """
+        if self.timeseries:
+            return [{"$match": timeseries_filter(filter_dict)}, flatten_stage()]
+        if not self.bucketed:
+            return [{"$match": filter_dict}]
+
+        bucket_filter = {k: v for k, v in filter_dict.items() if k != "timestamp"}
+        time_filter = filter_dict.get("timestamp")
+        if time_filter:
+            lower = time_filter.get("$gte", time_filter.get("$gt"))
+            upper = time_filter.get("$lte", time_filter.get("$lt"))
+            if lower is not None:
+                bucket_filter["bucket_end"] = {"$gt": lower}
+            if upper is not None:
+                bucket_filter["bucket_start"] = {"$lte": upper}
+
+        stages: List[Dict[str, Any]] = [
+            {"$match": bucket_filter},
+            {"$unwind": {"path": "$timestamps", "includeArrayIndex": "index"}},
             {
                 "$project": {
-                    "_id": 0,
-                    "name": "$_id.name",
-                    "metric_type": "$_id.metric_type",
-                    "avg_value": {"$round": ["$avg_value", 2]},
-                    "min_value": {"$round": ["$min_value", 2]},
-                    "max_value": {"$round": ["$max_value", 2]},
-                    "count": 1,
+                    "_id": {"$concat": [{"$toString": "$_id"}, "-", {"$toString": "$index"}]},
+                    **dict.fromkeys(SERIES_FIELDS, 1),
+                    "metadata": {"$ifNull": [{"$arrayElemAt": ["$metadata", "$index"]}, {}]},
+                    "timestamp": "$timestamps",
+                    "value": {"$arrayElemAt": ["$values", "$index"]},
                 }
             },
         ]
+        if time_filter:
+            stages.append({"$match": {"timestamp": time_filter}})
+        return stages
 
-        cursor = self.collection.aggregate(pipeline)
-        return await cursor.to_list(length=100)
+    async def _find_samples(
+        self,
+        filter_dict: Dict[str, Any],
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[List[tuple]] = None,
+        keyset: Optional[Dict[str, Any]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Find raw flat samples in any storage layout.
+
+        ``keyset`` is a predicate on ``timestamp`` and ``_id`` only, which
+        are top-level fields in every layout.
+        """
+        if not (self.bucketed or self.timeseries):
+            if keyset:
+                filter_dict = {"$and": [filter_dict, keyset]}
+            return await self.find_documents(filter_dict, skip, limit, sort, projection)
+        pipeline = self._sample_pipeline(filter_dict)
+        if self.timeseries:
+            # Page before flattening so the sort can use the collection's indexes
+            page = [{"$match": keyset}] if keyset else []
+            page += [{"$sort": timeseries_filter(dict(sort))}] if sort else []
+            pipeline[1:1] = page + [{"$skip": skip}, {"$limit": limit}]
+        else:
+            if keyset:
+                pipeline.append({"$match": keyset})
+            if sort:
+                pipeline.append({"$sort": dict(sort)})
+            pipeline += [{"$skip": skip}, {"$limit": limit}]
+        if projection:
+            pipeline.append({"$project": projection})
+        return await self.sample_collection.aggregate(pipeline).to_list(length=limit)
+
+    def _bucket_update(self, samples: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Build the upsert appending samples of one series to one bucket."""
+        first = samples[0]
+        key = series_key(
+            first["name"], first["source"], first.get("namespace"),
+            first.get("cluster"), first.get("labels"),
+        )
+        start = bucket_start(first["timestamp"], settings.metrics_bucket_seconds)
+        update: Dict[str, Any] = {
+            "$push": {
+                "timestamps": {"$each": [s["timestamp"] for s in samples]},
+                "values": {"$each": [s["value"] for s in samples]},
+                "metadata": {"$each": [s.get("metadata") or None for s in samples]},
+            },
+            "$inc": {"count": len(samples)},
+            "$setOnInsert": {
+                **{field: first.get(field) for field in SERIES_FIELDS},
+                "bucket_end": start + timedelta(seconds=settings.metrics_bucket_seconds),
+            },
+        }
+        return {"series_key": key, "bucket_start": start}, update
+
+    async def _create_in_bucket(self, metric_data: Dict[str, Any]) -> Metric:
+        filter_dict, update = self._bucket_update([metric_data])
+        bucket = await self.buckets.find_one_and_update(
+            filter_dict,
+            update,
+            projection={"count": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        metric_data["_id"] = f"{bucket['_id']}-{bucket['count'] - 1}"
+        return Metric.from_mongo(metric_data)
+
+    async def _create_batch_in_buckets(self, metrics: List[Dict[str, Any]]) -> BatchWriteResult:
+        if not metrics:
+            return BatchWriteResult(accepted=0)
+
+        groups: Dict[Tuple[str, datetime], List[int]] = {}
+        for index, metric in enumerate(metrics):
+            key = (
+                series_key(
+                    metric["name"], metric["source"], metric.get("namespace"),
+                    metric.get("cluster"), metric.get("labels"),
+                ),
+                bucket_start(metric["timestamp"], settings.metrics_bucket_seconds),
+            )
+            groups.setdefault(key, []).append(index)
+
+        group_indices = list(groups.values())
+        operations = [
+            UpdateOne(*self._bucket_update([metrics[i] for i in indices]), upsert=True)
+            for indices in group_indices
+        ]
+        buckets = self.buckets.with_options(write_concern=ingest_write_concern())
+        try:
+            await buckets.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            errors = [
+                BatchItemError(index=i, reason=error.get("errmsg", ""))
+                for error in e.details.get("writeErrors", [])
+                for i in group_indices[error["index"]]
+            ]
+            return BatchWriteResult(
+                accepted=len(metrics) - len(errors),
+                errors=sorted(errors, key=lambda item: item.index),
+            )
+        return BatchWriteResult(accepted=len(metrics))
+
+
+def _parse_sample_id(id: str) -> Optional[Tuple[ObjectId, int]]:
+    """Split a bucketed sample ID into bucket ID and array index."""
+    bucket_id, _, index = id.partition("-")
+    if not ObjectId.is_valid(bucket_id) or not index.isdigit():
+        return None
+    return ObjectId(bucket_id), int(index)
+
+
+def _sample_from_bucket(bucket: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """Build a flat sample document from a bucket sliced to one sample."""
+    sample = {field: bucket.get(field) for field in SERIES_FIELDS}
+    sample["_id"] = f"{bucket['_id']}-{index}"
+    sample["metadata"] = (bucket.get("metadata") or [None])[0] or {}
+    sample["timestamp"] = bucket["timestamps"][0]
+    sample["value"] = bucket["values"][0]
+    return sample
+
+
+def _sample_from_rollup(doc: Dict[str, Any], resolution: str) -> Dict[str, Any]:
+    """Present a rollup window as a metric sample valued at its average."""
+    return {
+        **{field: doc.get(field) for field in SERIES_FIELDS},
+        "_id": doc["_id"],
+        "labels": doc.get("labels") or {},
+        "timestamp": doc["timestamp"],
+        "value": doc["avg"],
+        "metadata": {
+            "resolution": resolution,
+            "count": doc["count"],
+            "min": doc["min"],
+            "max": doc["max"],
+        },
+    }
+
+
+def _step_stages(
+    step_seconds: int,
+    accumulators: Dict[str, Any],
+    max_series: int,
+) -> List[Dict[str, Any]]:
+    """Stages grouping flat samples or windows into step buckets per series."""
+    timestamp_ms = {"$toLong": "$timestamp"}
+    step_ms = step_seconds * 1000
+    return [
+        {
+            "$group": {
+                "_id": {
+                    **{field: f"${field}" for field in SERIES_IDENTITY},
+                    "t": {"$subtract": [timestamp_ms, {"$mod": [timestamp_ms, step_ms]}]},
+                },
+                **accumulators,
+            }
+        },
+        {"$sort": {"_id.t": 1}},
+        {
+            "$group": {
+                "_id": {field: f"$_id.{field}" for field in SERIES_IDENTITY},
+                "points": {"$push": {"t": "$_id.t", **{k: f"${k}" for k in accumulators}}},
+            }
+        },
+        {"$sort": {"_id.name": 1, "_id.source": 1}},
+        {"$limit": max_series},
+    ]
+
+
+def _merge_range_series(
+    merged: Dict[str, Dict[str, Any]],
+    doc: Dict[str, Any],
+    windows: bool,
+) -> None:
+    """Add one read's step buckets of a series to ``merged``.
+
+    Buckets of windows read from rollups and from raw samples are combined;
+    raw sample buckets only ever come from one read.
+    """
+    identity = {**doc["_id"], "labels": doc["_id"].get("labels") or {}}
+    key = series_key(
+        identity["name"], identity["source"], identity.get("namespace"),
+        identity.get("cluster"), identity["labels"],
+    )
+    points = merged.setdefault(key, {**identity, "points": {}})["points"]
+    for point in doc["points"]:
+        t = point["t"]
+        points[t] = _merge_windows(points.get(t), point) if windows else point
+
+
+def _past_cursor(window: Dict[str, Any], cursor: Optional[Cursor]) -> bool:
+    """Whether a window lies beyond ``cursor`` in its reading direction."""
+    if cursor is None:
+        return True
+    position = (window["timestamp"], window["_id"])
+    if cursor.before:
+        return position > (cursor.value, cursor.id)
+    return position < (cursor.value, cursor.id)
+
+
+def _merge_windows(
+    total: Optional[Dict[str, Any]],
+    window: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Combine the count/sum/min/max of two windows."""
+    if total is None:
+        return {field: window[field] for field in ROLLUP_ACCUMULATORS}
+    return {
+        "count": total["count"] + window["count"],
+        "sum": total["sum"] + window["sum"],
+        "min": min(total["min"], window["min"]),
+        "max": max(total["max"], window["max"]),
+    }
+
+
+def _range_value(point: Dict[str, Any], agg: str, rollup: bool) -> Optional[float]:
+    """Value of a range query bucket."""
+    if not rollup:
+        return point["value"]
+    if agg == "avg":
+        return point["sum"] / point["count"] if point["count"] else None
+    return point[agg]
@@ -0,0 +1,145 @@
+"""Series catalog repository for database operations."""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.config import get_settings
+from app.core.exceptions import ValidationError
+from app.models.series import Series
+from app.repositories.base_repository import BaseRepository
+from app.utils.series import series_key
+
+settings = get_settings()
+
+# Series identity fields that can be listed like labels
+SERIES_LABELS = ("source", "namespace", "cluster")
+# Upper bound on series remembered by the in-process write cache
+MAX_CACHED_SERIES = 100000
+
+# series_key -> (first_seen, last_seen) as last written to the catalog
+_recorded: Dict[str, Tuple[datetime, datetime]] = {}
+
+
+class SeriesRepository(BaseRepository[Series]):
+    """Repository for the series catalog.
+
+    Ingest upserts one document per distinct series so names, label keys
+    and label values can be listed without scanning samples.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        super().__init__(db, "series", Series)
+
+    async def record(self, samples: List[Dict[str, Any]]) -> int:
+        """Upsert the series of ingested samples and return how many were written.
+
+        Series whose catalog entry is less than the configured resolution
+        behind are skipped, so steady ingest costs no catalog writes.
+        """
+        seen: Dict[str, Dict[str, Any]] = {}
+        for sample in samples:
+            key = series_key(
+                sample["name"], sample["source"], sample.get("namespace"),
+                sample.get("cluster"), sample.get("labels"),
+            )
+            timestamp = sample["timestamp"]
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            entry = seen.get(key)
+            if entry is None:
+                seen[key] = {"sample": sample, "first": timestamp, "last": timestamp}
+            else:
+                entry["first"] = min(entry["first"], timestamp)
+                entry["last"] = max(entry["last"], timestamp)
+
+        resolution = timedelta(seconds=settings.series_catalog_resolution_seconds)
+        operations = []
+        for key, entry in seen.items():
+            cached = _recorded.get(key)
+            if cached and entry["first"] >= cached[0] and entry["last"] < cached[1] + resolution:
+                continue
+            operations.append(self._upsert(key, entry))
+
+        if not operations:
+            return 0
+        await self.collection.bulk_write(operations, ordered=False)
+
+        if len(_recorded) + len(operations) > MAX_CACHED_SERIES:
+            _recorded.clear()
+        for key, entry in seen.items():
+            cached = _recorded.get(key)
+            if cached is None:
+                _recorded[key] = (entry["first"], entry["last"])
+            else:
+                _recorded[key] = (min(cached[0], entry["first"]), max(cached[1], entry["last"]))
+        return len(operations)
+
+    async def list_names(self, prefix: Optional[str] = None, limit: int = 100) -> List[str]:
+        """List distinct metric names, optionally by prefix."""
+        filter_dict: Dict[str, Any] = {}
+        if prefix:
+            filter_dict["name"] = {"$regex": f"^{re.escape(prefix)}"}
+        return await self._distinct("name", filter_dict, limit)
+
+    async def list_label_keys(self, name: Optional[str] = None) -> List[str]:
+        """List label keys, including the source/namespace/cluster fields."""
+        filter_dict = {"name": name} if name else {}
+        keys = await self.collection.distinct("label_keys", filter_dict)
+        return sorted(set(keys) | set(SERIES_LABELS))
+
+    async def list_label_values(
+        self,
+        key: str,
+        name: Optional[str] = None,
+        prefix: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[str]:
+        """List distinct values of a label key.
+
+        Raises ``ValidationError`` for keys that would be read as an
+        operator or a nested path.
+        """
+        if key.startswith("$") or "." in key:
+            raise ValidationError(f"Invalid label key: {key!r}")
+        field = key if key in SERIES_LABELS else f"labels.{key}"
+        filter_dict: Dict[str, Any] = {field: {"$exists": True}}
+        if name:
+            filter_dict["name"] = name
+        if prefix:
+            filter_dict[field] = {"$regex": f"^{re.escape(prefix)}"}
+        return await self._distinct(field, filter_dict, limit)
+
+    async def _distinct(self, field: str, filter_dict: Dict[str, Any], limit: int) -> List[str]:
+        pipeline = [
+            {"$match": filter_dict},
+            {"$group": {"_id": f"${field}"}},
+            {"$sort": {"_id": 1}},
+            {"$limit": limit},
+        ]
+        docs = await self.collection.aggregate(pipeline).to_list(length=limit)
+        return [doc["_id"] for doc in docs if doc["_id"] is not None]
+
+    @staticmethod
+    def _upsert(key: str, entry: Dict[str, Any]) -> UpdateOne:
+        sample = entry["sample"]
+        labels = sample.get("labels") or {}
+        return UpdateOne(
+            {"series_key": key},
+            {
+                "$setOnInsert": {
+                    "name": sample["name"],
+                    "source": sample["source"],
+                    "namespace": sample.get("namespace"),
+                    "cluster": sample.get("cluster"),
+                    "labels": labels,
+                    "label_keys": sorted(labels),
+                },
+                "$min": {"first_seen": entry["first"]},
+                "$max": {"last_seen": entry["last"]},
+            },
+            upsert=True,
+        )
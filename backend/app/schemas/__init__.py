@@ -9,6 +9,9 @@ from app.schemas.alert import (
     AlertUpdate,
 )
 from app.schemas.common import (
+    BatchIngestResponse,
+    BatchItemError,
+    BatchWriteResult,
     MessageResponse,
     PaginatedResponse,
     PaginationParams,
@@ -51,4 +54,7 @@ __all__ = [
     "PaginationParams",
     "PaginatedResponse",
     "MessageResponse",
+    "BatchItemError",
+    "BatchWriteResult",
+    "BatchIngestResponse",
 ]
@@ -1,6 +1,6 @@
 """Common schemas used across the application."""
 
-from typing import Any, Generic, List, Optional, TypeVar
+from typing import Any, Dict, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel, Field
 
@@ -25,32 +25,84 @@ class PaginationParams(BaseModel):
 
 
 class PaginatedResponse(BaseModel, Generic[T]):
-    """Paginated response wrapper."""
+    """Paginated response wrapper.
+
+    Keyset pages carry ``next_cursor``/``prev_cursor`` instead of a page
+    number; offset pages fill ``page`` and ``total_pages``. ``total`` is
+    None when counting was skipped, and a lower bound when ``total_capped``.
+    """
 
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None
+    total_capped: bool = False
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
     @classmethod
     def create(
         cls,
         items: List[T],
-        total: int,
+        total: Optional[int],
         page: int,
         page_size: int,
+        total_capped: bool = False,
+    ) -> "PaginatedResponse[T]":
+        return cls(
+            items=items,
+            **page_fields(total, page_size, page=page, total_capped=total_capped),
+        )
+
+    @classmethod
+    def create_keyset(
+        cls,
+        items: List[T],
+        total: Optional[int],
+        page_size: int,
+        next_cursor: Optional[str] = None,
+        prev_cursor: Optional[str] = None,
+        total_capped: bool = False,
     ) -> "PaginatedResponse[T]":
-        total_pages = (total + page_size - 1) // page_size if page_size > 0 else 0
         return cls(
             items=items,
-            total=total,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages,
+            **page_fields(
+                total,
+                page_size,
+                total_capped=total_capped,
+                next_cursor=next_cursor,
+                prev_cursor=prev_cursor,
+            ),
         )
 
 
+def page_fields(
+    total: Optional[int],
+    page_size: int,
+    page: Optional[int] = None,
+    total_capped: bool = False,
+    next_cursor: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Fields of a ``PaginatedResponse`` other than ``items``.
+
+    Offset pages pass ``page``, which also fills ``total_pages``.
+    """
+    total_pages = None
+    if page is not None and total is not None:
+        total_pages = (total + page_size - 1) // page_size if page_size > 0 else 0
+    return {
+        "total": total,
+        "total_capped": total_capped,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+
 class MessageResponse(BaseModel):
     """Simple message response."""
 
@@ -59,6 +111,28 @@ class MessageResponse(BaseModel):
     data: Optional[Any] = None
 
 
+class BatchItemError(BaseModel):
+    """A rejected item in a batch write."""
+
+    index: int
+    reason: str
+
+
+class BatchWriteResult(BaseModel):
+    """Outcome of an unordered batch insert."""
+
+    accepted: int
+    errors: List[BatchItemError] = Field(default_factory=list)
+
+
+class BatchIngestResponse(MessageResponse):
+    """Batch ingest response with per-item rejections."""
+
+    accepted: int
+    rejected: int = 0
+    errors: List[BatchItemError] = Field(default_factory=list)
+
+
 class ErrorResponse(BaseModel):
     """Error response."""
 
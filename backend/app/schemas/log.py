@@ -3,7 +3,8 @@
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from typing_extensions import Required, TypedDict
 
 from app.models.log import LogLevel
 
@@ -34,6 +35,32 @@ class LogBatchCreate(BaseModel):
     logs: List[LogCreate]
 
 
+class LogRecord(TypedDict, total=False):
+    """A log entry of a batch body, validated into a plain dict.
+
+    Mirrors ``LogCreate``; keys left out get its defaults.
+    """
+
+    __pydantic_config__ = ConfigDict(use_enum_values=True)  # type: ignore[misc]
+
+    message: Required[str]
+    level: LogLevel
+    source: Required[str]
+    namespace: Optional[str]
+    cluster: Optional[str]
+    pod_name: Optional[str]
+    container_name: Optional[str]
+    labels: Dict[str, str]
+    metadata: Dict[str, Any]
+    timestamp: Optional[datetime]
+
+
+class LogBatchRecord(TypedDict):
+    """A log batch body validated without building models."""
+
+    logs: List[LogRecord]
+
+
 class LogResponse(LogBase):
     """Schema for log response."""
 
@@ -54,6 +81,7 @@ class LogQuery(BaseModel):
     pod_name: Optional[str] = None
     container_name: Optional[str] = None
     search: Optional[str] = None
+    search_mode: Optional[str] = None  # "text" (default), "substring" or "regex"
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
 
@@ -1,9 +1,10 @@
 """Metric schemas for API."""
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+from typing_extensions import Annotated, Required, TypedDict
 
 from app.models.metric import MetricType
 
@@ -34,6 +35,58 @@ class MetricBatchCreate(BaseModel):
     metrics: List[MetricCreate]
 
 
+class MetricRecord(TypedDict, total=False):
+    """A metric of a batch body, validated into a plain dict.
+
+    Mirrors ``MetricCreate``; keys left out get its defaults.
+    """
+
+    __pydantic_config__ = ConfigDict(use_enum_values=True)  # type: ignore[misc]
+
+    name: Required[Annotated[str, StringConstraints(min_length=1, max_length=100)]]
+    metric_type: MetricType
+    value: Required[float]
+    unit: Optional[str]
+    source: Required[str]
+    namespace: Optional[str]
+    cluster: Optional[str]
+    labels: Dict[str, str]
+    metadata: Dict[str, Any]
+    timestamp: Optional[datetime]
+
+
+class MetricBatchRecord(TypedDict):
+    """A metric batch body validated without building models."""
+
+    metrics: List[MetricRecord]
+
+
+class MetricIngestError(BaseModel):
+    """Schema for a rejected record in a streamed ingest."""
+
+    line: int
+    reason: str
+
+
+class MetricStreamChunk(BaseModel):
+    """Schema for the outcome of one flushed ingest chunk."""
+
+    chunk: int
+    first_line: int
+    last_line: int
+    accepted: int
+    rejected: int
+    errors: List[MetricIngestError] = Field(default_factory=list)
+
+
+class MetricStreamResult(BaseModel):
+    """Schema for the summary of a streamed ingest."""
+
+    accepted: int
+    rejected: int
+    chunks: List[MetricStreamChunk]
+
+
 class MetricResponse(MetricBase):
     """Schema for metric response."""
 
@@ -54,6 +107,31 @@ class MetricQuery(BaseModel):
     name: Optional[str] = None
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
+    # "raw", a rollup resolution ("1m", "5m", "1h") or None to choose by range
+    resolution: Optional[str] = Field(default=None, pattern="^(auto|raw|1m|5m|1h)$")
+
+
+class MetricRangeSeries(BaseModel):
+    """Schema for the points of one series in a range query."""
+
+    name: str
+    source: str
+    namespace: Optional[str] = None
+    cluster: Optional[str] = None
+    labels: Dict[str, str] = Field(default_factory=dict)
+    # [unix seconds, value] pairs, oldest first
+    points: List[Tuple[int, Optional[float]]]
+
+
+class MetricRangeResult(BaseModel):
+    """Schema for a step-aligned range query."""
+
+    start: datetime
+    end: datetime
+    step: int
+    agg: str
+    resolution: str
+    series: List[MetricRangeSeries]
 
 
 class MetricAggregation(BaseModel):
@@ -65,5 +143,20 @@ class MetricAggregation(BaseModel):
     min_value: float
     max_value: float
     count: int
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
     source: Optional[str] = None
     namespace: Optional[str] = None
+
+
+class MetricHistogram(BaseModel):
+    """Schema for the value histogram of one metric."""
+
+    name: str
+    metric_type: str
+    count: int
+    # len(edges) == len(counts) + 1; the last bucket includes its upper edge
+    edges: List[float]
+    counts: List[int]
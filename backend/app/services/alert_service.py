@@ -1,19 +1,28 @@
 """Alert service for business logic."""
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.config import get_settings
+from app.core.cache import ALERT_STATS, cached, invalidate
 from app.core.exceptions import NotFoundError, ValidationError
+from app.core.responses import as_response, response_projection, select_fields
 from app.models.alert import Alert, AlertRule, AlertSeverity, AlertStatus
 from app.repositories.alert_repository import AlertRepository, AlertRuleRepository
 from app.schemas.alert import (
     AlertCreate,
+    AlertResponse,
     AlertRuleCreate,
     AlertRuleUpdate,
     AlertUpdate,
 )
-from app.schemas.common import PaginatedResponse
+from app.schemas.common import PaginatedResponse, page_fields
+from app.services.concurrency import gather
+from app.utils.counts import page_total
+from app.utils.cursors import decode_cursor, keyset_page
+
+settings = get_settings()
 
 
 class AlertService:
@@ -26,7 +35,7 @@ class AlertService:
     # Alert operations
     async def create_alert(self, data: AlertCreate) -> Alert:
         """Create a new alert."""
-        return await self.alert_repo.create_alert(
+        alert = await self.alert_repo.create_alert(
             title=data.title,
             source=data.source,
             severity=data.severity,
@@ -37,6 +46,8 @@ class AlertService:
             metadata=data.metadata,
             rule_id=data.rule_id,
         )
+        await invalidate(ALERT_STATS)
+        return alert
 
     async def get_alert(self, alert_id: str) -> Optional[Alert]:
         """Get an alert by ID."""
@@ -45,32 +56,66 @@ class AlertService:
     async def get_alerts(
         self,
         status: Optional[AlertStatus] = None,
-        page: int = 1,
+        page: Optional[int] = 1,
         page_size: int = 20,
-    ) -> PaginatedResponse[Alert]:
-        """Get alerts with optional status filter."""
-        skip = (page - 1) * page_size
+        cursor: Optional[str] = None,
+        count_mode: Optional[str] = None,
+        fields: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get alerts with optional status filter.
 
-        if status:
-            alerts = await self.alert_repo.get_by_status(
-                status=status,
-                skip=skip,
-                limit=page_size,
+        Returns the body of a ``PaginatedResponse[AlertResponse]`` built
+        from projected documents, ready for ``DocumentResponse``.
+        Without ``page`` the listing is keyset-paginated from ``cursor``.
+        ``count_mode`` picks how ``total`` is counted (see ``page_total``).
+        ``fields`` is a comma-separated subset of the item fields to return.
+        """
+        selected = select_fields(AlertResponse, fields)
+        if page is None:
+            position = decode_cursor(cursor) if cursor else None
+            projection = response_projection(AlertResponse, selected, required=("created_at",))
+            alerts, (total, capped) = await gather(
+                self.alert_repo.list_alert_documents(
+                    status, limit=page_size + 1, cursor=position, projection=projection
+                ),
+                self._total(status, count_mode),
             )
-            total = await self.alert_repo.count({"status": status.value})
-        else:
-            alerts = await self.alert_repo.get_all(
-                skip=skip,
-                limit=page_size,
-                sort=[("created_at", -1)],
+            alerts, next_cursor, prev_cursor = keyset_page(
+                alerts, page_size, position, key=lambda a: (a["created_at"], str(a["_id"]))
             )
-            total = await self.alert_repo.count()
+            return {
+                "items": as_response(alerts, AlertResponse, selected),
+                **page_fields(
+                    total,
+                    page_size,
+                    total_capped=capped,
+                    next_cursor=next_cursor,
+                    prev_cursor=prev_cursor,
+                ),
+            }
 
-        return PaginatedResponse.create(
-            items=alerts,
-            total=total,
-            page=page,
-            page_size=page_size,
+        projection = response_projection(AlertResponse, selected)
+        alerts, (total, capped) = await gather(
+            self.alert_repo.list_alert_documents(
+                status, skip=(page - 1) * page_size, limit=page_size, projection=projection
+            ),
+            self._total(status, count_mode),
+        )
+        return {
+            "items": as_response(alerts, AlertResponse, selected),
+            **page_fields(total, page_size, page=page, total_capped=capped),
+        }
+
+    async def _total(
+        self, status: Optional[AlertStatus], count_mode: Optional[str]
+    ) -> Tuple[Optional[int], bool]:
+        """Count alerts with a status in the requested mode."""
+        filter = {"status": status.value} if status else None
+        return await page_total(
+            ("alerts", status.value if status else None),
+            count_mode,
+            lambda limit: self.alert_repo.count(filter, limit),
+            None if status else self.alert_repo.estimated_count,
         )
 
     async def update_alert(
@@ -82,7 +127,10 @@ class AlertService:
         update_data = data.model_dump(exclude_none=True)
         if not update_data:
             return await self.get_alert(alert_id)
-        return await self.alert_repo.update(alert_id, update_data)
+        alert = await self.alert_repo.update(alert_id, update_data)
+        if alert:
+            await invalidate(ALERT_STATS)
+        return alert
 
     async def acknowledge_alert(
         self,
@@ -93,6 +141,7 @@ class AlertService:
         alert = await self.alert_repo.acknowledge(alert_id, user_id)
         if not alert:
             raise NotFoundError("Alert", alert_id)
+        await invalidate(ALERT_STATS)
         return alert
 
     async def resolve_alert(self, alert_id: str) -> Alert:
@@ -100,15 +149,21 @@ class AlertService:
         alert = await self.alert_repo.resolve(alert_id)
         if not alert:
             raise NotFoundError("Alert", alert_id)
+        await invalidate(ALERT_STATS)
         return alert
 
     async def get_alert_stats(self) -> Dict[str, Any]:
-        """Get alert statistics."""
-        return await self.alert_repo.get_stats()
+        """Get alert statistics, shared through the response cache."""
+        return await cached(
+            ALERT_STATS, None, settings.cache_alert_stats_ttl_seconds, self.alert_repo.get_stats
+        )
 
     async def delete_alert(self, alert_id: str) -> bool:
         """Delete an alert."""
-        return await self.alert_repo.delete(alert_id)
+        deleted = await self.alert_repo.delete(alert_id)
+        if deleted:
+            await invalidate(ALERT_STATS)
+        return deleted
 
     # Alert Rule operations
     async def create_rule(
@@ -148,12 +203,10 @@ class AlertService:
     ) -> PaginatedResponse[AlertRule]:
         """Get alert rules for a user."""
         skip = (page - 1) * page_size
-        rules = await self.rule_repo.get_by_user(
-            user_id=user_id,
-            skip=skip,
-            limit=page_size,
+        rules, total = await gather(
+            self.rule_repo.get_by_user(user_id=user_id, skip=skip, limit=page_size),
+            self.rule_repo.count({"user_id": user_id}),
         )
-        total = await self.rule_repo.count({"user_id": user_id})
 
         return PaginatedResponse.create(
             items=rules,
@@ -0,0 +1,27 @@
+"""Helpers for running independent repository calls concurrently."""
+
+import asyncio
+from typing import Any, Awaitable, List
+
+
+async def gather(*awaitables: Awaitable[Any]) -> List[Any]:
+    """Await independent calls concurrently and return results in order.
+
+    Unlike a bare ``asyncio.gather``, the calls share cancellation: the
+    first failure cancels the others and is re-raised unchanged, and
+    cancelling the caller cancels every call.
+    """
+    error = None
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(_awaited(aw)) for aw in awaitables]
+    except BaseExceptionGroup as e:
+        error = e.exceptions[0]
+    if error is not None:
+        # Raised outside the handler so its cause and context stay as they were
+        raise error
+    return [task.result() for task in tasks]
+
+
+async def _awaited(awaitable: Awaitable[Any]) -> Any:
+    return await awaitable
@@ -1,13 +1,29 @@
 """Log service for business logic."""
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.models.log import Log, LogLevel
+from app.config import get_settings
+from app.core.cache import LOG_STATS, cached, invalidate
+from app.core.idempotency import first_used_at
+from app.core.responses import as_response, response_projection, select_fields
+from app.db.rabbitmq import assign_ids, publish_documents
+from app.models.log import Log
 from app.repositories.log_repository import LogRepository
-from app.schemas.common import PaginatedResponse
+from app.schemas.common import BatchWriteResult, page_fields
 from app.schemas.log import LogCreate, LogQuery, LogResponse
+from app.services.concurrency import gather
+from app.utils.counts import page_total
+from app.utils.cursors import decode_cursor, keyset_page
+from app.utils.export import encode_csv, encode_ndjson
+
+settings = get_settings()
+
+EXPORT_COLUMNS = (
+    "_id", "timestamp", "level", "message", "source", "namespace", "cluster",
+    "pod_name", "container_name", "labels", "metadata",
+)
 
 
 class LogService:
@@ -31,24 +47,24 @@ class LogService:
             timestamp=data.timestamp,
         )
 
-    async def create_batch(self, logs: List[LogCreate]) -> int:
-        """Create multiple log entries at once."""
-        logs_data = [
-            {
-                "message": log.message,
-                "level": log.level.value if isinstance(log.level, LogLevel) else log.level,
-                "source": log.source,
-                "namespace": log.namespace,
-                "cluster": log.cluster,
-                "pod_name": log.pod_name,
-                "container_name": log.container_name,
-                "labels": log.labels,
-                "metadata": log.metadata,
-                "timestamp": log.timestamp,
-            }
-            for log in logs
-        ]
-        return await self.log_repo.create_batch(logs_data)
+    async def create_batch(self, logs: List[Dict[str, Any]]) -> BatchWriteResult:
+        """Create multiple log entries at once from decoded batch documents."""
+        return await self.log_repo.create_batch(logs)
+
+    async def enqueue_batch(
+        self,
+        logs: List[Dict[str, Any]],
+        idempotency_key: Optional[str] = None,
+    ) -> None:
+        """Queue decoded batch documents for the workers to write.
+
+        Documents get their IDs here, derived from ``idempotency_key`` and
+        the time it was first used if given, so replays are not written twice.
+        """
+        if logs:
+            first_used = await first_used_at(idempotency_key) if idempotency_key else None
+            assign_ids(logs, idempotency_key, first_used)
+            await publish_documents(settings.ingest_queue_logs, logs)
 
     async def get_log(self, log_id: str) -> Optional[Log]:
         """Get a log entry by ID."""
@@ -57,40 +73,107 @@ class LogService:
     async def query_logs(
         self,
         query: LogQuery,
-        page: int = 1,
+        page: Optional[int] = 1,
         page_size: int = 50,
-    ) -> PaginatedResponse[LogResponse]:
-        """Query logs with pagination."""
+        cursor: Optional[str] = None,
+        count_mode: Optional[str] = None,
+        fields: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Query logs with pagination.
+
+        Returns the body of a ``PaginatedResponse[LogResponse]`` built from
+        projected documents, ready for ``DocumentResponse``.
+        Without ``page`` the listing is keyset-paginated from ``cursor``.
+        ``count_mode`` picks how ``total`` is counted (see ``page_total``).
+        ``fields`` is a comma-separated subset of the item fields to return.
+        """
+        selected = select_fields(LogResponse, fields)
+        if page is None:
+            position = decode_cursor(cursor) if cursor else None
+            projection = response_projection(LogResponse, selected, required=("timestamp",))
+            logs, (total, capped) = await gather(
+                self.log_repo.query_log_documents(
+                    query, limit=page_size + 1, cursor=position, projection=projection
+                ),
+                self._total(query, count_mode),
+            )
+            logs, next_cursor, prev_cursor = keyset_page(
+                logs, page_size, position, key=lambda log: (log["timestamp"], str(log["_id"]))
+            )
+            return {
+                "items": as_response(logs, LogResponse, selected),
+                **page_fields(
+                    total,
+                    page_size,
+                    total_capped=capped,
+                    next_cursor=next_cursor,
+                    prev_cursor=prev_cursor,
+                ),
+            }
+
         skip = (page - 1) * page_size
-        logs = await self.log_repo.query_logs(
-            query=query,
-            skip=skip,
-            limit=page_size,
+        projection = response_projection(LogResponse, selected)
+        logs, (total, capped) = await gather(
+            self.log_repo.query_log_documents(
+                query, skip=skip, limit=page_size, projection=projection
+            ),
+            self._total(query, count_mode),
         )
-        total = await self.log_repo.count_query(query)
+        return {
+            "items": as_response(logs, LogResponse, selected),
+            **page_fields(total, page_size, page=page, total_capped=capped),
+        }
 
-        return PaginatedResponse.create(
-            items=[LogResponse.model_validate(log.model_dump(by_alias=True)) for log in logs],
-            total=total,
-            page=page,
-            page_size=page_size,
+    async def _total(
+        self, query: LogQuery, count_mode: Optional[str]
+    ) -> Tuple[Optional[int], bool]:
+        """Count logs matching a query in the requested mode."""
+        unfiltered = not query.model_dump(exclude_none=True)
+        return await page_total(
+            ("logs", query.model_dump_json()),
+            count_mode,
+            lambda limit: self.log_repo.count_query(query, limit),
+            self.log_repo.estimated_count if unfiltered else None,
         )
 
+    def export_logs(self, query: LogQuery, format: str = "ndjson") -> AsyncIterator[bytes]:
+        """Stream every log entry matching a query as NDJSON or CSV chunks."""
+        logs = self.log_repo.iter_logs(query, settings.export_batch_size)
+        if format == "csv":
+            return encode_csv(logs, EXPORT_COLUMNS, settings.export_flush_bytes)
+        return encode_ndjson(logs, settings.export_flush_bytes)
+
     async def get_latest_by_source(
         self,
         source: str,
         limit: int = 50,
-    ) -> List[Log]:
-        """Get latest logs for a source."""
-        return await self.log_repo.get_latest_by_source(source, limit)
+        fields: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get latest logs for a source as ``LogResponse`` bodies.
+
+        ``fields`` is a comma-separated subset of the fields to return.
+        """
+        selected = select_fields(LogResponse, fields)
+        logs = await self.log_repo.get_latest_by_source(
+            source, limit, response_projection(LogResponse, selected)
+        )
+        return as_response(logs, LogResponse, selected)
 
     async def get_stats(
         self,
         query: Optional[LogQuery] = None,
     ) -> Dict[str, Any]:
-        """Get log statistics."""
-        return await self.log_repo.get_stats(query)
+        """Get log statistics, shared through the response cache."""
+        return await cached(
+            LOG_STATS,
+            query.model_dump(mode="json", exclude_none=True) if query else None,
+            settings.cache_log_stats_ttl_seconds,
+            lambda: self.log_repo.get_stats(query),
+        )
 
     async def delete_log(self, log_id: str) -> bool:
         """Delete a log entry."""
-        return await self.log_repo.delete(log_id)
+        deleted = await self.log_repo.delete(log_id)
+        if deleted:
+            await invalidate(LOG_STATS)
+        return deleted
@@ -1,14 +1,53 @@
 """Metric service for business logic."""
 
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+import numpy as np
+import orjson
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError as PydanticValidationError
+from pymongo.errors import PyMongoError
 
+from app.config import get_settings
+from app.core.cache import METRIC_AGGREGATIONS, cached, invalidate
+from app.core.exceptions import ValidationError
+from app.core.idempotency import first_used_at
+from app.core.logging import get_logger
+from app.core.responses import as_response, response_projection, select_fields
+from app.db.rabbitmq import assign_ids, publish_documents
 from app.models.metric import Metric, MetricType
 from app.repositories.metric_repository import MetricRepository
-from app.schemas.common import PaginatedResponse
-from app.schemas.metric import MetricCreate, MetricQuery, MetricResponse
+from app.repositories.series_repository import SeriesRepository
+from app.schemas.common import BatchWriteResult, page_fields
+from app.schemas.metric import (
+    MetricCreate,
+    MetricHistogram,
+    MetricIngestError,
+    MetricQuery,
+    MetricRangeResult,
+    MetricRangeSeries,
+    MetricResponse,
+    MetricStreamChunk,
+    MetricStreamResult,
+)
+from app.services.concurrency import gather
+from app.utils.counts import page_total
+from app.utils.cursors import decode_cursor, keyset_page
+from app.utils.export import encode_csv, encode_ndjson
+from app.utils.stats import histogram, summarize
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+# Cap on error details kept per chunk so a bad stream cannot grow the summary
+MAX_ERRORS_PER_CHUNK = 100
+
+EXPORT_COLUMNS = (
+    "_id", "timestamp", "name", "metric_type", "value", "unit",
+    "source", "namespace", "cluster", "labels", "metadata",
+)
 
 
 class MetricService:
@@ -16,10 +55,11 @@ class MetricService:
 
     def __init__(self, db: AsyncIOMotorDatabase):
         self.metric_repo = MetricRepository(db)
+        self.series_repo = SeriesRepository(db)
 
     async def create_metric(self, data: MetricCreate) -> Metric:
         """Create a new metric."""
-        return await self.metric_repo.create_metric(
+        metric = await self.metric_repo.create_metric(
             name=data.name,
             value=data.value,
             source=data.source,
@@ -31,25 +71,96 @@ class MetricService:
             metadata=data.metadata,
             timestamp=data.timestamp,
         )
+        await self._record_series([metric.model_dump()])
+        return metric
 
-    async def create_batch(self, metrics: List[MetricCreate]) -> int:
-        """Create multiple metrics at once."""
-        metrics_data = [
-            {
-                "name": m.name,
-                "metric_type": m.metric_type.value if isinstance(m.metric_type, MetricType) else m.metric_type,
-                "value": m.value,
-                "unit": m.unit,
-                "source": m.source,
-                "namespace": m.namespace,
-                "cluster": m.cluster,
-                "labels": m.labels,
-                "metadata": m.metadata,
-                "timestamp": m.timestamp,
-            }
-            for m in metrics
-        ]
-        return await self.metric_repo.create_batch(metrics_data)
+    async def create_batch(self, metrics: List[Dict[str, Any]]) -> BatchWriteResult:
+        """Create multiple metrics at once from decoded batch documents."""
+        result = await self.metric_repo.create_batch(metrics)
+        await self._record_series(metrics, result)
+        return result
+
+    async def enqueue_batch(
+        self,
+        metrics: List[Dict[str, Any]],
+        idempotency_key: Optional[str] = None,
+    ) -> None:
+        """Queue decoded batch documents for the workers to write.
+
+        The workers' ingest consumer inserts them and records their series.
+        Documents get their IDs here, derived from ``idempotency_key`` and
+        the time it was first used if given, so replays are not written twice.
+        """
+        if metrics:
+            first_used = await first_used_at(idempotency_key) if idempotency_key else None
+            assign_ids(metrics, idempotency_key, first_used)
+            await publish_documents(settings.ingest_queue_metrics, metrics)
+
+    async def ingest_stream(
+        self,
+        lines: AsyncIterator[Tuple[int, Optional[bytes]]],
+        chunk_size: int = 1000,
+    ) -> MetricStreamResult:
+        """Validate streamed NDJSON records and insert them chunk by chunk.
+
+        At most ``chunk_size`` records are held in memory; each chunk is
+        flushed before the next line is read.
+        """
+        chunks: List[MetricStreamChunk] = []
+        pending: List[Dict[str, Any]] = []
+        pending_lines: List[int] = []
+        errors: List[MetricIngestError] = []
+        rejected = 0
+        first_line = 0
+        last_line = 0
+
+        def reject(line_number: int, reason: str) -> None:
+            nonlocal rejected
+            rejected += 1
+            if len(errors) < MAX_ERRORS_PER_CHUNK:
+                errors.append(MetricIngestError(line=line_number, reason=reason))
+
+        async def flush() -> None:
+            nonlocal pending, pending_lines, errors, rejected
+            result = await self.metric_repo.create_batch(pending)
+            await self._record_series(pending, result)
+            for error in result.errors:
+                reject(pending_lines[error.index], error.reason)
+            chunks.append(
+                MetricStreamChunk(
+                    chunk=len(chunks) + 1,
+                    first_line=first_line,
+                    last_line=last_line,
+                    accepted=result.accepted,
+                    rejected=rejected,
+                    errors=sorted(errors, key=lambda e: e.line),
+                )
+            )
+            pending, pending_lines, errors, rejected = [], [], [], 0
+
+        async for line_number, line in lines:
+            if not pending and not rejected:
+                first_line = line_number
+            last_line = line_number
+
+            document, reason = self._parse_stream_line(line)
+            if document is None:
+                reject(line_number, reason)
+            else:
+                pending.append(document)
+                pending_lines.append(line_number)
+
+            if len(pending) + rejected >= chunk_size:
+                await flush()
+
+        if pending or rejected:
+            await flush()
+
+        return MetricStreamResult(
+            accepted=sum(c.accepted for c in chunks),
+            rejected=sum(c.rejected for c in chunks),
+            chunks=chunks,
+        )
 
     async def get_metric(self, metric_id: str) -> Optional[Metric]:
         """Get a metric by ID."""
@@ -58,40 +169,269 @@ class MetricService:
     async def query_metrics(
         self,
         query: MetricQuery,
-        page: int = 1,
+        page: Optional[int] = 1,
         page_size: int = 20,
-    ) -> PaginatedResponse[MetricResponse]:
-        """Query metrics with pagination."""
+        cursor: Optional[str] = None,
+        count_mode: Optional[str] = None,
+        fields: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Query metrics with pagination.
+
+        Returns the body of a ``PaginatedResponse[MetricResponse]`` built
+        from projected documents, ready for ``DocumentResponse``.
+        Without ``page`` the listing is keyset-paginated from ``cursor``.
+        ``count_mode`` picks how ``total`` is counted (see ``page_total``).
+        ``fields`` is a comma-separated subset of the item fields to return.
+        """
+        selected = select_fields(MetricResponse, fields)
+        if page is None:
+            position = decode_cursor(cursor) if cursor else None
+            projection = response_projection(MetricResponse, selected, required=("timestamp",))
+            metrics, (total, capped) = await gather(
+                self.metric_repo.query_metric_documents(
+                    query, limit=page_size + 1, cursor=position, projection=projection
+                ),
+                self._total(query, count_mode),
+            )
+            metrics, next_cursor, prev_cursor = keyset_page(
+                metrics, page_size, position, key=lambda m: (m["timestamp"], str(m["_id"]))
+            )
+            return {
+                "items": as_response(metrics, MetricResponse, selected),
+                **page_fields(
+                    total,
+                    page_size,
+                    total_capped=capped,
+                    next_cursor=next_cursor,
+                    prev_cursor=prev_cursor,
+                ),
+            }
+
         skip = (page - 1) * page_size
-        metrics = await self.metric_repo.query_metrics(
-            query=query,
-            skip=skip,
-            limit=page_size,
+        projection = response_projection(MetricResponse, selected)
+        metrics, (total, capped) = await gather(
+            self.metric_repo.query_metric_documents(
+                query, skip=skip, limit=page_size, projection=projection
+            ),
+            self._total(query, count_mode),
         )
-        total = await self.metric_repo.count_query(query)
+        return {
+            "items": as_response(metrics, MetricResponse, selected),
+            **page_fields(total, page_size, page=page, total_capped=capped),
+        }
 
-        return PaginatedResponse.create(
-            items=[MetricResponse.model_validate(m.model_dump(by_alias=True)) for m in metrics],
-            total=total,
-            page=page,
-            page_size=page_size,
+    async def _total(
+        self, query: MetricQuery, count_mode: Optional[str]
+    ) -> Tuple[Optional[int], bool]:
+        """Count metrics matching a query in the requested mode."""
+        unfiltered = not query.model_dump(exclude_none=True)
+        return await page_total(
+            ("metrics", query.model_dump_json()),
+            count_mode,
+            lambda limit: self.metric_repo.count_query(query, limit),
+            self.metric_repo.estimated_count if unfiltered else None,
         )
 
+    def export_metrics(self, query: MetricQuery, format: str = "ndjson") -> AsyncIterator[bytes]:
+        """Stream every metric matching a query as NDJSON or CSV chunks."""
+        samples = self.metric_repo.iter_samples(query, settings.export_batch_size)
+        if format == "csv":
+            return encode_csv(samples, EXPORT_COLUMNS, settings.export_flush_bytes)
+        return encode_ndjson(samples, settings.export_flush_bytes)
+
     async def get_latest_by_source(
         self,
         source: str,
         limit: int = 10,
-    ) -> List[Metric]:
-        """Get latest metrics for a source."""
-        return await self.metric_repo.get_latest_by_source(source, limit)
+        fields: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get latest metrics for a source as ``MetricResponse`` bodies.
+
+        ``fields`` is a comma-separated subset of the fields to return.
+        """
+        selected = select_fields(MetricResponse, fields)
+        metrics = await self.metric_repo.get_latest_by_source(
+            source, limit, response_projection(MetricResponse, selected)
+        )
+        return as_response(metrics, MetricResponse, selected)
 
     async def get_aggregations(
         self,
         query: MetricQuery,
+        percentiles: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        """Get metric aggregations."""
-        return await self.metric_repo.get_aggregations(query)
+        """Get metric aggregations.
+
+        ``percentiles`` adds p50/p90/p95/p99: "mongo" approximates them
+        server-side, "numpy" streams the values and computes exact ones in
+        a worker thread. Results are shared through the response cache.
+        """
+
+        async def aggregate() -> List[Dict[str, Any]]:
+            if percentiles == "numpy":
+                columns = await self._collect_values(query)
+                return await asyncio.to_thread(_summarize_columns, columns)
+            return await self.metric_repo.get_aggregations(
+                query, percentiles=percentiles == "mongo"
+            )
+
+        return await cached(
+            METRIC_AGGREGATIONS,
+            {"query": query.model_dump(mode="json", exclude_none=True), "percentiles": percentiles},
+            settings.cache_metric_aggregations_ttl_seconds,
+            aggregate,
+        )
+
+    async def get_histograms(self, query: MetricQuery, bins: int = 20) -> List[MetricHistogram]:
+        """Get equal-width value histograms per metric name and type."""
+        columns = await self._collect_values(query)
+        return await asyncio.to_thread(_histogram_columns, columns, bins)
+
+    async def _collect_values(self, query: MetricQuery) -> Dict[Tuple[str, str], np.ndarray]:
+        limit = settings.aggregation_max_values
+        columns = await self.metric_repo.collect_values(query, limit + 1)
+        if sum(values.size for values in columns.values()) > limit:
+            raise ValidationError(
+                f"More than {limit} samples match; narrow the filters or time range"
+            )
+        return columns
+
+    async def query_range(
+        self,
+        query: MetricQuery,
+        step_seconds: int,
+        agg: str = "avg",
+    ) -> MetricRangeResult:
+        """Get step-aligned points per series for a time range."""
+        start_time = _as_utc(query.start_time)
+        end_time = _as_utc(query.end_time or datetime.now(timezone.utc))
+        query = query.model_copy(update={"start_time": start_time, "end_time": end_time})
+        if start_time >= end_time:
+            raise ValidationError("start must be before end")
+        buckets = (end_time - start_time).total_seconds() / step_seconds
+        if buckets > settings.range_query_max_points:
+            raise ValidationError(
+                f"Range has {int(buckets)} steps; the maximum is "
+                f"{settings.range_query_max_points}, use a larger step"
+            )
+
+        resolution, series = await self.metric_repo.query_range(
+            query, step_seconds, agg, settings.range_query_max_series
+        )
+        return MetricRangeResult(
+            start=start_time,
+            end=end_time,
+            step=step_seconds,
+            agg=agg,
+            resolution=resolution,
+            series=[MetricRangeSeries(**s) for s in series],
+        )
 
     async def delete_metric(self, metric_id: str) -> bool:
         """Delete a metric."""
-        return await self.metric_repo.delete(metric_id)
+        deleted = await self.metric_repo.delete(metric_id)
+        if deleted:
+            await invalidate(METRIC_AGGREGATIONS)
+        return deleted
+
+    async def list_names(self, prefix: Optional[str] = None, limit: int = 100) -> List[str]:
+        """List metric names from the series catalog."""
+        return await self.series_repo.list_names(prefix, limit)
+
+    async def list_label_keys(self, name: Optional[str] = None) -> List[str]:
+        """List label keys from the series catalog."""
+        return await self.series_repo.list_label_keys(name)
+
+    async def list_label_values(
+        self,
+        key: str,
+        name: Optional[str] = None,
+        prefix: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[str]:
+        """List values of a label key from the series catalog."""
+        return await self.series_repo.list_label_values(key, name, prefix, limit)
+
+    async def _record_series(
+        self,
+        documents: List[Dict[str, Any]],
+        result: Optional[BatchWriteResult] = None,
+    ) -> None:
+        """Add the series of written samples to the catalog.
+
+        The catalog only serves lookups, so a failure here is logged rather
+        than failing an ingest whose samples are already stored.
+        """
+        if result is not None and result.errors:
+            rejected = {error.index for error in result.errors}
+            documents = [d for i, d in enumerate(documents) if i not in rejected]
+        if not documents:
+            return
+        try:
+            await self.series_repo.record(documents)
+        except PyMongoError as e:
+            logger.warning("Failed to update series catalog", error=str(e))
+
+    def _parse_stream_line(
+        self, line: Optional[bytes]
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Document of a streamed NDJSON line, or None and why it was rejected."""
+        if line is None:
+            return None, "line exceeds maximum length"
+        try:
+            return self._to_document(MetricCreate.model_validate(orjson.loads(line))), ""
+        except orjson.JSONDecodeError as e:
+            return None, f"invalid JSON: {e}"
+        except PydanticValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            return None, f"{location}: {error['msg']}" if location else error["msg"]
+
+    @staticmethod
+    def _to_document(m: MetricCreate) -> Dict[str, Any]:
+        """Build the MongoDB document for a validated metric."""
+        return {
+            "name": m.name,
+            "metric_type": m.metric_type.value if isinstance(m.metric_type, MetricType) else m.metric_type,
+            "value": m.value,
+            "unit": m.unit,
+            "source": m.source,
+            "namespace": m.namespace,
+            "cluster": m.cluster,
+            "labels": m.labels,
+            "metadata": m.metadata,
+            "timestamp": m.timestamp or datetime.now(timezone.utc),
+        }
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    """Treat naive timestamps as UTC."""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def _summarize_columns(columns: Dict[Tuple[str, str], np.ndarray]) -> List[Dict[str, Any]]:
+    return [
+        {"name": name, "metric_type": metric_type, **summarize(values)}
+        for (name, metric_type), values in columns.items()
+    ]
+
+
+def _histogram_columns(
+    columns: Dict[Tuple[str, str], np.ndarray],
+    bins: int,
+) -> List[MetricHistogram]:
+    histograms = []
+    for (name, metric_type), values in columns.items():
+        edges, counts = histogram(values, bins)
+        histograms.append(
+            MetricHistogram(
+                name=name,
+                metric_type=metric_type,
+                count=int(values.size),
+                edges=edges,
+                counts=counts,
+            )
+        )
+    return histograms
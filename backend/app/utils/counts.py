@@ -0,0 +1,68 @@
+"""Page totals counted exactly, approximately, up to a cap, or not at all."""
+
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.config import get_settings
+from app.core.singleflight import SingleFlight
+
+settings = get_settings()
+
+COUNT_MODES = ("exact", "estimated", "capped", "none")
+# Upper bound on totals remembered by the in-process cache
+MAX_CACHED_COUNTS = 10000
+
+# (key, mode) -> (expires at, total, capped)
+_counts: Dict[Hashable, Tuple[float, Optional[int], bool]] = {}
+_flights = SingleFlight("page_total")
+
+
+async def page_total(
+    key: Hashable,
+    mode: Optional[str],
+    count: Callable[[Optional[int]], Awaitable[int]],
+    estimate: Optional[Callable[[], Awaitable[Optional[int]]]] = None,
+) -> Tuple[Optional[int], bool]:
+    """Get the total for a page and whether it was cut off at the cap.
+
+    ``count`` counts matching documents, stopping at the limit it is given.
+    ``estimate`` reads collection metadata and is only passed for
+    unfiltered queries; without it ``estimated`` falls back to ``capped``.
+    Totals of the same ``key`` and mode are reused for a few seconds, and
+    concurrent requests for one share a single count.
+    """
+    mode = mode or settings.pagination_count_mode
+    if mode == "none":
+        return None, False
+
+    cache_key = (key, mode)
+    now = time.monotonic()
+    cached = _counts.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1], cached[2]
+
+    total, capped = await _flights.do(cache_key, lambda: _count(mode, count, estimate))
+    if settings.pagination_count_cache_seconds > 0:
+        if len(_counts) >= MAX_CACHED_COUNTS:
+            _counts.clear()
+        _counts[cache_key] = (now + settings.pagination_count_cache_seconds, total, capped)
+    return total, capped
+
+
+async def _count(
+    mode: str,
+    count: Callable[[Optional[int]], Awaitable[int]],
+    estimate: Optional[Callable[[], Awaitable[Optional[int]]]],
+) -> Tuple[Optional[int], bool]:
+    if mode == "exact":
+        return await count(None), False
+    if mode == "estimated" and estimate is not None:
+        total = await estimate()
+        if total is not None:
+            return total, False
+
+    cap = settings.pagination_count_cap
+    total = await count(cap + 1)
+    if total > cap:
+        return cap, True
+    return total, False
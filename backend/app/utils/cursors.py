@@ -0,0 +1,98 @@
+"""Opaque keyset pagination cursors.
+
+A cursor encodes the sort value and ``_id`` of the first or last item of a
+page, so the next page is read with a range predicate instead of skipping
+over every earlier document.
+"""
+
+import base64
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import orjson
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from app.core.exceptions import ValidationError
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Position between two items of a newest-first listing."""
+
+    value: datetime
+    id: Any
+    before: bool = False  # page towards newer items
+
+
+def encode_cursor(value: datetime, id: str, before: bool = False) -> str:
+    """Encode a position as a URL-safe token."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    micros = int(value.timestamp()) * 1_000_000 + value.microsecond
+    payload = orjson.dumps({"t": micros, "i": id, "o": ObjectId.is_valid(id), "b": before})
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Decode a token made by ``encode_cursor``."""
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        value = datetime.fromtimestamp(payload["t"] // 1_000_000, tz=timezone.utc).replace(
+            microsecond=payload["t"] % 1_000_000
+        )
+        id = ObjectId(payload["i"]) if payload["o"] else str(payload["i"])
+        return Cursor(value=value, id=id, before=bool(payload["b"]))
+    except Exception as e:
+        raise ValidationError("Invalid pagination cursor") from e
+
+
+def keyset_filter(
+    filter: Dict[str, Any],
+    cursor: Optional[Cursor],
+    field: str = "timestamp",
+) -> Dict[str, Any]:
+    """Restrict ``filter`` to items past ``cursor`` in its direction."""
+    if cursor is None:
+        return filter
+    op = "$gt" if cursor.before else "$lt"
+    predicate = {
+        "$or": [
+            {field: {op: cursor.value}},
+            {field: cursor.value, "_id": {op: cursor.id}},
+        ]
+    }
+    return {"$and": [filter, predicate]} if filter else predicate
+
+
+def keyset_sort(cursor: Optional[Cursor], field: str = "timestamp") -> List[Tuple[str, int]]:
+    """Sort reading away from ``cursor``; newest first unless paging back."""
+    direction = ASCENDING if cursor is not None and cursor.before else DESCENDING
+    return [(field, direction), ("_id", direction)]
+
+
+def keyset_page(
+    items: List[T],
+    limit: int,
+    cursor: Optional[Cursor],
+    key: Callable[[T], Tuple[datetime, str]],
+) -> Tuple[List[T], Optional[str], Optional[str]]:
+    """Trim a page fetched with ``limit + 1`` items and build its cursors.
+
+    Returns the items newest first with the ``next`` and ``prev`` tokens;
+    a token is ``None`` when there is nothing in that direction.
+    """
+    has_more = len(items) > limit
+    items = items[:limit]
+    before = cursor is not None and cursor.before
+    if before:
+        items.reverse()
+    if not items:
+        return items, None, None
+    next_cursor = encode_cursor(*key(items[-1])) if has_more or before else None
+    has_prev = has_more if before else cursor is not None
+    prev_cursor = encode_cursor(*key(items[0]), before=True) if has_prev else None
+    return items, next_cursor, prev_cursor
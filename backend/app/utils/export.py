@@ -0,0 +1,87 @@
+"""Streaming NDJSON and CSV encoders for bulk exports."""
+
+import csv
+import io
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Dict, Sequence
+
+import orjson
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def encode_ndjson(
+    documents: AsyncIterator[Dict[str, Any]],
+    flush_bytes: int = 65536,
+) -> AsyncIterator[bytes]:
+    """Encode documents as NDJSON, yielding chunks of about ``flush_bytes``."""
+    buffer = bytearray()
+    async with aclosing(documents):
+        async for document in documents:
+            buffer += orjson.dumps(
+                _exportable(document),
+                option=orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE,
+            )
+            if len(buffer) >= flush_bytes:
+                yield bytes(buffer)
+                buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def encode_csv(
+    documents: AsyncIterator[Dict[str, Any]],
+    columns: Sequence[str],
+    flush_bytes: int = 65536,
+) -> AsyncIterator[bytes]:
+    """Encode documents as CSV with a header row.
+
+    Nested values such as labels and metadata are written as JSON.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async with aclosing(documents):
+        async for document in documents:
+            document = _exportable(document)
+            writer.writerow([_csv_value(document.get(column)) for column in columns])
+            if buffer.tell() >= flush_bytes:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def until_disconnected(
+    chunks: AsyncIterator[bytes],
+    is_disconnected: Callable[[], Any],
+) -> AsyncIterator[bytes]:
+    """Stop pulling chunks once the client has gone away.
+
+    Closing the chunk iterator closes the database cursor behind it.
+    """
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            if await is_disconnected():
+                break
+            yield chunk
+
+
+def _exportable(document: Dict[str, Any]) -> Dict[str, Any]:
+    if "_id" in document and not isinstance(document["_id"], str):
+        document["_id"] = str(document["_id"])
+    return document
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    if hasattr(value, "isoformat"):
+        if getattr(value, "tzinfo", None) is None:
+            return value.isoformat() + "Z"
+        return value.isoformat()
+    return value
@@ -0,0 +1,166 @@
+"""Batch ingest bodies in JSON, MessagePack or protobuf.
+
+Bodies are decoded and validated straight into the documents that
+``create_batch`` inserts: records are checked against TypedDict schemas
+mirroring ``MetricCreate``/``LogCreate``, so no model is built per record.
+"""
+
+from datetime import datetime, timezone
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+import msgpack
+from google.protobuf.message import DecodeError
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.exceptions import ValidationError
+from app.proto import metrics_pb2
+from app.schemas.log import LogBatchRecord, LogCreate
+from app.schemas.metric import MetricBatchRecord, MetricCreate
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+PROTOBUF_MEDIA_TYPES = ("application/x-protobuf", "application/protobuf")
+
+_METRIC_BATCH = TypeAdapter(MetricBatchRecord)
+_LOG_BATCH = TypeAdapter(LogBatchRecord)
+# MetricType numbers of the protobuf schema mapped to the API values
+_METRIC_TYPES = {
+    value.number: value.name[len("METRIC_TYPE_"):].lower()
+    for value in metrics_pb2.MetricType.DESCRIPTOR.values
+    if value.number
+}
+_METRIC_OPTIONAL_FIELDS = ("unit", "source", "namespace", "cluster")
+
+
+def body_format(content_type: Optional[str]) -> str:
+    """Format of a request body by media type: "json", "msgpack" or "protobuf"."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in MSGPACK_MEDIA_TYPES:
+        return "msgpack"
+    if media_type in PROTOBUF_MEDIA_TYPES:
+        return "protobuf"
+    return "json"
+
+
+def batch_openapi(model: Type[BaseModel], protobuf: bool = False) -> Dict[str, Any]:
+    """``openapi_extra`` documenting a batch body read by a dependency.
+
+    The JSON schema of ``model`` is listed for JSON and MessagePack bodies;
+    nested models must be schema components of the app already.
+    """
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    content = {
+        media_type: {"schema": schema}
+        for media_type in ("application/json", *MSGPACK_MEDIA_TYPES[:1])
+    }
+    if protobuf:
+        content[PROTOBUF_MEDIA_TYPES[0]] = {
+            "schema": {
+                "type": "string",
+                "format": "binary",
+                "description": "infrawatch.ingest.v1.MetricBatch, see app/proto/metrics.proto",
+            }
+        }
+    return {"requestBody": {"required": True, "content": content}}
+
+
+def decode_metric_batch(body: bytes, content_type: Optional[str]) -> List[Dict[str, Any]]:
+    """Decode a metric batch body into documents ready to insert.
+
+    Raises ``ValidationError`` for bodies that cannot be decoded and
+    pydantic's ``ValidationError`` for invalid records.
+    """
+    kind = body_format(content_type)
+    if kind == "protobuf":
+        batch = _METRIC_BATCH.validate_python(_metric_batch_from_proto(body))
+    elif kind == "msgpack":
+        batch = _METRIC_BATCH.validate_python(_unpack(body))
+    else:
+        batch = _METRIC_BATCH.validate_json(body)
+    return [_document(record, MetricCreate) for record in batch["metrics"]]
+
+
+def decode_log_batch(body: bytes, content_type: Optional[str]) -> List[Dict[str, Any]]:
+    """Decode a log batch body into documents ready to insert.
+
+    Raises like ``decode_metric_batch``; protobuf is only defined for
+    metric batches.
+    """
+    kind = body_format(content_type)
+    if kind == "protobuf":
+        raise ValidationError("Protobuf bodies are only accepted for metric batches")
+    if kind == "msgpack":
+        batch = _LOG_BATCH.validate_python(_unpack(body))
+    else:
+        batch = _LOG_BATCH.validate_json(body)
+    return [_document(record, LogCreate) for record in batch["logs"]]
+
+
+def _unpack(body: bytes) -> Any:
+    try:
+        # Timestamp extension values decode to aware datetimes
+        return msgpack.unpackb(body, timestamp=3)
+    except (msgpack.UnpackException, ValueError) as e:
+        raise ValidationError(f"Invalid MessagePack body: {e}") from e
+
+
+def _metric_batch_from_proto(body: bytes) -> Dict[str, Any]:
+    """Expand a ``MetricBatch`` message into a batch of metric records."""
+    try:
+        batch = metrics_pb2.MetricBatch.FromString(body)
+    except DecodeError as e:
+        raise ValidationError(f"Invalid protobuf body: {e}") from e
+
+    shared: Dict[str, Any] = {}
+    if batch.source:
+        shared["source"] = batch.source
+    for field in ("namespace", "cluster"):
+        if batch.HasField(field):
+            shared[field] = getattr(batch, field)
+    shared_labels = dict(batch.labels)
+    metrics = [_metric_from_proto(metric, shared, shared_labels) for metric in batch.metrics]
+    return {"metrics": metrics}
+
+
+def _metric_from_proto(
+    metric: metrics_pb2.Metric, shared: Dict[str, Any], shared_labels: Dict[str, str]
+) -> Dict[str, Any]:
+    """Metric record of a ``Metric`` message, on top of the batch-wide fields."""
+    record = {**shared, "name": metric.name, "value": metric.value}
+    if metric.metric_type:
+        # Unknown numbers are left for validation to reject
+        record["metric_type"] = _METRIC_TYPES.get(metric.metric_type, metric.metric_type)
+    for field in _METRIC_OPTIONAL_FIELDS:
+        if metric.HasField(field):
+            record[field] = getattr(metric, field)
+    if metric.labels:
+        record["labels"] = {**shared_labels, **metric.labels}
+    elif shared_labels:
+        record["labels"] = dict(shared_labels)
+    if metric.timestamp_ms:
+        record["timestamp"] = datetime.fromtimestamp(metric.timestamp_ms / 1000, tz=timezone.utc)
+    return record
+
+
+@lru_cache(maxsize=None)
+def _defaults(model: Type[BaseModel]) -> Tuple[Tuple[str, Any, Optional[Callable[[], Any]]], ...]:
+    """(name, default, default_factory) of the optional fields of ``model``."""
+    defaults = []
+    for name, field in model.model_fields.items():
+        if field.is_required():
+            continue
+        default = field.default.value if isinstance(field.default, Enum) else field.default
+        defaults.append((name, default, field.default_factory))
+    return tuple(defaults)
+
+
+def _document(record: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """Fill a validated record with the defaults of ``model``."""
+    for name, default, factory in _defaults(model):
+        if name not in record:
+            record[name] = factory() if factory is not None else default
+    if record["timestamp"] is None:
+        record["timestamp"] = datetime.now(timezone.utc)
+    return record
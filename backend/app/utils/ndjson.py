@@ -0,0 +1,48 @@
+"""Newline-delimited JSON utilities."""
+
+from typing import AsyncIterator, Optional, Tuple
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = 65536,
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Split a byte stream into NDJSON lines.
+
+    Yields ``(line_number, line)`` pairs with 1-based line numbers. Blank
+    lines are skipped. A line longer than ``max_line_bytes`` is discarded
+    as it arrives and yielded as ``None`` so memory stays bounded.
+    """
+    buffer = bytearray()
+    line_number = 0
+    oversized = False
+
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            line_number += 1
+            if not oversized:
+                oversized = _extend_line(buffer, chunk[start:end], max_line_bytes)
+            if oversized:
+                yield line_number, None
+            elif buffer.strip():
+                yield line_number, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+        if not oversized:
+            oversized = _extend_line(buffer, chunk[start:], max_line_bytes)
+
+    if oversized:
+        yield line_number + 1, None
+    elif buffer.strip():
+        yield line_number + 1, bytes(buffer)
+
+
+def _extend_line(buffer: bytearray, data: bytes, max_line_bytes: int) -> bool:
+    """Append ``data`` to a line; once it is too long, clear it and return True."""
+    buffer.extend(data)
+    if len(buffer) > max_line_bytes:
+        buffer.clear()
+        return True
+    return False
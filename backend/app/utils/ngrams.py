@@ -0,0 +1,227 @@
+"""Trigram index for substring and regex log search.
+
+Every log stores the distinct lowercase trigrams of its message in
+``_trigrams``, a multikey-indexed array. A search asks for documents holding
+the trigrams of its literal text with ``$all``, then verifies the candidates
+with a ``$regex`` on ``message``. MongoDB does not intersect the index entries
+of the ``$all`` terms: it scans the bounds of the first one and checks the
+rest, with the ``$regex``, on every document fetched. The grams are therefore
+ordered rarest first, estimated from how common their characters are in log
+text. Only the first ``max_chars`` characters of a message are indexed;
+longer messages are flagged ``_trigrams_partial`` and always verified.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.exceptions import ValidationError
+
+NGRAM = 3
+
+_BOUNDED_REPEAT = re.compile(r"\{(\d*)(,\d*)?\}")
+_INLINE_FLAGS = re.compile(r"\?[aiLmsux-]*")
+# Extra characters taken by escapes with a fixed number of digits
+_ESCAPE_DIGITS = {"x": 2, "u": 4, "U": 8}
+# Characters of log text from most to least common; any other is rarer still
+_COMMON_CHARS = " etaoinsrhldcumfpgwybvkxjqz"
+
+
+def trigrams(text: str) -> Set[str]:
+    """Distinct lowercase trigrams of a text."""
+    text = text.lower()
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def index_fields(message: str, max_chars: int) -> Dict[str, Any]:
+    """Fields a log with ``message`` stores for the trigram index."""
+    fields: Dict[str, Any] = {"_trigrams": sorted(trigrams(message[:max_chars]))}
+    if len(message) > max_chars:
+        fields["_trigrams_partial"] = True
+    return fields
+
+
+def gram_rarity(gram: str) -> int:
+    """Estimated rarity of a trigram; higher is rarer."""
+    return sum(
+        _COMMON_CHARS.index(char) if char in _COMMON_CHARS else len(_COMMON_CHARS)
+        for char in gram
+    )
+
+
+def query_grams(literals: List[str], max_grams: int) -> List[str]:
+    """Trigrams a match must contain, the ``max_grams`` rarest first.
+
+    Non-overlapping trigrams of each literal are preferred; they cover the
+    literal with the fewest index keys.
+    """
+    grams: List[str] = []
+    for literal in sorted(literals, key=len, reverse=True):
+        literal = literal.lower()
+        starts = list(range(0, len(literal) - NGRAM + 1, NGRAM))
+        if starts and starts[-1] != len(literal) - NGRAM:
+            starts.append(len(literal) - NGRAM)
+        for start in starts:
+            gram = literal[start:start + NGRAM]
+            if gram not in grams:
+                grams.append(gram)
+    grams.sort(key=gram_rarity, reverse=True)
+    return grams[:max_grams]
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Literal strings every match of a regex contains.
+
+    The scan is conservative: escapes other than escaped punctuation,
+    lookarounds, alternations and verbose patterns require nothing.
+    Raises ``ValidationError`` when the pattern does not compile.
+    """
+    try:
+        compiled = re.compile(pattern)
+    except re.error as e:
+        raise ValidationError(f"Invalid regex: {e}") from e
+    if compiled.flags & re.VERBOSE:
+        return []
+    return _LiteralScanner(pattern).sequence() or []
+
+
+class _LiteralScanner:
+    """Walks a pattern that compiles, collecting runs of literal characters."""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.pos = 0
+
+    def sequence(self) -> Optional[List[str]]:
+        """Literal runs up to the closing parenthesis; None with alternatives."""
+        runs: List[str] = []
+        run: List[str] = []
+        alternatives = False
+        while self.pos < len(self.pattern) and self.pattern[self.pos] != ")":
+            if self.pattern[self.pos] == "|":
+                self.pos += 1
+                alternatives = True
+                continue
+            literal, group = self._atom()
+            minimum = self._repeat()
+            if literal is not None and minimum != 0:
+                run.append(literal)
+            if literal is None or minimum is not None:
+                # Whatever follows is no longer adjacent to the run
+                if run:
+                    runs.append("".join(run))
+                    run = []
+            if group and minimum != 0:
+                runs += group
+        if run:
+            runs.append("".join(run))
+        return None if alternatives else runs
+
+    def _atom(self):
+        """Next atom as (literal character, required runs of a group)."""
+        char = self.pattern[self.pos]
+        self.pos += 1
+        if char == "\\":
+            escaped = self.pattern[self.pos]
+            if not escaped.isalnum():
+                self.pos += 1
+                return escaped, None
+            self._skip_escape(escaped)
+        elif char == "[":
+            self._skip_class()
+        elif char == "(":
+            group = self._group()
+            self.pos += 1  # the closing parenthesis
+            return None, group
+        elif char not in ".^$":
+            return char, None
+        return None, None
+
+    def _repeat(self) -> Optional[int]:
+        """Consume a quantifier and return its minimum count, None without one."""
+        char = self.pattern[self.pos:self.pos + 1]
+        if char in ("*", "?"):
+            minimum, self.pos = 0, self.pos + 1
+        elif char == "+":
+            minimum, self.pos = 1, self.pos + 1
+        else:
+            bounded = _BOUNDED_REPEAT.match(self.pattern, self.pos)
+            if bounded is None or not (bounded.group(1) or bounded.group(2)):
+                return None
+            minimum, self.pos = int(bounded.group(1) or 0), bounded.end()
+        if self.pattern[self.pos:self.pos + 1] in ("?", "+"):
+            self.pos += 1  # lazy or possessive
+        return minimum
+
+    def _group(self) -> Optional[List[str]]:
+        """Required runs of a group whose opening parenthesis was consumed."""
+        rest = self.pattern[self.pos:]
+        keep = True
+        if rest.startswith(("?:", "?>")):
+            self.pos += 2
+        elif rest.startswith("?P<"):
+            self.pos = self.pattern.index(">", self.pos) + 1
+        elif rest.startswith(("?P=", "?#")):
+            self.pos = self.pattern.index(")", self.pos)
+            return None
+        elif rest.startswith(("?=", "?!", "?<=", "?<!")):
+            # Lookarounds require nothing of the match itself
+            self.pos += 3 if rest.startswith("?<") else 2
+            keep = False
+        elif rest.startswith("?("):
+            # Only one branch of a conditional matches
+            self.pos = self.pattern.index(")", self.pos) + 1
+            keep = False
+        elif rest.startswith("?"):
+            flags = _INLINE_FLAGS.match(self.pattern, self.pos)
+            self.pos = flags.end()
+            if self.pattern[self.pos] == ")":
+                return None
+            self.pos += 1  # the colon of a scoped flag group
+            keep = "x" not in flags.group()
+        runs = self.sequence()
+        return runs if keep else None
+
+    def _skip_escape(self, escaped: str) -> None:
+        if escaped == "N":
+            self.pos = self.pattern.index("}", self.pos) + 1
+        elif escaped.isdigit():
+            end = self.pos + 1
+            while end < min(self.pos + 3, len(self.pattern)) and self.pattern[end].isdigit():
+                end += 1
+            self.pos = end
+        else:
+            self.pos += 1 + _ESCAPE_DIGITS.get(escaped, 0)
+
+    def _skip_class(self) -> None:
+        if self.pattern[self.pos] == "^":
+            self.pos += 1
+        if self.pattern[self.pos] == "]":
+            self.pos += 1
+        while self.pattern[self.pos] != "]":
+            self.pos += 2 if self.pattern[self.pos] == "\\" else 1
+        self.pos += 1
+
+
+def search_filter(search: str, mode: str, max_grams: int) -> Dict[str, Any]:
+    """Filter for logs whose message contains ``search`` or matches it as a regex.
+
+    Substring search ignores case; a regex matches as written. Raises
+    ``ValidationError`` when the search has no literal of ``NGRAM``
+    characters to look up, which would mean reading every log.
+    """
+    if mode == "substring":
+        literals = [search]
+        verify = {"$regex": re.escape(search), "$options": "i"}
+    else:
+        literals = required_literals(search)
+        verify = {"$regex": search}
+
+    grams = query_grams([literal for literal in literals if len(literal) >= NGRAM], max_grams)
+    if not grams:
+        raise ValidationError(
+            f"{mode.capitalize()} search needs at least {NGRAM} consecutive literal characters"
+        )
+    return {
+        "$or": [{"_trigrams": {"$all": grams}}, {"_trigrams_partial": True}],
+        "message": verify,
+    }
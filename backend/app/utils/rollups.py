@@ -0,0 +1,109 @@
+"""Metric rollup resolutions and selection."""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Rollup resolution -> window seconds, finest first
+ROLLUP_RESOLUTIONS = {"1m": 60, "5m": 300, "1h": 3600}
+
+
+def rollup_collection(resolution: str) -> str:
+    """Name of the collection holding rollups of a resolution."""
+    return f"metrics_rollup_{resolution}"
+
+
+def rollup_ttl_seconds(resolution: str) -> int:
+    """Retention of a rollup resolution."""
+    return getattr(settings, f"rollup_{resolution}_ttl_seconds")
+
+
+def rollup_checkpoint(resolution: str) -> str:
+    """ID of the ``checkpoints`` document marking how far a resolution is rolled up."""
+    return f"rollup_{resolution}"
+
+
+def split_at_checkpoint(
+    filter_dict: Dict[str, Any],
+    rolled_up_until: Optional[datetime],
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Split a sample filter at the end of the rolled-up range.
+
+    Returns the filter for windows read from the rollup collection, before
+    ``rolled_up_until``, and the filter for the raw samples from it on. A
+    part is None when the filter's time range misses it. Checkpoints are
+    window-aligned, so no window spans both parts.
+    """
+    bounds = filter_dict.get("timestamp") or {}
+    start, end = bounds.get("$gte"), bounds.get("$lte")
+    if rolled_up_until is None:
+        return None, filter_dict
+    if start is not None and _utc(start) >= rolled_up_until:
+        return None, filter_dict
+    rolled = {**filter_dict, "timestamp": {**bounds, "$lt": rolled_up_until}}
+    if end is not None and _utc(end) < rolled_up_until:
+        return rolled, None
+    return rolled, {**filter_dict, "timestamp": {**bounds, "$gte": rolled_up_until}}
+
+
+def _utc(timestamp: datetime) -> datetime:
+    return timestamp.replace(tzinfo=timezone.utc) if timestamp.tzinfo is None else timestamp
+
+
+def choose_resolution(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime] = None,
+    now: Optional[datetime] = None,
+) -> Optional[str]:
+    """Pick the rollup resolution to read for a time range.
+
+    Returns None for raw samples: when rollups are disabled, the range is
+    open-ended or short. Otherwise returns the finest resolution that keeps
+    the range within ``rollup_max_points`` windows and still retains its
+    start, falling back to the coarsest one that does.
+    """
+    if not settings.rollups_enabled or start_time is None:
+        return None
+    now = now or datetime.now(timezone.utc)
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=timezone.utc)
+    if end_time is None:
+        end_time = now
+    elif end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+
+    span = (end_time - start_time).total_seconds()
+    if span <= settings.rollup_raw_max_range_seconds:
+        return None
+
+    age = (now - start_time).total_seconds()
+    retained = [r for r in ROLLUP_RESOLUTIONS if age <= rollup_ttl_seconds(r)]
+    for resolution in retained:
+        if span / ROLLUP_RESOLUTIONS[resolution] <= settings.rollup_max_points:
+            return resolution
+    return retained[-1] if retained else None
+
+
+def choose_step_resolution(
+    step_seconds: int,
+    start_time: datetime,
+    now: Optional[datetime] = None,
+) -> Optional[str]:
+    """Pick the coarsest rollup whose windows tile ``step_seconds`` buckets.
+
+    Returns None for raw samples when rollups are disabled, no rollup
+    divides the step or none retains ``start_time``.
+    """
+    if not settings.rollups_enabled:
+        return None
+    now = now or datetime.now(timezone.utc)
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=timezone.utc)
+    age = (now - start_time).total_seconds()
+    for resolution, seconds in reversed(ROLLUP_RESOLUTIONS.items()):
+        if step_seconds % seconds == 0 and age <= rollup_ttl_seconds(resolution):
+            return resolution
+    return None
@@ -0,0 +1,34 @@
+"""Metric series identity helpers."""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import orjson
+
+
+def series_key(
+    name: str,
+    source: str,
+    namespace: Optional[str] = "default",
+    cluster: Optional[str] = "default",
+    labels: Optional[Dict[str, str]] = None,
+) -> str:
+    """Hash the identity of a metric series.
+
+    A series is identified by name, source, namespace, cluster and its
+    labels; label order does not matter.
+    """
+    identity = orjson.dumps(
+        [name, source, namespace, cluster, labels or {}],
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha1(identity).hexdigest()
+
+
+def bucket_start(timestamp: datetime, bucket_seconds: int) -> datetime:
+    """Align a timestamp to the start of its storage bucket."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % bucket_seconds, tz=timezone.utc)
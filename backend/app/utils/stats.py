@@ -0,0 +1,25 @@
+"""Vectorized statistics over metric value columns."""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def summarize(values: np.ndarray) -> Dict[str, Any]:
+    """Get avg/min/max/count and percentiles of a value column."""
+    percentiles = np.percentile(values, PERCENTILES)
+    return {
+        "avg_value": round(float(values.mean()), 2),
+        "min_value": round(float(values.min()), 2),
+        "max_value": round(float(values.max()), 2),
+        "count": int(values.size),
+        **{f"p{q}": round(float(v), 2) for q, v in zip(PERCENTILES, percentiles, strict=True)},
+    }
+
+
+def histogram(values: np.ndarray, bins: int) -> Tuple[List[float], List[int]]:
+    """Get equal-width bucket edges and counts of a value column."""
+    counts, edges = np.histogram(values, bins=bins)
+    return edges.tolist(), counts.tolist()
@@ -0,0 +1,193 @@
+"""Compression ratio and cost of gzip/zstd for ingest batches and list pages.
+
+The first table compares the codecs on representative payloads. The second
+sends the payloads through ``CompressionMiddleware`` over ASGI: requests
+are decompressed and validated against the ingest schema, responses are
+compressed. ASGI has no network, so the transfer time of the bytes on the
+wire is estimated from ``--mbps``.
+
+    cd backend
+    python -m benchmarks.compression [--batch 1000] [--requests 200] [--mbps 100]
+"""
+
+import argparse
+import asyncio
+import gzip
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Tuple
+
+import orjson
+import zstandard
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.compression import GZIP_LEVEL, ZSTD_LEVEL, CompressionMiddleware
+from app.core.responses import DocumentResponse
+from app.schemas.log import LogBatchCreate
+from app.schemas.metric import MetricBatchCreate
+
+CODECS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "gzip": (lambda b: gzip.compress(b, GZIP_LEVEL), gzip.decompress),
+    "zstd": (
+        zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress,
+        zstandard.ZstdDecompressor().decompress,
+    ),
+}
+
+
+def log_batch(count: int) -> Dict[str, Any]:
+    levels = ("info", "info", "info", "warning", "error")
+    now = datetime.utcnow()
+    return {
+        "logs": [
+            {
+                "message": f"GET /api/v1/orders/{1000 + i % 97} 200 {3 + i % 40}ms",
+                "level": levels[i % len(levels)],
+                "source": "orders-api",
+                "namespace": "shop",
+                "cluster": "prod-eu-1",
+                "pod_name": f"orders-api-7d9f8c-{i % 6}",
+                "container_name": "orders-api",
+                "labels": {"app": "orders-api", "tier": "backend"},
+                "timestamp": (now - timedelta(milliseconds=50 * i)).isoformat(),
+            }
+            for i in range(count)
+        ]
+    }
+
+
+def metric_batch(count: int) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    return {
+        "metrics": [
+            {
+                "name": "cpu_usage",
+                "metric_type": "cpu",
+                "value": round(20 + (i * 7.3) % 60, 2),
+                "unit": "percent",
+                "source": f"node-{i % 8}",
+                "namespace": "default",
+                "cluster": "prod-eu-1",
+                "labels": {"host": f"node-{i % 8}", "zone": "eu-1a"},
+                "timestamp": (now - timedelta(seconds=15 * i)).isoformat(),
+            }
+            for i in range(count)
+        ]
+    }
+
+
+def list_page(count: int) -> Dict[str, Any]:
+    items = metric_batch(count)["metrics"]
+    for i, item in enumerate(items):
+        item["_id"] = f"65f1c0de{i:016x}"
+        item["metadata"] = {}
+    return {"items": items, "total": 50 * count, "page": 1, "page_size": count}
+
+
+def time_ms(fn: Callable[[bytes], bytes], data: bytes, repeat: int = 20) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def codec_table(payloads: Dict[str, bytes]) -> None:
+    print(f"{'payload':<16}{'codec':<6}{'bytes':>10}{'ratio':>8}{'comp ms':>10}{'decomp ms':>11}")
+    for name, raw in payloads.items():
+        print(f"{name:<16}{'none':<6}{len(raw):>10}")
+        for codec, (compress, decompress) in CODECS.items():
+            packed = compress(raw)
+            print(
+                f"{'':<16}{codec:<6}{len(packed):>10}{len(raw) / len(packed):>8.1f}"
+                f"{time_ms(compress, raw):>10.2f}{time_ms(decompress, packed):>11.2f}"
+            )
+
+
+def build_app(page: Dict[str, Any]) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.post("/logs/batch")
+    async def ingest_logs(batch: LogBatchCreate):
+        return {"accepted": len(batch.logs)}
+
+    @app.post("/metrics/batch")
+    async def ingest_metrics(batch: MetricBatchCreate):
+        return {"accepted": len(batch.metrics)}
+
+    @app.get("/page")
+    async def get_page():
+        return DocumentResponse(page)
+
+    return app
+
+
+async def measure(requests: int, send: Callable[..., Any], *args: Any, **kwargs: Any) -> float:
+    (await send(*args, **kwargs)).raise_for_status()
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await send(*args, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+async def end_to_end(batch: int, requests: int, mbps: float) -> None:
+    logs, metrics, page = log_batch(batch), metric_batch(batch), list_page(100)
+    app = build_app(page)
+    bytes_per_ms = mbps * 1_000_000 / 8 / 1000
+
+    print(f"{'request':<22}{'codec':<6}{'wire bytes':>12}{'app ms':>9}{'+ wire ms':>11}")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for path, body in (("/logs/batch", logs), ("/metrics/batch", metrics)):
+            raw = orjson.dumps(body)
+            for codec in ("none", *CODECS):
+                content = raw if codec == "none" else CODECS[codec][0](raw)
+                headers = {"Content-Type": "application/json"}
+                if codec != "none":
+                    headers["Content-Encoding"] = codec
+                latency = await measure(
+                    requests, client.post, path, content=content, headers=headers
+                )
+                print(
+                    f"{'POST ' + path:<22}{codec:<6}{len(content):>12}{latency:>9.2f}"
+                    f"{latency + len(content) / bytes_per_ms:>11.2f}"
+                )
+
+        for codec in ("identity", *CODECS):
+            headers = {"Accept-Encoding": codec}
+            # Read the body undecoded once to count the bytes on the wire
+            async with client.stream("GET", "/page", headers=headers) as response:
+                wire = sum([len(chunk) async for chunk in response.aiter_raw()])
+            latency = await measure(requests, client.get, "/page", headers=headers)
+            name = "none" if codec == "identity" else codec
+            print(
+                f"{'GET /page (100 items)':<22}{name:<6}{wire:>12}{latency:>9.2f}"
+                f"{latency + wire / bytes_per_ms:>11.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=1000, help="items per ingest batch")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--mbps", type=float, default=100.0, help="assumed link bandwidth")
+    args = parser.parse_args()
+
+    codec_table(
+        {
+            f"logs x{args.batch}": orjson.dumps(log_batch(args.batch)),
+            f"metrics x{args.batch}": orjson.dumps(metric_batch(args.batch)),
+            "page x100": orjson.dumps(list_page(100)),
+        }
+    )
+    print()
+    asyncio.run(end_to_end(args.batch, args.requests, args.mbps))
+
+
+if __name__ == "__main__":
+    main()
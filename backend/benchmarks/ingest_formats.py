@@ -0,0 +1,130 @@
+"""Decode throughput of batch ingest bodies per content type.
+
+Compares the former path, which validated JSON into ``MetricBatchCreate``
+models and copied each into a document, with decoding JSON, MessagePack and
+protobuf bodies straight into documents (``app.utils.ingest_formats``).
+
+    cd backend
+    python -m benchmarks.ingest_formats [--batch 1000] [--repeat 50]
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+import msgpack
+import orjson
+
+from app.proto import metrics_pb2
+from app.schemas.log import LogBatchCreate
+from app.schemas.metric import MetricBatchCreate
+from app.services.metric_service import MetricService
+from app.utils.ingest_formats import decode_log_batch, decode_metric_batch
+from benchmarks.compression import log_batch, metric_batch
+
+
+def with_datetimes(batch: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """The batch with timestamps as datetimes, packed as msgpack timestamps."""
+    return {
+        key: [
+            {**item, "timestamp": datetime.fromisoformat(item["timestamp"]).replace(tzinfo=timezone.utc)}
+            for item in batch[key]
+        ]
+    }
+
+
+def metric_proto(count: int) -> bytes:
+    now = datetime.now(timezone.utc)
+    batch = metrics_pb2.MetricBatch(source="node-0", namespace="default", cluster="prod-eu-1")
+    for i in range(count):
+        batch.metrics.add(
+            name="cpu_usage",
+            metric_type=metrics_pb2.METRIC_TYPE_CPU,
+            value=round(20 + (i * 7.3) % 60, 2),
+            unit="percent",
+            source=f"node-{i % 8}",
+            labels={"host": f"node-{i % 8}", "zone": "eu-1a"},
+            timestamp_ms=int((now - timedelta(seconds=15 * i)).timestamp() * 1000),
+        )
+    return batch.SerializeToString()
+
+
+def metric_models(body: bytes) -> List[Dict[str, Any]]:
+    return [MetricService._to_document(m) for m in MetricBatchCreate.model_validate_json(body).metrics]
+
+
+def log_models(body: bytes) -> List[Dict[str, Any]]:
+    return [log.model_dump(mode="python") for log in LogBatchCreate.model_validate_json(body).logs]
+
+
+def time_ms(fn: Callable[[], Any], repeat: int) -> float:
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def report(title: str, count: int, cases: Dict[str, Callable[[], Any]], sizes: Dict[str, int], repeat: int) -> None:
+    print(f"{title} x{count}")
+    print(f"{'path':<24}{'bytes':>10}{'ms':>9}{'records/s':>12}")
+    for name, fn in cases.items():
+        elapsed = time_ms(fn, repeat)
+        print(f"{name:<24}{sizes[name]:>10}{elapsed:>9.2f}{count / elapsed * 1000:>12,.0f}")
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=1000, help="items per ingest batch")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    metrics = metric_batch(args.batch)
+    metrics_json = orjson.dumps(metrics)
+    metrics_msgpack = msgpack.packb(with_datetimes(metrics, "metrics"), datetime=True)
+    metrics_proto = metric_proto(args.batch)
+    report(
+        "metrics",
+        args.batch,
+        {
+            "json -> models": lambda: metric_models(metrics_json),
+            "json -> documents": lambda: decode_metric_batch(metrics_json, "application/json"),
+            "msgpack -> documents": lambda: decode_metric_batch(metrics_msgpack, "application/msgpack"),
+            "protobuf -> documents": lambda: decode_metric_batch(metrics_proto, "application/x-protobuf"),
+        },
+        {
+            "json -> models": len(metrics_json),
+            "json -> documents": len(metrics_json),
+            "msgpack -> documents": len(metrics_msgpack),
+            "protobuf -> documents": len(metrics_proto),
+        },
+        args.repeat,
+    )
+
+    logs = log_batch(args.batch)
+    logs_json = orjson.dumps(logs)
+    logs_msgpack = msgpack.packb(with_datetimes(logs, "logs"), datetime=True)
+    report(
+        "logs",
+        args.batch,
+        {
+            "json -> models": lambda: log_models(logs_json),
+            "json -> documents": lambda: decode_log_batch(logs_json, "application/json"),
+            "msgpack -> documents": lambda: decode_log_batch(logs_msgpack, "application/msgpack"),
+        },
+        {
+            "json -> models": len(logs_json),
+            "json -> documents": len(logs_json),
+            "msgpack -> documents": len(logs_msgpack),
+        },
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
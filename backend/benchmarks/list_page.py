@@ -0,0 +1,122 @@
+"""Latency of serving a 100-item list page, model path vs document path.
+
+Both routes run in one FastAPI app and are called over ASGI, so the
+numbers include routing and response rendering but not the database; the
+documents are built once up front the way Motor returns them.
+
+    cd backend
+    python -m benchmarks.list_page [--items 100] [--requests 2000]
+
+"model" is the previous path: ``Metric.from_mongo`` -> ``model_dump`` ->
+``MetricResponse.model_validate`` -> ``PaginatedResponse`` validated and
+serialised again through ``response_model``. "document" is the current
+path: projected documents rendered once by ``DocumentResponse``.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.responses import DocumentResponse, as_response, response_projection
+from app.models.metric import Metric
+from app.schemas.common import PaginatedResponse, page_fields
+from app.schemas.metric import MetricResponse
+
+
+def make_documents(count: int) -> List[Dict[str, Any]]:
+    """Metric documents as stored, with a few fields not in the response."""
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "name": "cpu_usage",
+            "metric_type": "cpu",
+            "value": 40.0 + i % 50,
+            "unit": "percent",
+            "source": f"node-{i % 8}",
+            "namespace": "default",
+            "cluster": "prod-eu-1",
+            "labels": {"host": f"node-{i % 8}", "zone": "eu-1a", "core": str(i % 4)},
+            "metadata": {"collector": "node-exporter", "interval": 15},
+            "timestamp": now - timedelta(seconds=15 * i),
+            "ingested_by": "api-1",
+        }
+        for i in range(count)
+    ]
+
+
+def build_app(documents: List[Dict[str, Any]]) -> FastAPI:
+    app = FastAPI()
+    projection = response_projection(MetricResponse)
+    total = len(documents) * 50
+
+    @app.get("/model", response_model=PaginatedResponse[MetricResponse])
+    async def model_page():
+        metrics = [Metric.from_mongo(dict(doc)) for doc in documents]
+        return PaginatedResponse.create(
+            items=[MetricResponse.model_validate(m.model_dump(by_alias=True)) for m in metrics],
+            total=total,
+            page=1,
+            page_size=len(documents),
+        )
+
+    @app.get("/document", response_model=PaginatedResponse[MetricResponse])
+    async def document_page():
+        # The projection runs in MongoDB; applying it here keeps the input equal
+        projected = [{k: v for k, v in doc.items() if k in projection} for doc in documents]
+        return DocumentResponse(
+            {
+                "items": as_response(projected, MetricResponse),
+                **page_fields(total, len(documents), page=1),
+            }
+        )
+
+    return app
+
+
+async def measure(client: AsyncClient, path: str, requests: int) -> List[float]:
+    for _ in range(min(requests, 100)):
+        await client.get(path)
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return latencies
+
+
+async def main(items: int, requests: int) -> None:
+    app = build_app(make_documents(items))
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        model, document = (await client.get("/model")).json(), (await client.get("/document")).json()
+        assert model == document, "document path must return the same body"
+
+        print(f"{items}-item page, {requests} requests per path (ms)")
+        print(f"{'path':<10}{'median':>10}{'p95':>10}{'mean':>10}")
+        results = {}
+        for path in ("model", "document"):
+            latencies = await measure(client, f"/{path}", requests)
+            results[path] = statistics.median(latencies)
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(
+                f"{path:<10}{results[path]:>10.3f}{p95:>10.3f}"
+                f"{statistics.fmean(latencies):>10.3f}"
+            )
+        print(f"median speed-up: {results['model'] / results['document']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.requests))
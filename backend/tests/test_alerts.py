@@ -82,6 +82,26 @@ class TestListAlerts:
         assert data["page"] == 1
         assert len(data["items"]) <= 5
 
+    async def test_list_alerts_keyset_cursor(self, async_client: AsyncClient):
+        for i in range(3):
+            await async_client.post(
+                "/api/v1/alerts", json={"title": f"Keyset {i}", "source": "keyset"}
+            )
+
+        response = await async_client.get("/api/v1/alerts?page_size=2")
+        assert response.status_code == 200
+        first = response.json()
+        assert len(first["items"]) == 2
+        assert first["next_cursor"] is not None
+
+        response = await async_client.get(
+            f"/api/v1/alerts?page_size=2&cursor={first['next_cursor']}"
+        )
+        second = response.json()
+        assert second["prev_cursor"] is not None
+        first_ids = {item["_id"] for item in first["items"]}
+        assert not first_ids & {item["_id"] for item in second["items"]}
+
 
 class TestGetAlert:
     async def test_get_alert_by_id(
@@ -204,6 +224,46 @@ class TestAlertStats:
         assert "by_severity" in data
         assert "by_source" in data
 
+    async def test_stats_follow_transitions(self, async_client: AsyncClient):
+        import uuid
+
+        source = f"counted-{uuid.uuid4().hex[:8]}"
+
+        async def stats():
+            return (await async_client.get("/api/v1/alerts/stats")).json()
+
+        before = await stats()
+        created = await async_client.post(
+            "/api/v1/alerts", json={"title": "Disk", "source": source, "severity": "critical"}
+        )
+        alert_id = created.json()["_id"]
+
+        after_create = await stats()
+        assert after_create["total_active"] == before["total_active"] + 1
+        assert after_create["by_severity"]["critical"] == before["by_severity"].get("critical", 0) + 1
+
+        await async_client.post(f"/api/v1/alerts/{alert_id}/resolve")
+        after_resolve = await stats()
+        assert after_resolve["total_active"] == before["total_active"]
+        assert after_resolve["total_resolved"] == before["total_resolved"] + 1
+
+        await async_client.delete(f"/api/v1/alerts/{alert_id}")
+        after_delete = await stats()
+        assert after_delete["total_resolved"] == before["total_resolved"]
+        assert after_delete["by_severity"].get("critical", 0) == before["by_severity"].get("critical", 0)
+        assert source not in after_delete["by_source"]
+
+    async def test_rebuild_counters_matches_collection(self, test_db):
+        from app.repositories.alert_repository import AlertRepository
+
+        repo = AlertRepository(test_db)
+        await repo.create_alert(title="Rebuilt", source="rebuild-test")
+        await test_db.alert_counters.update_one({"_id": "status:active"}, {"$inc": {"count": 1000}})
+
+        await repo.rebuild_counters()
+        stats = await repo.get_stats()
+        assert stats["total_active"] == await test_db.alerts.count_documents({"status": "active"})
+
 
 class TestAlertRules:
     async def test_create_alert_rule(
@@ -294,3 +354,26 @@ class TestAlertRules:
 
         get_response = await async_client.get(f"/api/v1/alerts/rules/{rule_id}")
         assert get_response.status_code == 404
+
+
+class TestAlertStatsCache:
+    async def test_stats_cached_and_invalidated(
+        self, async_client: AsyncClient, sample_alert_data: dict, monkeypatch
+    ):
+        import fakeredis
+
+        from app.core import cache
+
+        redis = fakeredis.FakeAsyncRedis()
+        monkeypatch.setattr(cache, "get_redis", lambda: redis)
+        monkeypatch.setattr(cache.settings, "response_cache_enabled", True)
+
+        first = (await async_client.get("/api/v1/alerts/stats")).json()
+        assert await redis.keys("cache:alert_stats:0:*")
+
+        created = await async_client.post("/api/v1/alerts", json=sample_alert_data)
+        assert created.status_code == 201
+        assert int(await redis.get("cache:alert_stats:version")) == 1
+
+        second = (await async_client.get("/api/v1/alerts/stats")).json()
+        assert second["total_active"] == first["total_active"] + 1
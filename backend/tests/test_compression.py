@@ -0,0 +1,136 @@
+"""Tests for compressed request and response bodies."""
+
+import gzip
+
+import orjson
+import pytest
+import zstandard
+from httpx import AsyncClient
+
+from app.core.compression import negotiate_encoding, settings
+
+pytestmark = pytest.mark.asyncio
+
+
+def log_batch(count: int) -> bytes:
+    logs = [{"message": f"request {i} served", "source": "gateway"} for i in range(count)]
+    return orjson.dumps({"logs": logs})
+
+
+class TestRequestDecompression:
+    @pytest.mark.parametrize(
+        "encoding,compress",
+        [("gzip", gzip.compress), ("zstd", zstandard.ZstdCompressor().compress)],
+    )
+    async def test_compressed_batch_accepted(self, async_client: AsyncClient, encoding, compress):
+        response = await async_client.post(
+            "/api/v1/logs/batch",
+            content=compress(log_batch(50)),
+            headers={"Content-Type": "application/json", "Content-Encoding": encoding},
+        )
+        assert response.status_code == 201
+        assert response.json()["accepted"] == 50
+
+    @pytest.mark.parametrize(
+        "encoding,compress",
+        [("gzip", gzip.compress), ("zstd", zstandard.ZstdCompressor().compress)],
+    )
+    async def test_decompressed_size_limit(
+        self, async_client: AsyncClient, monkeypatch, encoding, compress
+    ):
+        monkeypatch.setattr(settings, "request_max_decompressed_bytes", 1024)
+        response = await async_client.post(
+            "/api/v1/logs/batch",
+            content=compress(log_batch(100)),
+            headers={"Content-Type": "application/json", "Content-Encoding": encoding},
+        )
+        assert response.status_code == 413
+
+    async def test_corrupt_body(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/v1/logs/batch",
+            content=b"not gzip at all",
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize(
+        "encoding,compress",
+        [("gzip", gzip.compress), ("zstd", zstandard.ZstdCompressor().compress)],
+    )
+    async def test_concatenated_members_accepted(
+        self, async_client: AsyncClient, encoding, compress
+    ):
+        body = log_batch(20)
+        response = await async_client.post(
+            "/api/v1/logs/batch",
+            content=compress(body[:100]) + compress(body[100:]),
+            headers={"Content-Type": "application/json", "Content-Encoding": encoding},
+        )
+        assert response.status_code == 201
+        assert response.json()["accepted"] == 20
+
+    @pytest.mark.parametrize(
+        "encoding,content",
+        [
+            ("gzip", gzip.compress(log_batch(5))[:-4]),
+            ("zstd", zstandard.ZstdCompressor().compress(log_batch(5))[:-4]),
+            ("gzip", gzip.compress(log_batch(5)) + b"trailing"),
+        ],
+    )
+    async def test_truncated_or_trailing_body(self, async_client: AsyncClient, encoding, content):
+        response = await async_client.post(
+            "/api/v1/logs/batch",
+            content=content,
+            headers={"Content-Type": "application/json", "Content-Encoding": encoding},
+        )
+        assert response.status_code == 400
+
+    async def test_unsupported_encoding(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/v1/logs/batch",
+            content=log_batch(1),
+            headers={"Content-Type": "application/json", "Content-Encoding": "br"},
+        )
+        assert response.status_code == 415
+
+
+class TestResponseCompression:
+    async def test_large_response_compressed(self, async_client: AsyncClient):
+        await async_client.post(
+            "/api/v1/logs/batch",
+            content=log_batch(50),
+            headers={"Content-Type": "application/json"},
+        )
+        response = await async_client.get(
+            "/api/v1/logs?page_size=50", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(response.json()["items"]) == 50
+
+    async def test_zstd_preferred(self, async_client: AsyncClient):
+        response = await async_client.get(
+            "/openapi.json", headers={"Accept-Encoding": "gzip, zstd"}
+        )
+        assert response.headers["content-encoding"] == "zstd"
+
+    async def test_small_response_not_compressed(self, async_client: AsyncClient):
+        response = await async_client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"status": "healthy"}
+
+    @pytest.mark.parametrize(
+        "header,expected",
+        [
+            ("gzip, deflate, br, zstd", "zstd"),
+            ("gzip;q=1.0, zstd;q=0.5", "gzip"),
+            ("zstd;q=0, gzip", "gzip"),
+            ("*", "zstd"),
+            ("deflate, br", None),
+            ("", None),
+        ],
+    )
+    async def test_negotiate_encoding(self, header, expected):
+        assert negotiate_encoding(header) == expected
@@ -0,0 +1,54 @@
+"""Tests for the service concurrency helpers."""
+
+import asyncio
+
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.services.concurrency import gather
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestGather:
+    async def test_runs_concurrently_in_order(self):
+        started = []
+
+        async def call(name, delay):
+            started.append(name)
+            await asyncio.sleep(delay)
+            return name
+
+        results = await asyncio.wait_for(gather(call("a", 0.05), call("b", 0.01)), timeout=0.09)
+        assert results == ["a", "b"]
+        assert started == ["a", "b"]
+
+    async def test_failure_cancels_others(self):
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def fail():
+            raise ValidationError("bad query")
+
+        with pytest.raises(ValidationError):
+            await gather(slow(), fail())
+        assert cancelled.is_set()
+
+    async def test_failure_keeps_its_cause(self):
+        async def fail():
+            try:
+                raise KeyError("field")
+            except KeyError as e:
+                raise ValidationError("bad query") from e
+
+        with pytest.raises(ValidationError) as raised:
+            await gather(fail())
+        assert isinstance(raised.value.__cause__, KeyError)
+        assert not isinstance(raised.value.__context__, BaseExceptionGroup)
@@ -36,3 +36,10 @@ def test_liveness():
     response = client.get("/api/v1/health/live")
     assert response.status_code == 200
     assert response.json()["status"] == "alive"
+
+
+def test_prometheus_metrics():
+    """Test Prometheus metrics endpoint."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "infrawatch_singleflight_requests_total" in response.text
@@ -0,0 +1,118 @@
+"""Tests for MessagePack and protobuf batch ingest bodies."""
+
+from datetime import datetime, timezone
+
+import msgpack
+import pytest
+from httpx import AsyncClient
+from pydantic import TypeAdapter
+
+from app.proto import metrics_pb2
+from app.schemas.log import LogCreate, LogRecord
+from app.schemas.metric import MetricCreate, MetricRecord
+from app.utils.ingest_formats import decode_metric_batch
+
+pytestmark = pytest.mark.asyncio
+
+MSGPACK = {"Content-Type": "application/msgpack"}
+PROTOBUF = {"Content-Type": "application/x-protobuf"}
+
+
+def metric_proto_batch() -> bytes:
+    batch = metrics_pb2.MetricBatch(source="node-1", cluster="prod", labels={"zone": "a"})
+    batch.metrics.add(
+        name="cpu_usage",
+        metric_type=metrics_pb2.METRIC_TYPE_CPU,
+        value=42.5,
+        unit="percent",
+        labels={"core": "0"},
+        timestamp_ms=1_700_000_000_000,
+    )
+    batch.metrics.add(name="queue_depth", value=7, source="node-2")
+    return batch.SerializeToString()
+
+
+def field_schemas(schema: dict) -> tuple:
+    """Properties without defaults and required fields of a JSON schema."""
+    properties = {
+        name: {key: value for key, value in field.items() if key != "default"}
+        for name, field in schema["properties"].items()
+    }
+    return properties, sorted(schema.get("required", []))
+
+
+class TestRecordSchemas:
+    @pytest.mark.parametrize("record,model", [(MetricRecord, MetricCreate), (LogRecord, LogCreate)])
+    async def test_records_mirror_create_models(self, record, model):
+        # Same fields, types, constraints and required fields; defaults come from the model
+        assert field_schemas(TypeAdapter(record).json_schema()) == field_schemas(
+            model.model_json_schema()
+        )
+
+    async def test_protobuf_batch_documents(self):
+        first, second = decode_metric_batch(metric_proto_batch(), PROTOBUF["Content-Type"])
+        assert first == {
+            "name": "cpu_usage",
+            "metric_type": "cpu",
+            "value": 42.5,
+            "unit": "percent",
+            "source": "node-1",
+            "namespace": "default",
+            "cluster": "prod",
+            "labels": {"zone": "a", "core": "0"},
+            "metadata": {},
+            "timestamp": datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc),
+        }
+        assert second["source"] == "node-2"
+        assert second["metric_type"] == "custom"
+        assert second["unit"] is None
+        assert second["timestamp"].tzinfo is not None
+
+
+class TestBatchFormats:
+    async def test_msgpack_metric_batch(self, async_client: AsyncClient, sample_metric_data: dict):
+        metric = {**sample_metric_data, "timestamp": datetime.now(timezone.utc)}
+        body = msgpack.packb({"metrics": [metric, metric]}, datetime=True)
+        response = await async_client.post("/api/v1/metrics/batch", content=body, headers=MSGPACK)
+        assert response.status_code == 201
+        assert response.json()["accepted"] == 2
+
+    async def test_msgpack_log_batch(self, async_client: AsyncClient):
+        logs = [{"message": f"request {i} served", "source": "gateway"} for i in range(5)]
+        response = await async_client.post(
+            "/api/v1/logs/batch", content=msgpack.packb({"logs": logs}), headers=MSGPACK
+        )
+        assert response.status_code == 201
+        assert response.json()["accepted"] == 5
+
+        listed = await async_client.get("/api/v1/logs?source=gateway")
+        assert listed.json()["items"][0]["level"] == "info"
+
+    async def test_protobuf_metric_batch(self, async_client: AsyncClient):
+        response = await async_client.post(
+            "/api/v1/metrics/batch", content=metric_proto_batch(), headers=PROTOBUF
+        )
+        assert response.status_code == 201
+        assert response.json()["accepted"] == 2
+
+        listed = await async_client.get("/api/v1/metrics/source/node-1")
+        assert listed.json()[0]["labels"] == {"zone": "a", "core": "0"}
+
+    @pytest.mark.parametrize(
+        "path,headers",
+        [
+            ("/api/v1/metrics/batch", MSGPACK),
+            ("/api/v1/metrics/batch", PROTOBUF),
+            ("/api/v1/logs/batch", MSGPACK),
+            ("/api/v1/logs/batch", PROTOBUF),
+        ],
+    )
+    async def test_undecodable_body(self, async_client: AsyncClient, path, headers):
+        response = await async_client.post(path, content=b"\xc1\xff\x00", headers=headers)
+        assert response.status_code == 400
+
+    async def test_invalid_record(self, async_client: AsyncClient):
+        body = msgpack.packb({"metrics": [{"name": "cpu_usage", "source": "node-1"}]})
+        response = await async_client.post("/api/v1/metrics/batch", content=body, headers=MSGPACK)
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "metrics", 0, "value"]
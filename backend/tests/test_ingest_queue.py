@@ -0,0 +1,98 @@
+"""Tests for queued batch ingest."""
+
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import get_settings
+from app.core.exceptions import ExternalServiceError
+from app.services import log_service, metric_service
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Queue mode with publishing captured instead of sent to RabbitMQ."""
+    messages = []
+
+    async def publish_documents(queue, documents):
+        messages.append((queue, documents))
+
+    monkeypatch.setattr(get_settings(), "ingest_mode", "queue")
+    monkeypatch.setattr(metric_service, "publish_documents", publish_documents)
+    monkeypatch.setattr(log_service, "publish_documents", publish_documents)
+    return messages
+
+
+class TestQueuedIngest:
+    async def test_metric_batch_queued(
+        self, async_client: AsyncClient, sample_metric_data: dict, published
+    ):
+        import uuid
+
+        source = f"queued-{uuid.uuid4().hex[:8]}"
+        batch = {"metrics": [{**sample_metric_data, "source": source}] * 3}
+        response = await async_client.post("/api/v1/metrics/batch", json=batch)
+        assert response.status_code == 202
+        assert response.json()["accepted"] == 3
+
+        [(queue, documents)] = published
+        assert queue == get_settings().ingest_queue_metrics
+        assert len(documents) == 3
+        assert documents[0]["metric_type"] == sample_metric_data["metric_type"]
+        assert documents[0]["timestamp"] is not None
+        assert len({document["_id"] for document in documents}) == 3
+
+        listed = await async_client.get(f"/api/v1/metrics?source={source}")
+        assert listed.json()["total"] == 0
+
+    async def test_log_batch_queued(self, async_client: AsyncClient, published):
+        logs = [{"message": "queued", "source": "gateway"}] * 2
+        response = await async_client.post("/api/v1/logs/batch", json={"logs": logs})
+        assert response.status_code == 202
+        assert published[0][0] == get_settings().ingest_queue_logs
+
+    async def test_invalid_batch_not_queued(self, async_client: AsyncClient, published):
+        response = await async_client.post("/api/v1/metrics/batch", json={"metrics": [{}]})
+        assert response.status_code == 422
+        assert published == []
+
+    async def test_broker_unavailable(
+        self, async_client: AsyncClient, sample_metric_data: dict, monkeypatch
+    ):
+        async def publish_documents(queue, documents):
+            raise ExternalServiceError("rabbitmq", "ingest batch could not be queued")
+
+        monkeypatch.setattr(get_settings(), "ingest_mode", "queue")
+        monkeypatch.setattr(metric_service, "publish_documents", publish_documents)
+        response = await async_client.post(
+            "/api/v1/metrics/batch", json={"metrics": [sample_metric_data]}
+        )
+        assert response.status_code == 503
+
+    async def test_retry_after_failed_publish_keeps_ids(
+        self, async_client: AsyncClient, sample_metric_data: dict, monkeypatch
+    ):
+        attempts = []
+
+        async def publish_documents(queue, documents):
+            attempts.append([document["_id"] for document in documents])
+            if len(attempts) == 1:
+                raise ExternalServiceError("rabbitmq", "ingest batch could not be queued")
+
+        monkeypatch.setattr(get_settings(), "ingest_mode", "queue")
+        monkeypatch.setattr(metric_service, "publish_documents", publish_documents)
+        batch = {"metrics": [sample_metric_data] * 2}
+        headers = {"Idempotency-Key": "queued-retry"}
+        first = await async_client.post("/api/v1/metrics/batch", json=batch, headers=headers)
+        second = await async_client.post("/api/v1/metrics/batch", json=batch, headers=headers)
+
+        assert (first.status_code, second.status_code) == (503, 202)
+        assert attempts[0] == attempts[1]
+        assert len(set(attempts[0])) == 2
+        # Derived IDs keep a real creation time, as the migration's _id ranges expect
+        now = datetime.now(timezone.utc)
+        for id in attempts[0]:
+            assert abs((id.generation_time - now).total_seconds()) < 60
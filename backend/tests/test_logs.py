@@ -109,6 +109,47 @@ class TestListLogs:
         assert len(data["items"]) <= 3
 
 
+    async def test_list_logs_keyset_cursor(self, async_client: AsyncClient):
+        import uuid
+
+        source = f"keyset-{uuid.uuid4().hex[:8]}"
+        logs = [
+            {"level": "info", "message": f"line {i}", "source": source} for i in range(3)
+        ]
+        await async_client.post("/api/v1/logs/batch", json={"logs": logs})
+
+        response = await async_client.get(f"/api/v1/logs?source={source}&page_size=2")
+        first = response.json()
+        assert len(first["items"]) == 2
+        assert first["next_cursor"] is not None
+
+        response = await async_client.get(
+            f"/api/v1/logs?source={source}&page_size=2&cursor={first['next_cursor']}"
+        )
+        second = response.json()
+        assert len(second["items"]) == 1
+        assert second["next_cursor"] is None
+        assert second["prev_cursor"] is not None
+        seen = {item["_id"] for item in first["items"] + second["items"]}
+        assert len(seen) == 3
+
+    async def test_list_logs_items_match_model_serialisation(
+        self, async_client: AsyncClient, sample_log_data: dict
+    ):
+        import uuid
+
+        source = f"raw-{uuid.uuid4().hex[:8]}"
+        await async_client.post("/api/v1/logs", json={**sample_log_data, "source": source})
+        await async_client.post("/api/v1/logs", json={"message": "bare", "source": source})
+
+        response = await async_client.get(f"/api/v1/logs?source={source}")
+        items = response.json()["items"]
+        assert len(items) == 2
+        for item in items:
+            by_id = await async_client.get(f"/api/v1/logs/{item['_id']}")
+            assert item == by_id.json()
+
+
 class TestGetLog:
     async def test_get_log_by_id(
         self, async_client: AsyncClient, sample_log_data: dict
@@ -170,3 +211,166 @@ class TestBatchCreateLogs:
         response = await async_client.post("/api/v1/logs/batch", json=batch)
         assert response.status_code == 201
         assert "2" in response.json()["message"]
+
+
+class TestExportLogs:
+    async def test_export_logs_ndjson(self, async_client: AsyncClient):
+        import json
+        import uuid
+
+        source = f"export-{uuid.uuid4().hex[:8]}"
+        logs = [
+            {"level": "info", "message": f"line {i}", "source": source} for i in range(3)
+        ]
+        await async_client.post("/api/v1/logs/batch", json={"logs": logs})
+
+        response = await async_client.get(f"/api/v1/logs/export?source={source}")
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 3
+        assert all(row["source"] == source for row in rows)
+
+    async def test_export_logs_csv(self, async_client: AsyncClient):
+        import uuid
+
+        source = f"export-{uuid.uuid4().hex[:8]}"
+        await async_client.post(
+            "/api/v1/logs", json={"level": "error", "message": "boom, again", "source": source}
+        )
+
+        response = await async_client.get(f"/api/v1/logs/export?source={source}&format=csv")
+        assert response.status_code == 200
+        lines = response.text.splitlines()
+        assert lines[0].startswith("_id,timestamp,level,message")
+        assert len(lines) == 2
+        assert '"boom, again"' in lines[1]
+
+
+class TestLogCountModes:
+    async def test_count_none(self, async_client: AsyncClient, sample_log_data: dict):
+        await async_client.post("/api/v1/logs", json=sample_log_data)
+        response = await async_client.get("/api/v1/logs?count=none")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        assert len(data["items"]) >= 1
+
+    async def test_count_capped(self, async_client: AsyncClient, monkeypatch):
+        import uuid
+
+        from app.utils import counts
+
+        monkeypatch.setattr(counts.settings, "pagination_count_cap", 2)
+        source = f"capped-{uuid.uuid4().hex[:8]}"
+        logs = [{"level": "info", "message": f"m{i}", "source": source} for i in range(4)]
+        await async_client.post("/api/v1/logs/batch", json={"logs": logs})
+
+        response = await async_client.get(f"/api/v1/logs?source={source}&count=capped")
+        data = response.json()
+        assert data["total"] == 2
+        assert data["total_capped"] is True
+
+        response = await async_client.get(f"/api/v1/logs?source={source}&count=exact")
+        data = response.json()
+        assert data["total"] == 4
+        assert data["total_capped"] is False
+
+    async def test_count_estimated_unfiltered(self, async_client: AsyncClient):
+        response = await async_client.get("/api/v1/logs?count=estimated")
+        assert response.status_code == 200
+        assert isinstance(response.json()["total"], int)
+
+    async def test_count_invalid_mode(self, async_client: AsyncClient):
+        response = await async_client.get("/api/v1/logs?count=maybe")
+        assert response.status_code == 422
+
+
+class TestLogSearchModes:
+    async def _post(self, async_client: AsyncClient, source: str, messages):
+        logs = [{"level": "error", "message": m, "source": source} for m in messages]
+        await async_client.post("/api/v1/logs/batch", json={"logs": logs})
+
+    async def test_substring_search(self, async_client: AsyncClient):
+        import uuid
+
+        source = f"substr-{uuid.uuid4().hex[:8]}"
+        await self._post(async_client, source, [
+            "request req-7f3a9c failed from 10.0.12.7",
+            "request req-11aa00 succeeded",
+        ])
+
+        response = await async_client.get(
+            f"/api/v1/logs?source={source}&search=7F3A9&search_mode=substring"
+        )
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [item["message"] for item in items] == ["request req-7f3a9c failed from 10.0.12.7"]
+        assert "_trigrams" not in items[0]
+
+        response = await async_client.get(
+            f"/api/v1/logs?source={source}&search=10.0.12.&search_mode=substring"
+        )
+        assert response.json()["total"] == 1
+
+    async def test_regex_search(self, async_client: AsyncClient):
+        import uuid
+
+        source = f"regex-{uuid.uuid4().hex[:8]}"
+        await self._post(async_client, source, [
+            "Traceback: ValueError in handler",
+            "Traceback: KeyError in handler",
+            "ValueError handled",
+        ])
+
+        response = await async_client.get(
+            "/api/v1/logs",
+            params={"source": source, "search": r"^Traceback: \w+Error in", "search_mode": "regex"},
+        )
+        assert response.status_code == 200
+        assert response.json()["total"] == 2
+
+    async def test_long_message_verified(self, async_client: AsyncClient, monkeypatch):
+        import uuid
+
+        from app.repositories import log_repository
+
+        monkeypatch.setattr(log_repository.settings, "log_search_max_indexed_chars", 8)
+        source = f"long-{uuid.uuid4().hex[:8]}"
+        await self._post(async_client, source, ["prefix.. needle at the end"])
+
+        response = await async_client.get(
+            f"/api/v1/logs?source={source}&search=needle&search_mode=substring"
+        )
+        assert response.json()["total"] == 1
+
+    async def test_search_too_short(self, async_client: AsyncClient):
+        response = await async_client.get("/api/v1/logs?search=ab&search_mode=substring")
+        assert response.status_code == 400
+
+    async def test_regex_without_literal(self, async_client: AsyncClient):
+        response = await async_client.get(
+            "/api/v1/logs", params={"search": "(foo|bar)baz?", "search_mode": "regex"}
+        )
+        assert response.status_code == 400
+
+    async def test_invalid_regex(self, async_client: AsyncClient):
+        response = await async_client.get(
+            "/api/v1/logs/export", params={"search": "error(", "search_mode": "regex"}
+        )
+        assert response.status_code == 400
+
+    def test_required_literals(self):
+        from app.utils.ngrams import required_literals
+
+        assert required_literals(r"user=(\d+) failed") == ["user=", " failed"]
+        assert required_literals(r"(timeout)+ after \d+s") == ["timeout", " after ", "s"]
+        assert required_literals(r"a(bc|de)f?") == ["a"]
+        assert required_literals(r"\x41bc[de]fg{2,}\.h") == ["bc", "fg", ".h"]
+        assert required_literals(r"(?=abc)def(?P<n>ghi)(?:j|k)") == ["def", "ghi"]
+        assert required_literals(r"(?x) abc") == []
+
+    def test_query_grams_rarest_first(self):
+        from app.utils.ngrams import query_grams
+
+        assert query_grams(["the error 0x1f"], 8) == ["x1f", " 0x", "ror", "the", " er"]
+        assert query_grams(["the error 0x1f"], 2) == ["x1f", " 0x"]
@@ -107,6 +107,37 @@ class TestListMetrics:
         response = await async_client.get("/api/v1/metrics?page=0")
         assert response.status_code == 422
 
+    async def test_list_metrics_selected_fields(
+        self, async_client: AsyncClient, sample_metric_data: dict
+    ):
+        import uuid
+
+        source = f"fields-{uuid.uuid4().hex[:8]}"
+        for value in (1.0, 2.0, 3.0):
+            await async_client.post(
+                "/api/v1/metrics", json={**sample_metric_data, "source": source, "value": value}
+            )
+
+        response = await async_client.get(
+            f"/api/v1/metrics?source={source}&fields=value&page_size=2"
+        )
+        assert response.status_code == 200
+        first = response.json()
+        assert [set(item) for item in first["items"]] == [{"_id", "value"}] * 2
+        assert first["next_cursor"] is not None
+
+        response = await async_client.get(
+            f"/api/v1/metrics?source={source}&fields=value&page_size=2"
+            f"&cursor={first['next_cursor']}"
+        )
+        values = [item["value"] for item in first["items"] + response.json()["items"]]
+        assert sorted(values) == [1.0, 2.0, 3.0]
+
+    async def test_list_metrics_unknown_field(self, async_client: AsyncClient):
+        response = await async_client.get("/api/v1/metrics?fields=value,password")
+        assert response.status_code == 400
+        assert "password" in response.json()["detail"]
+
 
 class TestGetMetric:
     async def test_get_metric_by_id(
@@ -170,6 +201,19 @@ class TestMetricsBySource:
         assert response.status_code == 200
         assert isinstance(response.json(), list)
 
+    async def test_get_metrics_by_source_selected_fields(
+        self, async_client: AsyncClient, sample_metric_data: dict
+    ):
+        await async_client.post("/api/v1/metrics", json=sample_metric_data)
+
+        response = await async_client.get(
+            f"/api/v1/metrics/source/{sample_metric_data['source']}?fields=timestamp,value"
+        )
+        assert response.status_code == 200
+        items = response.json()
+        assert items
+        assert all(set(item) == {"_id", "timestamp", "value"} for item in items)
+
 
 class TestBatchCreate:
     async def test_create_batch(self, async_client: AsyncClient, sample_metric_data: dict):
@@ -178,7 +222,662 @@ class TestBatchCreate:
         assert response.status_code == 201
         assert "2" in response.json()["message"]
 
+    async def test_create_batch_reports_accepted(
+        self, async_client: AsyncClient, sample_metric_data: dict
+    ):
+        batch = {"metrics": [sample_metric_data] * 3}
+        response = await async_client.post("/api/v1/metrics/batch", json=batch)
+        assert response.status_code == 201
+        data = response.json()
+        assert data["accepted"] == 3
+        assert data["rejected"] == 0
+        assert data["errors"] == []
+
+    async def test_create_batch_continues_past_rejected_items(self, test_db):
+        from bson import ObjectId
+
+        from app.repositories.metric_repository import MetricRepository
+
+        duplicate_id = ObjectId()
+        docs = [
+            {"_id": duplicate_id, "name": "a", "value": 1.0, "source": "s"},
+            {"_id": duplicate_id, "name": "b", "value": 2.0, "source": "s"},
+            {"name": "c", "value": 3.0, "source": "s"},
+        ]
+        result = await MetricRepository(test_db).create_batch(docs)
+        assert result.accepted == 2
+        assert [e.index for e in result.errors] == [1]
+
+    async def test_create_batch_idempotent_replay(
+        self, async_client: AsyncClient, sample_metric_data: dict
+    ):
+        import uuid
+
+        source = f"idem-{uuid.uuid4().hex[:8]}"
+        batch = {"metrics": [{**sample_metric_data, "source": source}] * 2}
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+        first = await async_client.post("/api/v1/metrics/batch", json=batch, headers=headers)
+        second = await async_client.post("/api/v1/metrics/batch", json=batch, headers=headers)
+        assert first.status_code == 201
+        assert second.status_code == 201
+        assert second.headers.get("Idempotent-Replayed") == "true"
+        assert second.json() == first.json()
+
+        listed = await async_client.get(f"/api/v1/metrics?source={source}")
+        assert listed.json()["total"] == 2
+
+    async def test_idempotency_key_bound_to_body(
+        self, async_client: AsyncClient, sample_metric_data: dict
+    ):
+        import uuid
+
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        first = await async_client.post(
+            "/api/v1/metrics/batch", json={"metrics": [sample_metric_data]}, headers=headers
+        )
+        other = {"metrics": [{**sample_metric_data, "value": 1.0}]}
+        second = await async_client.post("/api/v1/metrics/batch", json=other, headers=headers)
+        assert first.status_code == 201
+        assert second.status_code == 422
+
+    async def test_redis_idempotency_key_expiring_before_get(self, monkeypatch):
+        import fakeredis
+        import orjson
+
+        from app.core import idempotency
+        from app.core.exceptions import ConflictError
+
+        class ExpiringRedis(fakeredis.FakeAsyncRedis):
+            expired = False
+
+            async def get(self, name):
+                if self.expired:
+                    return await super().get(name)
+                # The key expires after SET NX and another replica reserves it
+                self.expired = True
+                await self.set(name, orjson.dumps(["hash", None]))
+                return None
+
+        redis = ExpiringRedis()
+        await redis.set("key", b"taken")
+        monkeypatch.setattr(idempotency, "get_redis", lambda: redis)
+
+        store = idempotency.RedisIdempotencyStore(ttl_seconds=60)
+        with pytest.raises(ConflictError):
+            await store.begin("key", "hash")
+
+    async def test_bucketed_layout_round_trip(self, test_db):
+        import uuid
+        from datetime import datetime, timedelta, timezone
+
+        from app.repositories.metric_repository import MetricRepository
+        from app.schemas.metric import MetricQuery
+
+        repo = MetricRepository(test_db)
+        repo.layout = "buckets"
+        source = f"bucket-{uuid.uuid4().hex[:8]}"
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        for i in range(3):
+            await repo.create_metric(
+                name="cpu", value=float(i), source=source, metric_type="cpu",
+                timestamp=now - timedelta(minutes=i + 1),
+            )
+        latest = await repo.create_metric(
+            name="cpu", value=9.0, source=source, metric_type="cpu", timestamp=now
+        )
+        fetched = await repo.get_by_id(str(latest.id))
+        assert fetched is not None and fetched.value == 9.0
+
+        query = MetricQuery(source=source)
+        assert await repo.count_query(query) == 4
+        samples = await repo.query_metrics(query, limit=2)
+        assert len(samples) == 2
+        assert samples[0].value == 9.0
+
+    async def test_bucketed_layout_keeps_sample_metadata(self, test_db):
+        import uuid
+        from datetime import datetime, timedelta, timezone
+
+        from app.repositories.metric_repository import MetricRepository
+        from app.schemas.metric import MetricQuery
+
+        repo = MetricRepository(test_db)
+        repo.layout = "buckets"
+        source = f"bucket-meta-{uuid.uuid4().hex[:8]}"
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        first = await repo.create_metric(
+            name="cpu", value=1.0, source=source, metric_type="cpu",
+            timestamp=now - timedelta(minutes=1), metadata={"pod": "a"},
+        )
+        await repo.create_metric(
+            name="cpu", value=2.0, source=source, metric_type="cpu", timestamp=now,
+        )
+
+        fetched = await repo.get_by_id(str(first.id))
+        assert fetched is not None and fetched.metadata == {"pod": "a"}
+        samples = await repo.query_metrics(MetricQuery(source=source))
+        assert [sample.metadata for sample in samples] == [{}, {"pod": "a"}]
+
     async def test_create_empty_batch(self, async_client: AsyncClient):
         response = await async_client.post("/api/v1/metrics/batch", json={"metrics": []})
         # Empty batch: either 201 with 0 or 422 — both acceptable
         assert response.status_code in (201, 422)
+
+
+class TestTimeseriesLayout:
+    def test_document_round_trip(self):
+        from app.db.timeseries import from_timeseries_document, to_timeseries_document
+
+        sample = {"name": "cpu", "source": "node-1", "namespace": "default",
+                  "cluster": "default", "labels": {"zone": "a"}, "value": 1.5}
+        document = to_timeseries_document(sample)
+        assert document["meta"]["labels"] == {"zone": "a"}
+        assert "source" not in document
+        assert from_timeseries_document(document) == sample
+
+    def test_filter_addresses_meta_fields(self):
+        from app.db.timeseries import timeseries_filter
+
+        assert timeseries_filter(
+            {"source": "a", "labels.zone": "b", "metric_type": "cpu"}
+        ) == {"meta.source": "a", "meta.labels.zone": "b", "metric_type": "cpu"}
+
+    async def test_repository_round_trip(self, mongo_client):
+        from datetime import datetime, timezone
+
+        from bson import ObjectId
+
+        from app.repositories.metric_repository import MetricRepository
+        from app.schemas.metric import MetricQuery
+
+        db = mongo_client["infrawatch_test_timeseries"]
+        repo = MetricRepository(db)
+        repo.layout = "timeseries"
+        try:
+            now = datetime.now(timezone.utc).replace(microsecond=0)
+            created = await repo.create_metric(
+                name="cpu", value=2.0, source="ts-node", metric_type="cpu", timestamp=now
+            )
+            result = await repo.create_batch(
+                [{"name": "cpu", "value": 4.0, "source": "ts-node", "metric_type": "cpu"}]
+            )
+            assert result.accepted == 1
+
+            stored = await db.metrics.find_one({"_id": ObjectId(created.id)})
+            assert stored["meta"]["source"] == "ts-node"
+
+            fetched = await repo.get_by_id(created.id)
+            assert fetched.source == "ts-node" and fetched.value == 2.0
+
+            query = MetricQuery(source="ts-node")
+            assert await repo.count_query(query) == 2
+            samples = await repo.query_metrics(query)
+            assert [m.value for m in samples] == [4.0, 2.0]
+            assert samples[0].name == "cpu"
+        finally:
+            await mongo_client.drop_database("infrawatch_test_timeseries")
+
+    async def test_migration_chunks_spare_live_samples(self, test_db):
+        import uuid
+
+        from bson import ObjectId
+
+        from app.db.migrate_timeseries import copy_chunk, plan_chunks
+
+        suffix = uuid.uuid4().hex[:8]
+        source, target = test_db[f"legacy_{suffix}"], test_db[f"timeseries_{suffix}"]
+        legacy = [{"_id": ObjectId(), "name": "cpu", "value": i} for i in range(3)]
+        await source.insert_many(legacy)
+        live = {"_id": ObjectId(), "value": 9.0, "meta": {"name": "cpu"}}
+        await target.insert_one(live)
+
+        boundaries, last_id = await plan_chunks(source, chunk_size=2)
+        assert boundaries == [legacy[0]["_id"], legacy[2]["_id"]]
+        assert last_id == legacy[2]["_id"]
+
+        # The last chunk, copied twice as after an interrupted run
+        for _ in range(2):
+            copied, _ = await copy_chunk(
+                source, target, boundaries[1], last_id, inclusive=True
+            )
+            assert copied == 1
+        assert await target.find_one({"_id": live["_id"]}) is not None
+        assert await target.count_documents({}) == 2
+
+    async def test_ttl_change_modifies_existing_index(self, test_db):
+        import uuid
+
+        from app.db.indexes import set_ttl
+
+        class RecordingDb:
+            def __init__(self):
+                self.commands = []
+
+            def __getitem__(self, name):
+                return test_db[name]
+
+            async def command(self, *args, **kwargs):
+                self.commands.append((args, kwargs))
+
+        name = f"ttl_{uuid.uuid4().hex[:8]}"
+        await test_db[name].create_index("timestamp", expireAfterSeconds=604800, name="timestamp_1")
+        db = RecordingDb()
+        await set_ttl(db, name, "timestamp_1", 604800)
+        await set_ttl(db, name, "missing_1", 60)
+        assert db.commands == []
+
+        await set_ttl(db, name, "timestamp_1", 86400)
+        assert db.commands == [
+            (("collMod", name), {"index": {"name": "timestamp_1", "expireAfterSeconds": 86400}})
+        ]
+
+
+class TestStreamIngest:
+    async def test_stream_ingest_chunks(
+        self, async_client: AsyncClient, sample_metric_data: dict
+    ):
+        import json
+
+        lines = [json.dumps({**sample_metric_data, "value": float(i)}) for i in range(5)]
+        lines.insert(2, "{not json")
+        response = await async_client.post(
+            "/api/v1/metrics/stream?chunk_size=3",
+            content="\n".join(lines) + "\n",
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["accepted"] == 5
+        assert data["rejected"] == 1
+        assert len(data["chunks"]) == 2
+        assert data["chunks"][0]["errors"][0]["line"] == 3
+
+    async def test_stream_ingest_rejects_invalid_records(self, async_client: AsyncClient):
+        body = '{"name": "cpu_usage"}\n\n{"name": "x", "value": "high", "source": "h"}\n'
+        response = await async_client.post("/api/v1/metrics/stream", content=body)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["accepted"] == 0
+        assert data["rejected"] == 2
+        assert [e["line"] for e in data["chunks"][0]["errors"]] == [1, 3]
+
+
+class TestSeriesCatalog:
+    async def test_catalog_lists_names_and_labels(
+        self, async_client: AsyncClient, sample_metric_data: dict
+    ):
+        import uuid
+
+        name = f"catalog_{uuid.uuid4().hex[:8]}"
+        batch = {
+            "metrics": [
+                {**sample_metric_data, "name": name, "source": "node-a", "labels": {"zone": "a"}},
+                {**sample_metric_data, "name": name, "source": "node-b", "labels": {"zone": "b"}},
+                {**sample_metric_data, "name": name, "source": "node-b", "labels": {"zone": "b"}},
+            ]
+        }
+        response = await async_client.post("/api/v1/metrics/batch", json=batch)
+        assert response.status_code == 201
+
+        names = await async_client.get(f"/api/v1/metrics/names?prefix={name[:12]}")
+        assert names.json() == [name]
+
+        keys = await async_client.get(f"/api/v1/metrics/labels?name={name}")
+        assert "zone" in keys.json()
+        assert "source" in keys.json()
+
+        zones = await async_client.get(f"/api/v1/metrics/labels/zone/values?name={name}")
+        assert zones.json() == ["a", "b"]
+        sources = await async_client.get(f"/api/v1/metrics/labels/source/values?name={name}")
+        assert sources.json() == ["node-a", "node-b"]
+
+    @pytest.mark.parametrize("key", ["$where", "zone.inner"])
+    async def test_label_values_reject_field_paths(self, async_client: AsyncClient, key):
+        response = await async_client.get(f"/api/v1/metrics/labels/{key}/values")
+        assert response.status_code == 400
+
+    async def test_record_skips_recently_seen_series(self, test_db):
+        from datetime import datetime, timezone
+
+        from app.repositories.series_repository import SeriesRepository
+
+        repo = SeriesRepository(test_db)
+        sample = {"name": "catalog_cached", "source": "s", "labels": {},
+                  "timestamp": datetime.now(timezone.utc)}
+        assert await repo.record([sample]) == 1
+        assert await repo.record([sample]) == 0
+
+
+class TestRollups:
+    def test_choose_resolution(self, monkeypatch):
+        from datetime import datetime, timedelta, timezone
+
+        from app.utils import rollups
+
+        monkeypatch.setattr(rollups.settings, "rollups_enabled", True)
+        now = datetime(2024, 1, 8, tzinfo=timezone.utc)
+
+        assert rollups.choose_resolution(None, now=now) is None
+        assert rollups.choose_resolution(now - timedelta(hours=1), now=now) is None
+        assert rollups.choose_resolution(now - timedelta(hours=12), now=now) == "1m"
+        assert rollups.choose_resolution(now - timedelta(days=7), now=now) == "5m"
+        assert rollups.choose_resolution(now - timedelta(days=60), now=now) == "1h"
+
+        monkeypatch.setattr(rollups.settings, "rollups_enabled", False)
+        assert rollups.choose_resolution(now - timedelta(days=7), now=now) is None
+
+    async def test_query_reads_rollups(self, async_client: AsyncClient, test_db):
+        import uuid
+        from datetime import datetime, timedelta, timezone
+
+        source = f"rollup-{uuid.uuid4().hex[:8]}"
+        window = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        await test_db.metrics_rollup_5m.insert_one({
+            "_id": f"{source}:0",
+            "series_key": source,
+            "name": "cpu_usage",
+            "metric_type": "cpu",
+            "source": source,
+            "namespace": "default",
+            "cluster": "default",
+            "labels": {},
+            "timestamp": window,
+            "count": 4, "sum": 10.0, "min": 1.0, "max": 4.0, "avg": 2.5,
+        })
+        await test_db.checkpoints.update_one(
+            {"_id": "rollup_5m"},
+            {"$set": {"position": window + timedelta(minutes=5)}},
+            upsert=True,
+        )
+        try:
+            response = await async_client.get(
+                f"/api/v1/metrics?source={source}&resolution=5m"
+            )
+        finally:
+            await test_db.checkpoints.delete_one({"_id": "rollup_5m"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        item = data["items"][0]
+        assert item["value"] == 2.5
+        assert item["metadata"] == {"resolution": "5m", "count": 4, "min": 1.0, "max": 4.0}
+
+    async def test_windows_past_checkpoint_read_raw(self, async_client: AsyncClient, test_db):
+        import uuid
+        from datetime import datetime, timedelta, timezone
+
+        source = f"rollup-{uuid.uuid4().hex[:8]}"
+        window = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        checkpoint = window + timedelta(minutes=5)
+        await test_db.metrics_rollup_5m.insert_one({
+            "_id": f"{source}:0",
+            "series_key": source,
+            "name": "cpu_usage",
+            "metric_type": "cpu",
+            "source": source,
+            "namespace": "default",
+            "cluster": "default",
+            "labels": {},
+            "timestamp": window,
+            "count": 4, "sum": 10.0, "min": 1.0, "max": 4.0, "avg": 2.5,
+        })
+        metrics = [
+            {"name": "cpu_usage", "metric_type": "cpu", "value": value, "source": source,
+             "timestamp": (checkpoint + timedelta(minutes=minute)).isoformat()}
+            for minute, value in ((1, 6.0), (2, 8.0))
+        ]
+        await async_client.post("/api/v1/metrics/batch", json={"metrics": metrics})
+        await test_db.checkpoints.update_one(
+            {"_id": "rollup_5m"}, {"$set": {"position": checkpoint}}, upsert=True
+        )
+        try:
+            listed = await async_client.get(f"/api/v1/metrics?source={source}&resolution=5m")
+            aggregated = await async_client.get(
+                f"/api/v1/metrics/aggregations?source={source}&resolution=5m"
+            )
+        finally:
+            await test_db.checkpoints.delete_one({"_id": "rollup_5m"})
+
+        data = listed.json()
+        assert data["total"] == 2
+        recent, stored = data["items"]
+        assert recent["value"] == 7.0
+        assert recent["metadata"] == {"resolution": "5m", "count": 2, "min": 6.0, "max": 8.0}
+        assert stored["value"] == 2.5
+
+        [row] = aggregated.json()
+        assert row["count"] == 6
+        assert row["avg_value"] == 4.0
+        assert (row["min_value"], row["max_value"]) == (1.0, 8.0)
+
+
+class TestRangeQuery:
+    async def test_range_buckets_by_step(self, async_client: AsyncClient):
+        import uuid
+        from datetime import datetime, timedelta, timezone
+
+        name = f"range_{uuid.uuid4().hex[:8]}"
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        metrics = [
+            {"name": name, "value": float(i), "source": "node-1",
+             "timestamp": (start + timedelta(seconds=30 * i)).isoformat()}
+            for i in range(6)
+        ]
+        response = await async_client.post("/api/v1/metrics/batch", json={"metrics": metrics})
+        assert response.status_code == 201
+
+        response = await async_client.get(
+            "/api/v1/metrics/range",
+            params={
+                "name": name,
+                "start": start.isoformat(),
+                "end": (start + timedelta(minutes=3)).isoformat(),
+                "step": "1m",
+                "agg": "max",
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["resolution"] == "raw"
+        assert len(data["series"]) == 1
+        epoch = int(start.timestamp())
+        assert data["series"][0]["points"] == [
+            [epoch, 1.0], [epoch + 60, 3.0], [epoch + 120, 5.0]
+        ]
+
+    async def test_range_buckets_past_checkpoint_read_raw(
+        self, async_client: AsyncClient, test_db
+    ):
+        import uuid
+        from datetime import datetime, timedelta, timezone
+
+        name = f"range_{uuid.uuid4().hex[:8]}"
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        checkpoint = start + timedelta(minutes=10)
+        await test_db.metrics_rollup_5m.insert_one({
+            "_id": f"{name}:0",
+            "series_key": name,
+            "name": name,
+            "metric_type": "cpu",
+            "source": "node-1",
+            "namespace": "default",
+            "cluster": "default",
+            "labels": {},
+            "timestamp": start + timedelta(minutes=5),
+            "count": 2, "sum": 4.0, "min": 1.0, "max": 3.0, "avg": 2.0,
+        })
+        metrics = [
+            {"name": name, "metric_type": "cpu", "value": value, "source": "node-1",
+             "timestamp": (checkpoint + timedelta(minutes=minute)).isoformat()}
+            for minute, value in ((1, 5.0), (2, 7.0))
+        ]
+        await async_client.post("/api/v1/metrics/batch", json={"metrics": metrics})
+        await test_db.checkpoints.update_one(
+            {"_id": "rollup_5m"}, {"$set": {"position": checkpoint}}, upsert=True
+        )
+        try:
+            response = await async_client.get(
+                "/api/v1/metrics/range",
+                params={
+                    "name": name,
+                    "start": start.isoformat(),
+                    "end": (start + timedelta(minutes=20)).isoformat(),
+                    "step": "10m",
+                    "resolution": "5m",
+                },
+            )
+        finally:
+            await test_db.checkpoints.delete_one({"_id": "rollup_5m"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["resolution"] == "5m"
+        epoch = int(start.timestamp())
+        assert data["series"][0]["points"] == [[epoch, 2.0], [epoch + 600, 6.0]]
+
+    async def test_range_rejects_too_many_steps(self, async_client: AsyncClient):
+        response = await async_client.get(
+            "/api/v1/metrics/range",
+            params={"name": "cpu", "start": "2024-01-01T00:00:00Z",
+                    "end": "2024-12-31T00:00:00Z", "step": "1s"},
+        )
+        assert response.status_code == 400
+
+
+class TestPercentiles:
+    async def test_numpy_percentiles(self, async_client: AsyncClient):
+        import uuid
+
+        source = f"pct-{uuid.uuid4().hex[:8]}"
+        metrics = [
+            {"name": "latency", "metric_type": "custom", "value": float(v), "source": source}
+            for v in range(1, 101)
+        ]
+        response = await async_client.post("/api/v1/metrics/batch", json={"metrics": metrics})
+        assert response.status_code == 201
+
+        response = await async_client.get(
+            f"/api/v1/metrics/aggregations?source={source}&percentiles=numpy"
+        )
+        assert response.status_code == 200
+        (agg,) = response.json()
+        assert agg["count"] == 100
+        assert agg["min_value"] == 1.0 and agg["max_value"] == 100.0
+        assert agg["p50"] == 50.5
+        assert agg["p99"] == 99.01
+
+    async def test_histogram(self, async_client: AsyncClient):
+        import uuid
+
+        name = f"hist_{uuid.uuid4().hex[:8]}"
+        metrics = [
+            {"name": name, "value": float(v), "source": "node-1"} for v in (0, 1, 2, 3, 10)
+        ]
+        await async_client.post("/api/v1/metrics/batch", json={"metrics": metrics})
+
+        response = await async_client.get(f"/api/v1/metrics/histogram?name={name}&bins=2")
+        assert response.status_code == 200
+        (hist,) = response.json()
+        assert hist["edges"] == [0.0, 5.0, 10.0]
+        assert hist["counts"] == [4, 1]
+
+
+class TestExport:
+    async def test_export_ndjson(self, async_client: AsyncClient):
+        import json
+        import uuid
+
+        source = f"export-{uuid.uuid4().hex[:8]}"
+        metrics = [
+            {"name": "cpu_usage", "value": float(v), "source": source} for v in range(5)
+        ]
+        await async_client.post("/api/v1/metrics/batch", json={"metrics": metrics})
+
+        response = await async_client.get(f"/api/v1/metrics/export?source={source}")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 5
+        assert all(row["source"] == source for row in rows)
+        assert isinstance(rows[0]["_id"], str)
+
+    async def test_export_csv(self, async_client: AsyncClient):
+        import csv
+        import io
+        import uuid
+
+        source = f"export-{uuid.uuid4().hex[:8]}"
+        metrics = [
+            {"name": "mem", "value": 1.5, "source": source, "labels": {"pod": "a"}},
+            {"name": "mem", "value": 2.5, "source": source},
+        ]
+        await async_client.post("/api/v1/metrics/batch", json={"metrics": metrics})
+
+        response = await async_client.get(f"/api/v1/metrics/export?source={source}&format=csv")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["value"] for row in rows] == ["1.5", "2.5"]
+        assert rows[0]["labels"] == '{"pod":"a"}'
+        assert {row["source"] for row in rows} == {source}
+
+    async def test_export_invalid_format(self, async_client: AsyncClient):
+        response = await async_client.get("/api/v1/metrics/export?format=xml")
+        assert response.status_code == 422
+
+
+class TestKeysetPagination:
+    async def test_walk_pages_with_cursors(self, async_client: AsyncClient):
+        import uuid
+
+        source = f"keyset-{uuid.uuid4().hex[:8]}"
+        # Two samples share a timestamp so the _id tiebreak is exercised
+        timestamps = [
+            "2024-01-01T00:00:00Z",
+            "2024-01-01T00:01:00Z",
+            "2024-01-01T00:01:00Z",
+            "2024-01-01T00:02:00Z",
+            "2024-01-01T00:03:00Z",
+        ]
+        metrics = [
+            {"name": "cpu_usage", "value": float(i), "source": source, "timestamp": ts}
+            for i, ts in enumerate(timestamps)
+        ]
+        await async_client.post("/api/v1/metrics/batch", json={"metrics": metrics})
+
+        pages = []
+        url = f"/api/v1/metrics?source={source}&page_size=2"
+        cursor = None
+        while True:
+            response = await async_client.get(url + (f"&cursor={cursor}" if cursor else ""))
+            assert response.status_code == 200
+            data = response.json()
+            assert data["page"] is None
+            pages.append(data)
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        ids = [item["_id"] for page in pages for item in page["items"]]
+        assert [len(page["items"]) for page in pages] == [2, 2, 1]
+        assert len(set(ids)) == 5
+        stamps = [item["timestamp"] for page in pages for item in page["items"]]
+        assert stamps == sorted(stamps, reverse=True)
+        assert pages[0]["prev_cursor"] is None
+
+        response = await async_client.get(url + f"&cursor={pages[1]['prev_cursor']}")
+        data = response.json()
+        assert [item["_id"] for item in data["items"]] == [
+            item["_id"] for item in pages[0]["items"]
+        ]
+        assert data["prev_cursor"] is None
+        assert data["next_cursor"] is not None
+
+    async def test_invalid_cursor(self, async_client: AsyncClient):
+        response = await async_client.get("/api/v1/metrics?cursor=not-a-cursor")
+        assert response.status_code == 400
+
+    async def test_page_and_cursor_conflict(self, async_client: AsyncClient):
+        response = await async_client.get("/api/v1/metrics?page=1&cursor=abc")
+        assert response.status_code == 400
@@ -0,0 +1,62 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SINGLEFLIGHT_REQUESTS, SingleFlight
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def _count(group: str, result: str) -> float:
+    return SINGLEFLIGHT_REQUESTS.labels(group, result)._value.get()
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_read(self):
+        flights = SingleFlight("test_share")
+        calls = 0
+
+        async def read():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"total": 42}
+
+        results = await asyncio.gather(*(flights.do("stats", read) for _ in range(10)))
+        assert calls == 1
+        assert all(r == {"total": 42} for r in results)
+        assert _count("test_share", "leader") == 1
+        assert _count("test_share", "coalesced") == 9
+
+        # Once finished, the next call reads again
+        await flights.do("stats", read)
+        assert calls == 2
+
+    async def test_errors_are_shared(self):
+        flights = SingleFlight("test_errors")
+
+        async def read():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flights.do("k", read), flights.do("k", read), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        flights = SingleFlight("test_cancel")
+
+        async def read():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flights.do("k", read))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("k", read))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "done"
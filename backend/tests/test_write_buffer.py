@@ -0,0 +1,83 @@
+"""Tests for the coalescing write buffer."""
+
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from app.db.write_buffer import WriteBuffer
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeCollection:
+    name = "fake"
+    full_name = "test.fake"
+
+    def __init__(self, fail_index=None):
+        self.batches = []
+        self.fail_index = fail_index
+
+    async def insert_many(self, documents, ordered=True):
+        self.batches.append(list(documents))
+        if self.fail_index is not None:
+            raise BulkWriteError(
+                {"writeErrors": [{"index": self.fail_index, "code": 11000, "errmsg": "dup"}]}
+            )
+
+
+class TestWriteBuffer:
+    async def test_coalesces_concurrent_inserts(self):
+        collection = FakeCollection()
+        buffer = WriteBuffer(collection, max_batch_size=100, max_linger_ms=20, min_batch_size=50)
+
+        ids = await asyncio.gather(*(buffer.insert({"value": i}) for i in range(20)))
+        await buffer.close()
+
+        assert len(set(ids)) == 20
+        assert len(collection.batches) == 1
+        assert [d["_id"] for d in collection.batches[0]] == ids
+
+    async def test_flushes_at_batch_size(self):
+        collection = FakeCollection()
+        buffer = WriteBuffer(collection, max_batch_size=10, max_linger_ms=1000, min_batch_size=10)
+
+        await asyncio.wait_for(
+            asyncio.gather(*(buffer.insert({"value": i}) for i in range(10))), timeout=0.5
+        )
+        await buffer.close()
+
+        assert len(collection.batches) == 1
+
+    async def test_failed_item_raises_only_for_its_caller(self):
+        collection = FakeCollection(fail_index=1)
+        buffer = WriteBuffer(collection, max_linger_ms=20)
+
+        results = await asyncio.gather(
+            *(buffer.insert({"value": i}) for i in range(3)), return_exceptions=True
+        )
+        await buffer.close()
+
+        assert isinstance(results[1], BulkWriteError)
+        assert not isinstance(results[0], Exception)
+        assert not isinstance(results[2], Exception)
+
+    async def test_close_drains_pending(self):
+        collection = FakeCollection()
+        buffer = WriteBuffer(collection, max_batch_size=100, max_linger_ms=10000)
+
+        pending = asyncio.ensure_future(buffer.insert({"value": 1}))
+        await asyncio.sleep(0)
+        await buffer.close()
+
+        await pending
+        assert len(collection.batches) == 1
+
+    async def test_batch_size_shrinks_when_slow(self):
+        buffer = WriteBuffer(FakeCollection(), max_batch_size=400, min_batch_size=16)
+        buffer.batch_size = 400
+        buffer._adapt(latency=1.0, size=400)
+        assert buffer.batch_size == 200
+        buffer._adapt(latency=0.001, size=200)
+        assert buffer.batch_size == 216
@@ -6,9 +6,12 @@ export * from './alert'
 export interface PaginatedResponse<T> {
   items: T[]
   total: number
+  total_capped?: boolean
   page: number
   page_size: number
   total_pages: number
+  next_cursor?: string | null
+  prev_cursor?: string | null
 }
 
 export interface ApiError {
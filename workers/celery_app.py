@@ -13,6 +13,7 @@ app = Celery(
     backend=settings.celery_result_backend,
     include=[
         "tasks.metrics_tasks",
+        "tasks.rollup_tasks",
         "tasks.alerts_tasks",
         "tasks.logs_tasks",
         "tasks.cleanup_tasks",
@@ -40,11 +41,32 @@ app.conf.beat_schedule = {
         "task": "tasks.metrics_tasks.process_metrics",
         "schedule": 30.0,
     },
+    # Roll metrics up into 1m/5m/1h resolutions
+    "rollup-metrics-1m": {
+        "task": "tasks.rollup_tasks.rollup_metrics",
+        "schedule": 60.0,
+        "args": ("1m",),
+    },
+    "rollup-metrics-5m": {
+        "task": "tasks.rollup_tasks.rollup_metrics",
+        "schedule": 300.0,
+        "args": ("5m",),
+    },
+    "rollup-metrics-1h": {
+        "task": "tasks.rollup_tasks.rollup_metrics",
+        "schedule": 3600.0,
+        "args": ("1h",),
+    },
     # Check alerts every minute
     "check-alerts": {
         "task": "tasks.alerts_tasks.check_alert_rules",
         "schedule": 60.0,
     },
+    # Correct drift in the incrementally maintained alert counters
+    "reconcile-alert-counters": {
+        "task": "tasks.alerts_tasks.reconcile_alert_counters",
+        "schedule": 900.0,
+    },
     # Aggregate logs every 5 minutes
     "aggregate-logs": {
         "task": "tasks.logs_tasks.aggregate_logs",
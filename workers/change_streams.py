@@ -0,0 +1,267 @@
+"""Change stream consumer feeding incremental worker handlers.
+
+Tails the ``metrics``, ``logs``, ``alerts`` and ``alert_rules`` collections
+through one database change stream. Events are gathered for up to
+``change_stream_batch_ms`` and passed to the handlers of their collection;
+the stream's resume token is then stored in the checkpoints collection, so
+a restart continues after the last handled batch. A batch interrupted by
+a database error is seen again: the rollup and alert handlers repeat
+idempotently, the log counters may count it twice. Other handler errors,
+such as a malformed document, are logged and the batch is skipped for
+that handler.
+
+MongoDB only offers change streams on replica sets; a single-node replica
+set is enough (see docs/development-guide.md).
+
+    python change_streams.py
+"""
+
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure, PyMongoError
+
+import celery_app  # noqa: F401  (binds the shared tasks to the configured app)
+from config import get_settings
+from tasks.alerts_tasks import evaluate_rule
+from tasks.rollup_tasks import RESOLUTIONS, align, rollup_range
+from utils.cache import ALERT_STATS, invalidate
+from utils.checkpoints import get_checkpoint, get_resume_token, set_resume_token
+from utils.log_counters import count_logs
+
+logger = logging.getLogger("change_streams")
+settings = get_settings()
+
+RESUME_TOKEN = "change_streams"
+# Resume tokens of an idle stream are stored at most this often
+IDLE_TOKEN_SECONDS = 10.0
+# Server error when the resume token has left the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+RETRY_SECONDS = 5
+
+Event = Dict[str, Any]
+
+
+def inserted(events: List[Event]) -> List[Dict[str, Any]]:
+    """Documents of the insert events."""
+    return [event["fullDocument"] for event in events if event["operationType"] == "insert"]
+
+
+class Handler:
+    """Incremental processing of the changes to some collections."""
+
+    collections: Tuple[str, ...] = ()
+
+    def handle(self, db, collection: str, events: List[Event]) -> None:
+        raise NotImplementedError
+
+
+class LateRollupHandler(Handler):
+    """Roll up again the closed windows late metric samples fall into.
+
+    The rollup tasks only roll up windows older than the lateness
+    allowance, once; a sample arriving after that used to be missing from
+    its rollups. Rolling a window up again replaces its documents.
+    """
+
+    collections = ("metrics",)
+
+    def handle(self, db, collection: str, events: List[Event]) -> None:
+        late = {sample["timestamp"] for sample in inserted(events)}
+        for resolution, (seconds, _, _) in RESOLUTIONS.items():
+            done = get_checkpoint(db, f"rollup_{resolution}")
+            if done is None:
+                # This resolution has not been rolled up yet; others may have
+                continue
+            windows = {align(timestamp, seconds) for timestamp in late}
+            windows = sorted(window for window in windows if window < done)
+            for start in windows:
+                rollup_range(db, resolution, start, start + timedelta(seconds=seconds))
+            if windows:
+                logger.info("Rolled up %d late %s windows again", len(windows), resolution)
+
+
+class AlertRuleHandler(Handler):
+    """Evaluate the alert rules of metrics as their samples arrive.
+
+    Enabled rules are cached and reloaded when ``alert_rules`` changes. A
+    rule is evaluated at most once per ``min_interval`` seconds; its
+    cooldown still applies. The scheduled ``check_alert_rules`` task keeps
+    covering rules whose metrics stop reporting.
+    """
+
+    collections = ("metrics", "alert_rules")
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.rules: Optional[List[Dict[str, Any]]] = None
+        self.evaluated_at: Dict[Any, float] = {}
+
+    def handle(self, db, collection: str, events: List[Event]) -> None:
+        if collection == "alert_rules" or self.rules is None:
+            self.rules = list(db.alert_rules.find({"enabled": True}))
+        if collection != "metrics":
+            return
+
+        names = {sample["name"] for sample in inserted(events)}
+        now = time.monotonic()
+        for rule in self.rules:
+            metrics = {condition.get("metric_name") for condition in rule.get("conditions", [])}
+            if not metrics & names:
+                continue
+            if now - self.evaluated_at.get(rule["_id"], float("-inf")) < self.min_interval:
+                continue
+            self.evaluated_at[rule["_id"]] = now
+            try:
+                if evaluate_rule(db, rule):
+                    logger.info("Alert rule %s triggered", rule.get("name"))
+            except PyMongoError:
+                raise
+            except Exception as e:
+                logger.error("Error evaluating rule %s: %s", rule.get("name"), e)
+
+
+class LogCountersHandler(Handler):
+    """Count inserted logs per minute for ``aggregate_logs``."""
+
+    collections = ("logs",)
+
+    def handle(self, db, collection: str, events: List[Event]) -> None:
+        logs = inserted(events)
+        if logs:
+            count_logs(db, logs)
+
+
+class AlertStatsHandler(Handler):
+    """Drop cached alert stats when alerts change, whoever changed them."""
+
+    collections = ("alerts",)
+
+    def handle(self, db, collection: str, events: List[Event]) -> None:
+        invalidate(ALERT_STATS)
+
+
+def default_handlers() -> List[Handler]:
+    handlers: List[Handler] = [LogCountersHandler(), AlertStatsHandler()]
+    if settings.metrics_storage_layout == "documents":
+        handlers += [
+            LateRollupHandler(),
+            AlertRuleHandler(settings.change_stream_rule_interval_seconds),
+        ]
+    else:
+        # Time-series collections have no change streams and buckets only
+        # see updates; metrics stay with the scheduled tasks there
+        logger.warning(
+            "Metric handlers need the documents layout, not %s",
+            settings.metrics_storage_layout,
+        )
+    return handlers
+
+
+class ChangeStreamConsumer:
+    """Dispatches batches of change events to handlers by collection."""
+
+    def __init__(self, db, handlers: List[Handler]):
+        self.db = db
+        self.handlers: Dict[str, List[Handler]] = defaultdict(list)
+        for handler in handlers:
+            for collection in handler.collections:
+                self.handlers[collection].append(handler)
+
+    def pipeline(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "$match": {
+                    "ns.coll": {"$in": sorted(self.handlers)},
+                    "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+                }
+            }
+        ]
+
+    def dispatch(self, events: List[Event]) -> None:
+        """Run the handlers of each collection over its events, in order.
+
+        Database errors end the run so the batch is handled again after a
+        restart; any other handler error is logged and the batch is skipped
+        for that handler.
+        """
+        by_collection: Dict[str, List[Event]] = defaultdict(list)
+        for event in events:
+            by_collection[event["ns"]["coll"]].append(event)
+        for collection, collection_events in by_collection.items():
+            for handler in self.handlers[collection]:
+                try:
+                    handler.handle(self.db, collection, collection_events)
+                except PyMongoError:
+                    raise
+                except Exception:
+                    # A malformed event would fail the batch on every retry
+                    logger.exception(
+                        "%s failed on %d %s events, skipping them",
+                        type(handler).__name__, len(collection_events), collection,
+                    )
+
+    def run(self) -> None:
+        """Tail the change stream until an error ends it."""
+        token = get_resume_token(self.db, RESUME_TOKEN)
+        batch_seconds = settings.change_stream_batch_ms / 1000
+        with self.db.watch(
+            self.pipeline(),
+            resume_after=token,
+            max_await_time_ms=settings.change_stream_batch_ms,
+        ) as stream:
+            logger.info("Watching %s", ", ".join(sorted(self.handlers)))
+            events: List[Event] = []
+            first_at = 0.0
+            saved_at = time.monotonic()
+            while stream.alive:
+                event = stream.try_next()
+                if event is not None:
+                    if not events:
+                        first_at = time.monotonic()
+                    events.append(event)
+                    if (
+                        len(events) < settings.change_stream_max_batch
+                        and time.monotonic() - first_at < batch_seconds
+                    ):
+                        continue
+                elif not events:
+                    if time.monotonic() - saved_at >= IDLE_TOKEN_SECONDS and stream.resume_token:
+                        set_resume_token(self.db, RESUME_TOKEN, stream.resume_token)
+                        saved_at = time.monotonic()
+                    continue
+
+                self.dispatch(events)
+                set_resume_token(self.db, RESUME_TOKEN, stream.resume_token)
+                events = []
+                saved_at = time.monotonic()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    db = MongoClient(settings.mongodb_url, tz_aware=True)[settings.mongodb_db_name]
+    consumer = ChangeStreamConsumer(db, default_handlers())
+    while True:
+        try:
+            consumer.run()
+        except OperationFailure as e:
+            if e.code != CHANGE_STREAM_HISTORY_LOST:
+                logger.error("Change stream failed: %s", e)
+                time.sleep(RETRY_SECONDS)
+                continue
+            # Events since the token are gone; the scheduled tasks cover the gap
+            logger.error("Resume token expired, continuing from now: %s", e)
+            db.checkpoints.delete_one({"_id": RESUME_TOKEN})
+        except PyMongoError as e:
+            logger.error("Change stream interrupted: %s", e)
+            time.sleep(RETRY_SECONDS)
+        except KeyboardInterrupt:
+            return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Batching consumer for queued metric and log ingest.
+
+With ``INGEST_MODE=queue`` the backend publishes each validated ingest
+batch to RabbitMQ and answers 202. This consumer drains the queues with a
+prefetch window, merges the batches of many requests into large writes and
+acknowledges them together once written. Delivery is at least once: a batch
+whose write failed is requeued. Documents arrive with the ``_id`` the backend
+gave them, so a batch written again is rejected as duplicate keys; only the
+buckets and timeseries metric layouts, which do not keep sample IDs unique,
+may store it twice.
+
+    python ingest_consumer.py
+"""
+
+import json
+import logging
+import socket
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from kombu import Connection, Consumer, Message, Queue
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from config import get_settings
+from utils.metric_samples import insert_samples
+from utils.ngrams import index_fields
+from utils.series import record_series
+
+logger = logging.getLogger("ingest_consumer")
+settings = get_settings()
+
+
+def decode_documents(body: bytes) -> List[Dict[str, Any]]:
+    """Decode a published batch; timestamps and IDs arrive as strings."""
+    documents = json.loads(body)
+    if not isinstance(documents, list):
+        raise ValueError("batch is not a list of documents")
+    for document in documents:
+        document["timestamp"] = datetime.fromisoformat(document["timestamp"])
+        if "_id" in document:
+            document["_id"] = ObjectId(document["_id"])
+    return documents
+
+
+class IngestBatcher:
+    """Pending queued batches and the messages to acknowledge once written.
+
+    A flush writes everything pending once ``batch_size`` documents are
+    held or the oldest message has waited ``max_linger_ms``.
+    """
+
+    def __init__(self, db, batch_size: int, max_linger_ms: int):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_linger = max_linger_ms / 1000
+        self.metrics: List[Dict[str, Any]] = []
+        self.logs: List[Dict[str, Any]] = []
+        self.messages: List[Message] = []
+        self.oldest: Optional[float] = None
+
+    def add(self, body: bytes, message: Message) -> None:
+        """Hold the documents of a delivered message until the next flush."""
+        try:
+            documents = decode_documents(body)
+        except (ValueError, KeyError, TypeError, InvalidId) as e:
+            logger.error("Dropping undecodable ingest batch: %s", e)
+            message.reject(requeue=False)
+            return
+        queue = message.delivery_info.get("routing_key")
+        if queue == settings.ingest_queue_logs:
+            self.logs.extend(documents)
+        else:
+            self.metrics.extend(documents)
+        self.messages.append(message)
+        if self.oldest is None:
+            self.oldest = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        return len(self.metrics) + len(self.logs)
+
+    def timeout(self) -> float:
+        """Seconds to wait for more messages before the next flush is due."""
+        if self.oldest is None:
+            return 1.0
+        return max(0.0, self.oldest + self.max_linger - time.monotonic())
+
+    def due(self) -> bool:
+        return bool(self.messages) and (self.size >= self.batch_size or self.timeout() == 0)
+
+    def flush(self) -> None:
+        """Write pending documents, then ack their messages in one go."""
+        if not self.messages:
+            return
+        try:
+            written = insert_samples(self.db, self.metrics)
+            written_logs = self._insert_logs()
+            if self.metrics:
+                record_series(self.db, self.metrics)
+        except PyMongoError as e:
+            logger.error("Ingest write failed, requeueing %d batches: %s", len(self.messages), e)
+            for message in self.messages:
+                message.requeue()
+            self._reset()
+            time.sleep(settings.ingest_consumer_retry_seconds)
+            return
+
+        rejected = self.size - written - written_logs
+        if rejected:
+            logger.warning("Ingest write rejected %d invalid or already written documents", rejected)
+        # Acknowledges every earlier delivery on the channel as well
+        self.messages[-1].ack(multiple=True)
+        logger.info(
+            "Wrote %d metrics and %d logs from %d batches",
+            written, written_logs, len(self.messages),
+        )
+        self._reset()
+
+    def _insert_logs(self) -> int:
+        if not self.logs:
+            return 0
+        for log in self.logs:
+            log.update(index_fields(log["message"], settings.log_search_max_indexed_chars))
+        try:
+            self.db.logs.insert_many(self.logs, ordered=False)
+        except BulkWriteError as e:
+            return e.details.get("nInserted", 0)
+        return len(self.logs)
+
+    def _reset(self) -> None:
+        self.metrics, self.logs, self.messages = [], [], []
+        self.oldest = None
+
+
+def consume(db) -> None:
+    """Consume the ingest queues until the connection fails."""
+    queues = [
+        Queue(settings.ingest_queue_metrics, durable=True),
+        Queue(settings.ingest_queue_logs, durable=True),
+    ]
+    batcher = IngestBatcher(
+        db, settings.ingest_consumer_batch_size, settings.ingest_consumer_max_linger_ms
+    )
+    with Connection(settings.rabbitmq_url) as connection:
+        channel = connection.channel()
+        channel.basic_qos(0, settings.ingest_consumer_prefetch, False)
+        consumer = Consumer(
+            channel,
+            queues=queues,
+            on_message=lambda message: batcher.add(message.body, message),
+        )
+        with consumer:
+            logger.info("Consuming %s", ", ".join(queue.name for queue in queues))
+            try:
+                while True:
+                    try:
+                        connection.drain_events(timeout=batcher.timeout())
+                    except socket.timeout:
+                        pass
+                    if batcher.due():
+                        batcher.flush()
+            finally:
+                # Without a connection, unacked batches are redelivered instead
+                if batcher.messages and connection.connected:
+                    batcher.flush()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    db = MongoClient(settings.mongodb_url)[settings.mongodb_db_name]
+    connection_errors = Connection(settings.rabbitmq_url).connection_errors
+    while True:
+        try:
+            consume(db)
+        except connection_errors as e:
+            logger.error("RabbitMQ connection lost: %s", e)
+            time.sleep(settings.ingest_consumer_retry_seconds)
+        except KeyboardInterrupt:
+            return
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ from celery.utils.log import get_task_logger
 from pymongo import MongoClient
 
 from config import get_settings
+from utils.alert_counters import count_new_alert, rebuild_alert_counters
+from utils.cache import ALERT_STATS, invalidate
+from utils.metric_samples import find_recent_samples
 from utils.notification import send_notification
 
 logger = get_task_logger(__name__)
@@ -47,11 +50,28 @@ def check_alert_rules(self):
         raise self.retry(exc=exc, countdown=60)
 
 
+@shared_task(bind=True, max_retries=3)
+def reconcile_alert_counters(self):
+    """Rebuild the alert counters from the alerts collection to correct drift."""
+    try:
+        db = get_db()
+        counters = rebuild_alert_counters(db)
+        invalidate(ALERT_STATS)
+        logger.info(f"Reconciled {counters} alert counters")
+        return {"counters": counters}
+
+    except Exception as exc:
+        logger.error(f"Error reconciling alert counters: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+
 def evaluate_rule(db, rule: Dict[str, Any]) -> bool:
     """Evaluate a single alert rule."""
     # Check cooldown
     last_triggered = rule.get("last_triggered")
     if last_triggered:
+        if last_triggered.tzinfo is None:
+            last_triggered = last_triggered.replace(tzinfo=timezone.utc)
         cooldown = timedelta(minutes=rule.get("cooldown_minutes", 5))
         if datetime.now(timezone.utc) - last_triggered < cooldown:
             return False
@@ -68,10 +88,7 @@ def evaluate_rule(db, rule: Dict[str, Any]) -> bool:
 
         # Query recent metrics
         start_time = datetime.now(timezone.utc) - timedelta(seconds=duration)
-        metrics = list(db.metrics.find({
-            "name": metric_name,
-            "timestamp": {"$gte": start_time},
-        }).sort("timestamp", -1).limit(10))
+        metrics = find_recent_samples(db, metric_name, start_time, limit=10)
 
         if not metrics:
             all_conditions_met = False
@@ -98,6 +115,8 @@ def evaluate_rule(db, rule: Dict[str, Any]) -> bool:
             "created_at": datetime.now(timezone.utc),
         }
         db.alerts.insert_one(alert)
+        count_new_alert(db, alert)
+        invalidate(ALERT_STATS)
 
         # Update last triggered
         db.alert_rules.update_one(
@@ -7,6 +7,8 @@ from celery.utils.log import get_task_logger
 from pymongo import MongoClient
 
 from config import get_settings
+from utils.alert_counters import rebuild_alert_counters
+from utils.cache import ALERT_STATS, LOG_STATS, METRIC_AGGREGATIONS, invalidate
 
 logger = get_task_logger(__name__)
 settings = get_settings()
@@ -27,8 +29,8 @@ def cleanup_old_data(self):
 
         results = {}
 
-        # Cleanup metrics (older than 7 days)
-        metrics_cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+        # Cleanup metrics (older than the metrics TTL index expires them)
+        metrics_cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.metrics_ttl_seconds)
         metrics_result = db.metrics.delete_many({"timestamp": {"$lt": metrics_cutoff}})
         results["metrics_deleted"] = metrics_result.deleted_count
         logger.info(f"Deleted {metrics_result.deleted_count} old metrics")
@@ -46,6 +48,8 @@ def cleanup_old_data(self):
             "resolved_at": {"$lt": alerts_cutoff},
         })
         results["alerts_deleted"] = alerts_result.deleted_count
+        if alerts_result.deleted_count:
+            rebuild_alert_counters(db)
         logger.info(f"Deleted {alerts_result.deleted_count} old resolved alerts")
 
         # Cleanup log stats (older than 7 days)
@@ -54,6 +58,12 @@ def cleanup_old_data(self):
         results["stats_deleted"] = stats_result.deleted_count
         logger.info(f"Deleted {stats_result.deleted_count} old log stats")
 
+        # Cleanup log counters (older than 1 day; stats read the last hour)
+        counters_cutoff = datetime.now(timezone.utc) - timedelta(days=1)
+        counters_result = db.log_counters.delete_many({"minute": {"$lt": counters_cutoff}})
+        results["log_counters_deleted"] = counters_result.deleted_count
+
+        invalidate(METRIC_AGGREGATIONS, LOG_STATS, ALERT_STATS)
         return results
 
     except Exception as exc:
@@ -72,6 +82,7 @@ def cleanup_metrics(self, days: int = 7):
         result = db.metrics.delete_many({"timestamp": {"$lt": cutoff}})
 
         logger.info(f"Deleted {result.deleted_count} old metrics")
+        invalidate(METRIC_AGGREGATIONS)
         return {"deleted": result.deleted_count}
 
     except Exception as exc:
@@ -90,6 +101,7 @@ def cleanup_logs(self, days: int = 30):
         result = db.logs.delete_many({"timestamp": {"$lt": cutoff}})
 
         logger.info(f"Deleted {result.deleted_count} old logs")
+        invalidate(LOG_STATS)
         return {"deleted": result.deleted_count}
 
     except Exception as exc:
@@ -5,9 +5,11 @@ from typing import Any, Dict, List
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 
 from config import get_settings
+from utils.log_counters import log_stats_since
+from utils.ngrams import index_fields
 
 logger = get_task_logger(__name__)
 settings = get_settings()
@@ -29,24 +31,27 @@ def aggregate_logs(self):
         # Aggregate last hour
         start_time = datetime.now(timezone.utc) - timedelta(hours=1)
 
-        pipeline = [
-            {"$match": {"timestamp": {"$gte": start_time}}},
-            {
-                "$facet": {
-                    "by_level": [
-                        {"$group": {"_id": "$level", "count": {"$sum": 1}}}
-                    ],
-                    "by_source": [
-                        {"$group": {"_id": "$source", "count": {"$sum": 1}}},
-                        {"$sort": {"count": -1}},
-                        {"$limit": 20},
-                    ],
-                    "total": [{"$count": "count"}],
-                }
-            },
-        ]
-
-        result = list(db.logs.aggregate(pipeline))
+        if settings.change_streams_enabled:
+            # Summed from the counters the change stream consumer maintains
+            result = [log_stats_since(db, start_time)]
+        else:
+            pipeline = [
+                {"$match": {"timestamp": {"$gte": start_time}}},
+                {
+                    "$facet": {
+                        "by_level": [
+                            {"$group": {"_id": "$level", "count": {"$sum": 1}}}
+                        ],
+                        "by_source": [
+                            {"$group": {"_id": "$source", "count": {"$sum": 1}}},
+                            {"$sort": {"count": -1}},
+                            {"$limit": 20},
+                        ],
+                        "total": [{"$count": "count"}],
+                    }
+                },
+            ]
+            result = list(db.logs.aggregate(pipeline))
 
         if result:
             stats = result[0]
@@ -74,6 +79,9 @@ def ingest_log(log_data: Dict[str, Any]):
         db = get_db()
 
         log_data["timestamp"] = log_data.get("timestamp", datetime.now(timezone.utc))
+        log_data.update(
+            index_fields(log_data.get("message") or "", settings.log_search_max_indexed_chars)
+        )
 
         db.logs.insert_one(log_data)
         return {"status": "success"}
@@ -91,8 +99,10 @@ def ingest_logs_batch(logs: List[Dict[str, Any]]):
         db = get_db()
 
         now = datetime.now(timezone.utc)
+        max_chars = settings.log_search_max_indexed_chars
         for log in logs:
             log["timestamp"] = log.get("timestamp", now)
+            log.update(index_fields(log.get("message") or "", max_chars))
 
         if logs:
             db.logs.insert_many(logs)
@@ -137,3 +147,40 @@ def analyze_error_patterns(self):
     except Exception as exc:
         logger.error(f"Error analyzing patterns: {exc}")
         raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def backfill_log_trigrams(self):
+    """Add search trigrams to logs written before the trigram index existed.
+
+    Runs until no log lacks them; substring and regex search miss such logs.
+    """
+    try:
+        db = get_db()
+        max_chars = settings.log_search_max_indexed_chars
+        total = 0
+        while True:
+            logs = list(
+                db.logs.find({"_trigrams": {"$exists": False}}, {"message": 1})
+                .limit(settings.log_search_backfill_batch_size)
+            )
+            if not logs:
+                break
+            db.logs.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": log["_id"]},
+                        {"$set": index_fields(log.get("message") or "", max_chars)},
+                    )
+                    for log in logs
+                ],
+                ordered=False,
+            )
+            total += len(logs)
+            logger.info(f"Backfilled trigrams of {total} logs")
+
+        return {"status": "success", "count": total}
+
+    except Exception as exc:
+        logger.error(f"Error backfilling log trigrams: {exc}")
+        raise self.retry(exc=exc, countdown=60)
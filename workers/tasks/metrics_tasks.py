@@ -1,7 +1,7 @@
 """Tasks for processing metrics."""
 
 import asyncio
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List
 
 from celery import shared_task
@@ -9,10 +9,16 @@ from celery.utils.log import get_task_logger
 from pymongo import MongoClient
 
 from config import get_settings
+from utils.checkpoints import get_checkpoint, set_checkpoint
+from utils.metric_samples import insert_samples, sample_pipeline
+from utils.series import record_series
 
 logger = get_task_logger(__name__)
 settings = get_settings()
 
+# Checkpoint of the samples process_metrics has read
+PROCESS_CHECKPOINT = "process_metrics"
+
 
 def get_db():
     """Get MongoDB database connection."""
@@ -22,26 +28,32 @@ def get_db():
 
 @shared_task(bind=True, max_retries=3)
 def process_metrics(self):
-    """Process incoming metrics from the queue."""
+    """Process samples ingested since the last checkpoint.
+
+    Samples are read by timestamp in ``[checkpoint, now - lateness)`` and the
+    checkpoint then moves to the end of that range, so no sample is written
+    back. Samples arriving later than the lateness allows are not seen.
+    """
     try:
-        logger.info("Processing metrics batch")
         db = get_db()
-
-        # Get unprocessed metrics (you would typically get these from RabbitMQ)
-        # This is a placeholder - in real implementation, consume from message queue
-        metrics_count = db.metrics.count_documents(
-            {"processed": {"$exists": False}}
+        end = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.metric_processing_lateness_seconds
         )
-
-        if metrics_count > 0:
-            # Mark metrics as processed
-            db.metrics.update_many(
-                {"processed": {"$exists": False}},
-                {"$set": {"processed": True, "processed_at": datetime.now(timezone.utc)}}
-            )
-            logger.info(f"Processed {metrics_count} metrics")
-
-        return {"processed": metrics_count}
+        start = get_checkpoint(db, PROCESS_CHECKPOINT)
+        if start is None:
+            start = end - timedelta(seconds=settings.metric_processing_backfill_seconds)
+        end = min(end, start + timedelta(seconds=settings.metric_processing_max_range_seconds))
+        if start >= end:
+            return {"processed": 0}
+
+        logger.info(f"Processing metrics from {start.isoformat()} to {end.isoformat()}")
+        collection, stages = sample_pipeline(db, {"timestamp": {"$gte": start, "$lt": end}})
+        counted = list(collection.aggregate(stages + [{"$count": "count"}]))
+        metrics_count = counted[0]["count"] if counted else 0
+        set_checkpoint(db, PROCESS_CHECKPOINT, end)
+
+        logger.info(f"Processed {metrics_count} metrics")
+        return {"processed": metrics_count, "until": end.isoformat()}
 
     except Exception as exc:
         logger.error(f"Error processing metrics: {exc}")
@@ -56,7 +68,6 @@ def aggregate_metrics(self, metric_type: str, time_window: str = "1h"):
         db = get_db()
 
         # Calculate time window
-        from datetime import timedelta
         windows = {
             "1h": timedelta(hours=1),
             "6h": timedelta(hours=6),
@@ -65,14 +76,11 @@ def aggregate_metrics(self, metric_type: str, time_window: str = "1h"):
         delta = windows.get(time_window, timedelta(hours=1))
         start_time = datetime.now(timezone.utc) - delta
 
-        # Run aggregation
-        pipeline = [
-            {
-                "$match": {
-                    "metric_type": metric_type,
-                    "timestamp": {"$gte": start_time},
-                }
-            },
+        # Run aggregation over the samples of any storage layout
+        collection, stages = sample_pipeline(
+            db, {"metric_type": metric_type, "timestamp": {"$gte": start_time}}
+        )
+        pipeline = stages + [
             {
                 "$group": {
                     "_id": {"source": "$source", "name": "$name"},
@@ -84,7 +92,7 @@ def aggregate_metrics(self, metric_type: str, time_window: str = "1h"):
             },
         ]
 
-        results = list(db.metrics.aggregate(pipeline))
+        results = list(collection.aggregate(pipeline))
         logger.info(f"Aggregated {len(results)} metric groups")
 
         return {"aggregations": len(results), "time_window": time_window}
@@ -102,9 +110,9 @@ def ingest_metric(metric_data: Dict[str, Any]):
         db = get_db()
 
         metric_data["timestamp"] = datetime.now(timezone.utc)
-        metric_data["processed"] = False
 
-        db.metrics.insert_one(metric_data)
+        insert_samples(db, [metric_data])
+        record_series(db, [metric_data])
         return {"status": "success", "metric": metric_data.get("name")}
 
     except Exception as exc:
@@ -122,12 +130,12 @@ def ingest_metrics_batch(metrics: List[Dict[str, Any]]):
         now = datetime.now(timezone.utc)
         for metric in metrics:
             metric["timestamp"] = metric.get("timestamp", now)
-            metric["processed"] = False
 
+        written = insert_samples(db, metrics)
         if metrics:
-            db.metrics.insert_many(metrics)
+            record_series(db, metrics)
 
-        return {"status": "success", "count": len(metrics)}
+        return {"status": "success", "count": written}
 
     except Exception as exc:
         logger.error(f"Error ingesting metrics batch: {exc}")
@@ -0,0 +1,162 @@
+"""Tasks for rolling metrics up into coarser resolutions."""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from pymongo import MongoClient, ReplaceOne
+
+from config import get_settings
+from utils.checkpoints import get_checkpoint, set_checkpoint
+from utils.metric_samples import sample_pipeline
+from utils.series import series_key
+
+logger = get_task_logger(__name__)
+settings = get_settings()
+
+# Resolution -> (window seconds, finer resolution it is built from, $dateTrunc options)
+RESOLUTIONS = {
+    "1m": (60, None, {"unit": "minute", "binSize": 1}),
+    "5m": (300, "1m", {"unit": "minute", "binSize": 5}),
+    "1h": (3600, "5m", {"unit": "hour", "binSize": 1}),
+}
+WRITE_BATCH_SIZE = 1000
+
+
+def get_db():
+    """Get MongoDB database connection."""
+    client = MongoClient(settings.mongodb_url)
+    return client[settings.mongodb_db_name]
+
+
+def rollup_collection(resolution: str) -> str:
+    """Name of the collection holding rollups of a resolution."""
+    return f"metrics_rollup_{resolution}"
+
+
+def align(timestamp: datetime, seconds: int) -> datetime:
+    """Align a timestamp down to a window boundary."""
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+@shared_task(bind=True, max_retries=3)
+def rollup_metrics(self, resolution: str = "1m"):
+    """Roll up closed windows since the last checkpoint of a resolution."""
+    try:
+        seconds, source, _ = RESOLUTIONS[resolution]
+        db = get_db()
+        checkpoint = f"rollup_{resolution}"
+
+        now = datetime.now(timezone.utc)
+        end = align(now - timedelta(seconds=settings.rollup_lateness_seconds), seconds)
+        if source is not None:
+            # Only roll up windows the finer resolution has fully covered
+            source_done = get_checkpoint(db, f"rollup_{source}")
+            if source_done is None:
+                return {"resolution": resolution, "windows": 0, "written": 0}
+            end = min(end, align(source_done, seconds))
+
+        start = get_checkpoint(db, checkpoint)
+        if start is None:
+            start = align(end - timedelta(seconds=settings.rollup_backfill_seconds), seconds)
+        end = min(end, start + timedelta(seconds=seconds * settings.rollup_max_windows_per_run))
+        if start >= end:
+            return {"resolution": resolution, "windows": 0, "written": 0}
+
+        written = rollup_range(db, resolution, start, end)
+        set_checkpoint(db, checkpoint, end)
+
+        windows = int((end - start).total_seconds()) // seconds
+        logger.info(f"Rolled up {windows} {resolution} windows into {written} documents")
+        return {"resolution": resolution, "windows": windows, "written": written}
+
+    except Exception as exc:
+        logger.error(f"Error rolling up {resolution} metrics: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+def rollup_range(db, resolution: str, start: datetime, end: datetime) -> int:
+    """Write rollups of ``resolution`` for windows in ``[start, end)``.
+
+    Rollup documents are keyed by series and window start, so rolling up a
+    range again replaces rather than duplicates them.
+    """
+    _, source, trunc = RESOLUTIONS[resolution]
+    window = {"$dateTrunc": {"date": "$timestamp", **trunc}}
+    time_range = {"timestamp": {"$gte": start, "$lt": end}}
+
+    if source is None:
+        collection, stages = sample_pipeline(db, time_range)
+        stages.append({
+            "$group": {
+                "_id": {
+                    "name": "$name",
+                    "source": "$source",
+                    "namespace": "$namespace",
+                    "cluster": "$cluster",
+                    "labels": "$labels",
+                    "timestamp": window,
+                },
+                "metric_type": {"$first": "$metric_type"},
+                "unit": {"$first": "$unit"},
+                "count": {"$sum": 1},
+                "sum": {"$sum": "$value"},
+                "min": {"$min": "$value"},
+                "max": {"$max": "$value"},
+            }
+        })
+    else:
+        collection = db[rollup_collection(source)]
+        stages = [
+            {"$match": time_range},
+            {
+                "$group": {
+                    "_id": {"series_key": "$series_key", "timestamp": window},
+                    **{
+                        field: {"$first": f"${field}"}
+                        for field in (
+                            "name", "source", "namespace", "cluster",
+                            "labels", "metric_type", "unit",
+                        )
+                    },
+                    "count": {"$sum": "$count"},
+                    "sum": {"$sum": "$sum"},
+                    "min": {"$min": "$min"},
+                    "max": {"$max": "$max"},
+                }
+            },
+        ]
+
+    target = db[rollup_collection(resolution)]
+    operations: List[ReplaceOne] = []
+    written = 0
+    for group in collection.aggregate(stages, allowDiskUse=True):
+        document = _rollup_document(group)
+        operations.append(ReplaceOne({"_id": document["_id"]}, document, upsert=True))
+        if len(operations) >= WRITE_BATCH_SIZE:
+            target.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+    if operations:
+        target.bulk_write(operations, ordered=False)
+        written += len(operations)
+    return written
+
+
+def _rollup_document(group: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a rollup document from an aggregation group."""
+    document = {**group["_id"], **{k: v for k, v in group.items() if k != "_id"}}
+    document["labels"] = document.get("labels") or {}
+    key = document.get("series_key") or series_key(
+        document["name"], document["source"], document.get("namespace"),
+        document.get("cluster"), document["labels"],
+    )
+    timestamp = document["timestamp"]
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    document["series_key"] = key
+    document["_id"] = f"{key}:{int(timestamp.timestamp())}"
+    document["avg"] = document["sum"] / document["count"] if document["count"] else None
+    return document
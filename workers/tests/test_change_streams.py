@@ -0,0 +1,134 @@
+"""Tests for the change stream consumer, run against a fake stream."""
+
+from typing import Any, Dict, List, Optional
+
+import pytest
+from pymongo.errors import PyMongoError
+
+import change_streams
+from change_streams import RESUME_TOKEN, ChangeStreamConsumer, Handler
+
+
+def event(collection: str, number: int) -> Dict[str, Any]:
+    return {
+        "_id": {"_data": f"token-{number}"},
+        "operationType": "insert",
+        "ns": {"db": "infrawatch", "coll": collection},
+        "fullDocument": {"number": number},
+    }
+
+
+class FakeStream:
+    """Change stream replaying ``items``; None is a poll without an event."""
+
+    def __init__(self, items: List[Optional[Dict[str, Any]]]):
+        self.items = list(items)
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def alive(self) -> bool:
+        return bool(self.items)
+
+    def try_next(self) -> Optional[Dict[str, Any]]:
+        item = self.items.pop(0)
+        if item is not None:
+            self.resume_token = item["_id"]
+        return item
+
+
+class FakeCheckpoints:
+    def __init__(self):
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.saved: List[Any] = []
+
+    def find_one(self, filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self.docs.get(filter["_id"])
+
+    def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        self.docs.setdefault(filter["_id"], {}).update(update["$set"])
+        self.saved.append(update["$set"]["resume_token"])
+
+
+class FakeDb:
+    def __init__(self, items: List[Optional[Dict[str, Any]]]):
+        self.checkpoints = FakeCheckpoints()
+        self.stream = FakeStream(items)
+        self.resume_after = None
+
+    def watch(self, pipeline, resume_after=None, max_await_time_ms=None):
+        self.resume_after = resume_after
+        return self.stream
+
+
+class RecordingHandler(Handler):
+    def __init__(self, *collections: str, error: Optional[Exception] = None):
+        self.collections = collections
+        self.error = error
+        self.batches: List[List[int]] = []
+
+    def handle(self, db, collection: str, events: List[Dict[str, Any]]) -> None:
+        self.batches.append([e["fullDocument"]["number"] for e in events])
+        if self.error is not None:
+            raise self.error
+
+
+@pytest.fixture(autouse=True)
+def batching(monkeypatch):
+    # Batches close on size or on an empty poll, never on time
+    monkeypatch.setattr(change_streams.settings, "change_stream_max_batch", 2)
+    monkeypatch.setattr(change_streams.settings, "change_stream_batch_ms", 60_000)
+
+
+class TestChangeStreamConsumer:
+    def test_batches_events_and_saves_token_after_each(self):
+        db = FakeDb([event("logs", 1), event("logs", 2), event("logs", 3), None])
+        handler = RecordingHandler("logs")
+
+        ChangeStreamConsumer(db, [handler]).run()
+
+        assert handler.batches == [[1, 2], [3]]
+        assert db.checkpoints.saved == [{"_data": "token-2"}, {"_data": "token-3"}]
+
+    def test_routes_events_by_collection(self):
+        db = FakeDb([event("metrics", 1), event("logs", 2), None])
+        metrics, logs, alerts = (
+            RecordingHandler("metrics"), RecordingHandler("logs"), RecordingHandler("alerts")
+        )
+
+        ChangeStreamConsumer(db, [metrics, logs, alerts]).run()
+
+        assert metrics.batches == [[1]]
+        assert logs.batches == [[2]]
+        assert alerts.batches == []
+
+    def test_resumes_after_saved_token(self):
+        db = FakeDb([])
+        db.checkpoints.docs[RESUME_TOKEN] = {"resume_token": {"_data": "token-7"}}
+
+        ChangeStreamConsumer(db, [RecordingHandler("logs")]).run()
+
+        assert db.resume_after == {"_data": "token-7"}
+
+    def test_handler_error_skips_batch_for_that_handler(self):
+        db = FakeDb([event("logs", 1), None])
+        failing = RecordingHandler("logs", error=KeyError("timestamp"))
+        other = RecordingHandler("logs")
+
+        ChangeStreamConsumer(db, [failing, other]).run()
+
+        assert other.batches == [[1]]
+        assert db.checkpoints.saved == [{"_data": "token-1"}]
+
+    def test_database_error_keeps_batch_for_retry(self):
+        db = FakeDb([event("logs", 1), None])
+        handler = RecordingHandler("logs", error=PyMongoError("connection lost"))
+
+        with pytest.raises(PyMongoError):
+            ChangeStreamConsumer(db, [handler]).run()
+        assert db.checkpoints.saved == []
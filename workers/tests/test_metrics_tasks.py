@@ -0,0 +1,37 @@
+"""Tests for the metric tasks across storage layouts."""
+
+from typing import Any, Dict, List
+
+import pytest
+
+from tasks import metrics_tasks
+from utils import metric_samples
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.pipelines: List[List[Dict[str, Any]]] = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter([{"_id": {"source": "node-1", "name": "cpu"}}])
+
+
+class FakeDb:
+    def __init__(self):
+        self.metrics = FakeCollection("metrics")
+        self.metric_buckets = FakeCollection("metric_buckets")
+
+
+@pytest.mark.parametrize("layout,collection", [("documents", "metrics"), ("buckets", "metric_buckets")])
+def test_aggregate_metrics_reads_storage_layout(monkeypatch, layout, collection):
+    db = FakeDb()
+    monkeypatch.setattr(metric_samples.settings, "metrics_storage_layout", layout)
+    monkeypatch.setattr(metrics_tasks, "get_db", lambda: db)
+
+    assert metrics_tasks.aggregate_metrics.run("cpu")["aggregations"] == 1
+
+    (pipeline,) = getattr(db, collection).pipelines
+    assert pipeline[-1]["$group"]["_id"] == {"source": "$source", "name": "$name"}
+    assert pipeline[0]["$match"]["metric_type"] == "cpu"
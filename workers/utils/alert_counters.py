@@ -0,0 +1,60 @@
+"""Alert counters kept in step with the backend's alert_counters collection."""
+
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from pymongo import ReplaceOne, UpdateOne
+
+# Counted alert fields and meta document ID, as in the backend's AlertRepository
+COUNTED_FIELDS = ("status", "severity", "source")
+COUNTERS_META_ID = "_meta"
+
+
+def count_new_alert(db, alert: Dict[str, Any]) -> None:
+    """Add a newly inserted alert to the counters."""
+    operations = [
+        UpdateOne(
+            {"_id": f"{field}:{alert[field]}"},
+            {"$inc": {"count": 1}, "$setOnInsert": {"field": field, "value": alert[field]}},
+            upsert=True,
+        )
+        for field in COUNTED_FIELDS
+        if alert.get(field) is not None
+    ]
+    if operations:
+        db.alert_counters.bulk_write(operations, ordered=False)
+
+
+def rebuild_alert_counters(db) -> int:
+    """Recount every counter from the alerts collection and return how many exist."""
+    pipeline = [
+        {
+            "$facet": {
+                field: [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+                for field in COUNTED_FIELDS
+            }
+        },
+    ]
+    result = list(db.alerts.aggregate(pipeline))
+    ids = []
+    operations = []
+    for field, groups in (result[0] if result else {}).items():
+        for group in groups:
+            if group["_id"] is None:
+                continue
+            counter_id = f"{field}:{group['_id']}"
+            ids.append(counter_id)
+            document = {"field": field, "value": group["_id"], "count": group["count"]}
+            operations.append(ReplaceOne({"_id": counter_id}, document, upsert=True))
+    operations.append(
+        UpdateOne(
+            {"_id": COUNTERS_META_ID},
+            {"$set": {"rebuilt_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+    )
+    db.alert_counters.bulk_write(operations, ordered=False)
+    db.alert_counters.update_many(
+        {"_id": {"$nin": ids}, "field": {"$exists": True}}, {"$set": {"count": 0}}
+    )
+    return len(ids)
@@ -0,0 +1,32 @@
+"""Invalidation of the backend's Redis response cache."""
+
+import redis
+from celery.utils.log import get_task_logger
+from redis.exceptions import RedisError
+
+from config import get_settings
+
+logger = get_task_logger(__name__)
+settings = get_settings()
+
+# Namespaces and version keys as in the backend's app.core.cache
+METRIC_AGGREGATIONS = "metric_aggregations"
+LOG_STATS = "log_stats"
+ALERT_STATS = "alert_stats"
+
+_client = None
+
+
+def invalidate(*namespaces: str) -> None:
+    """Drop every cached entry of the namespaces by bumping their versions."""
+    global _client
+
+    try:
+        if _client is None:
+            _client = redis.Redis.from_url(settings.redis_url, socket_timeout=2)
+        pipe = _client.pipeline(transaction=False)
+        for namespace in namespaces:
+            pipe.incr(f"cache:{namespace}:version")
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to invalidate response cache: {e}")
@@ -0,0 +1,39 @@
+"""Persistent progress markers for incremental tasks."""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+def get_checkpoint(db, name: str) -> Optional[datetime]:
+    """Get the position a task has processed up to, if any."""
+    doc = db.checkpoints.find_one({"_id": name})
+    if not doc:
+        return None
+    position = doc["position"]
+    if position.tzinfo is None:
+        position = position.replace(tzinfo=timezone.utc)
+    return position
+
+
+def set_checkpoint(db, name: str, position: datetime) -> None:
+    """Record the position a task has processed up to."""
+    db.checkpoints.update_one(
+        {"_id": name},
+        {"$set": {"position": position, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+def get_resume_token(db, name: str) -> Optional[Dict[str, Any]]:
+    """Get the resume token a change stream consumer stopped at, if any."""
+    doc = db.checkpoints.find_one({"_id": name})
+    return doc.get("resume_token") if doc else None
+
+
+def set_resume_token(db, name: str, token: Dict[str, Any]) -> None:
+    """Record the resume token of the last change a consumer has handled."""
+    db.checkpoints.update_one(
+        {"_id": name},
+        {"$set": {"resume_token": token, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
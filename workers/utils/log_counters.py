@@ -0,0 +1,70 @@
+"""Per-minute log counters maintained from the logs change stream."""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from pymongo import UpdateOne
+
+# Log fields counted per minute; "total" counts every log
+COUNTED_FIELDS = ("level", "source")
+TOTAL = "total"
+
+
+def _minute(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.replace(second=0, microsecond=0)
+
+
+def count_logs(db, logs: List[Dict[str, Any]]) -> int:
+    """Add inserted logs to the counters and return how many counters changed.
+
+    One counter document exists per (minute, field, value), as the alert
+    counters do per (field, value), so values never become field names.
+    """
+    counts: Dict[Tuple[datetime, str, Any], int] = {}
+    for log in logs:
+        minute = _minute(log["timestamp"])
+        keys = [(minute, TOTAL, None)]
+        keys += [(minute, field, log.get(field)) for field in COUNTED_FIELDS]
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+
+    operations = [
+        UpdateOne(
+            {"_id": f"{field}:{value}:{int(minute.timestamp())}"},
+            {
+                "$inc": {"count": count},
+                "$setOnInsert": {"minute": minute, "field": field, "value": value},
+            },
+            upsert=True,
+        )
+        for (minute, field, value), count in counts.items()
+    ]
+    if operations:
+        db.log_counters.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def log_stats_since(db, start: datetime) -> Dict[str, Any]:
+    """Sum the counters of the minutes from ``start`` on.
+
+    Returns the shape of ``aggregate_logs``' facet: ``by_level`` and the top
+    20 ``by_source`` as ``{"_id", "count"}`` groups, and ``total``.
+    """
+    groups = list(
+        db.log_counters.aggregate([
+            {"$match": {"minute": {"$gte": _minute(start)}}},
+            {"$group": {"_id": {"field": "$field", "value": "$value"}, "count": {"$sum": "$count"}}},
+        ])
+    )
+    by_field: Dict[str, List[Dict[str, Any]]] = {field: [] for field in COUNTED_FIELDS}
+    total = 0
+    for group in groups:
+        field = group["_id"]["field"]
+        if field == TOTAL:
+            total = group["count"]
+        elif field in by_field:
+            by_field[field].append({"_id": group["_id"]["value"], "count": group["count"]})
+    by_source = sorted(by_field["source"], key=lambda item: item["count"], reverse=True)[:20]
+    return {"by_level": by_field["level"], "by_source": by_source, "total": [{"count": total}]}
@@ -0,0 +1,149 @@
+"""Metric sample access for every backend storage layout."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config import get_settings
+from utils.series import bucket_start, series_key
+
+settings = get_settings()
+
+# Series fields stored under the metaField in the timeseries layout
+META_FIELDS = ("name", "source", "namespace", "cluster", "labels")
+SAMPLE_FIELDS = META_FIELDS + ("metric_type", "unit", "value", "timestamp")
+# Series fields copied onto a bucket when it is created
+SERIES_FIELDS = ("name", "metric_type", "unit", "source", "namespace", "cluster", "labels")
+
+
+def sample_pipeline(db, match: Dict[str, Any]) -> Tuple[Any, List[Dict[str, Any]]]:
+    """Get the collection and stages yielding flat samples matching ``match``.
+
+    ``match`` uses the flat sample schema; only ``name``, ``source`` and
+    ``timestamp`` conditions are translated for the bucketed layouts.
+    """
+    layout = settings.metrics_storage_layout
+    if layout == "timeseries":
+        meta_match = {
+            (f"meta.{key}" if key in META_FIELDS else key): value
+            for key, value in match.items()
+        }
+        stages = [
+            {"$match": meta_match},
+            {
+                "$project": {
+                    **{field: f"$meta.{field}" for field in META_FIELDS},
+                    **{field: 1 for field in SAMPLE_FIELDS if field not in META_FIELDS},
+                }
+            },
+        ]
+        return db.metrics, stages
+
+    if layout != "buckets":
+        return db.metrics, [{"$match": match}]
+
+    bucket_match = {k: v for k, v in match.items() if k != "timestamp"}
+    time_filter = match.get("timestamp")
+    if time_filter:
+        lower = time_filter.get("$gte", time_filter.get("$gt"))
+        upper = time_filter.get("$lt", time_filter.get("$lte"))
+        if lower is not None:
+            bucket_match["bucket_end"] = {"$gt": lower}
+        if upper is not None:
+            bucket_match["bucket_start"] = {"$lte": upper}
+    stages = [
+        {"$match": bucket_match},
+        {"$unwind": {"path": "$timestamps", "includeArrayIndex": "index"}},
+        {
+            "$project": {
+                **{field: 1 for field in SAMPLE_FIELDS if field not in ("value", "timestamp")},
+                "timestamp": "$timestamps",
+                "value": {"$arrayElemAt": ["$values", "$index"]},
+            }
+        },
+    ]
+    if time_filter:
+        stages.append({"$match": {"timestamp": time_filter}})
+    return db.metric_buckets, stages
+
+
+def find_recent_samples(
+    db,
+    name: str,
+    start_time: datetime,
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """Get the latest samples of a metric since ``start_time``, newest first."""
+    collection, stages = sample_pipeline(
+        db, {"name": name, "timestamp": {"$gte": start_time}}
+    )
+    stages += [{"$sort": {"timestamp": -1}}, {"$limit": limit}]
+    return list(collection.aggregate(stages))
+
+
+def to_storage_document(metric: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a flat metric for the ``metrics`` collection of the layout."""
+    if settings.metrics_storage_layout != "timeseries":
+        return metric
+    document = {k: v for k, v in metric.items() if k not in META_FIELDS}
+    document["meta"] = {field: metric[field] for field in META_FIELDS if field in metric}
+    return document
+
+
+def insert_samples(db, metrics: List[Dict[str, Any]]) -> int:
+    """Write flat metric samples in the shape of the storage layout.
+
+    Mirrors the backend's ``MetricRepository.create_batch``: writes are
+    unordered, so one bad sample does not stop the rest. Returns how many
+    samples were written.
+    """
+    if not metrics:
+        return 0
+    if settings.metrics_storage_layout == "buckets":
+        return _insert_into_buckets(db, metrics)
+    try:
+        db.metrics.insert_many([to_storage_document(m) for m in metrics], ordered=False)
+    except BulkWriteError as e:
+        return e.details.get("nInserted", 0)
+    return len(metrics)
+
+
+def _insert_into_buckets(db, metrics: List[Dict[str, Any]]) -> int:
+    groups: Dict[Tuple[str, datetime], List[Dict[str, Any]]] = {}
+    for metric in metrics:
+        key = (
+            series_key(
+                metric["name"], metric["source"], metric.get("namespace"),
+                metric.get("cluster"), metric.get("labels"),
+            ),
+            bucket_start(metric["timestamp"], settings.metrics_bucket_seconds),
+        )
+        groups.setdefault(key, []).append(metric)
+
+    operations = []
+    for (key, start), samples in groups.items():
+        first = samples[0]
+        update: Dict[str, Any] = {
+            "$push": {
+                "timestamps": {"$each": [s["timestamp"] for s in samples]},
+                "values": {"$each": [s["value"] for s in samples]},
+                "metadata": {"$each": [s.get("metadata") or None for s in samples]},
+            },
+            "$inc": {"count": len(samples)},
+            "$setOnInsert": {
+                **{field: first.get(field) for field in SERIES_FIELDS},
+                "bucket_end": start + timedelta(seconds=settings.metrics_bucket_seconds),
+            },
+        }
+        operations.append(
+            UpdateOne({"series_key": key, "bucket_start": start}, update, upsert=True)
+        )
+    try:
+        db.metric_buckets.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        failed = {error["index"] for error in e.details.get("writeErrors", [])}
+        groups_list = list(groups.values())
+        return len(metrics) - sum(len(groups_list[i]) for i in failed)
+    return len(metrics)
@@ -0,0 +1,19 @@
+"""Log message trigrams, matching ``app.utils.ngrams`` in the backend."""
+
+from typing import Any, Dict, Set
+
+NGRAM = 3
+
+
+def trigrams(text: str) -> Set[str]:
+    """Distinct lowercase trigrams of a text."""
+    text = text.lower()
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def index_fields(message: str, max_chars: int) -> Dict[str, Any]:
+    """Fields a log with ``message`` stores for the backend's trigram search."""
+    fields: Dict[str, Any] = {"_trigrams": sorted(trigrams(message[:max_chars]))}
+    if len(message) > max_chars:
+        fields["_trigrams_partial"] = True
+    return fields
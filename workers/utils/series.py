@@ -0,0 +1,82 @@
+"""Metric series identity, matching ``app.utils.series`` in the backend."""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+
+def series_key(
+    name: str,
+    source: str,
+    namespace: Optional[str] = "default",
+    cluster: Optional[str] = "default",
+    labels: Optional[Dict[str, str]] = None,
+) -> str:
+    """Hash the identity of a metric series; label order does not matter."""
+    identity = json.dumps(
+        [name, source, namespace, cluster, labels or {}],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def bucket_start(timestamp: datetime, bucket_seconds: int) -> datetime:
+    """Align a timestamp to the start of its storage bucket."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % bucket_seconds, tz=timezone.utc)
+
+
+def record_series(db, samples: List[Dict[str, Any]]) -> int:
+    """Upsert the series catalog entries of written samples.
+
+    Matches ``SeriesRepository.record`` in the backend, one upsert per
+    distinct series. Returns how many series were written.
+    """
+    seen: Dict[str, Dict[str, Any]] = {}
+    for sample in samples:
+        key = series_key(
+            sample["name"], sample["source"], sample.get("namespace"),
+            sample.get("cluster"), sample.get("labels"),
+        )
+        timestamp = sample["timestamp"]
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        entry = seen.get(key)
+        if entry is None:
+            seen[key] = {"sample": sample, "first": timestamp, "last": timestamp}
+        else:
+            entry["first"] = min(entry["first"], timestamp)
+            entry["last"] = max(entry["last"], timestamp)
+
+    operations = []
+    for key, entry in seen.items():
+        sample = entry["sample"]
+        labels = sample.get("labels") or {}
+        operations.append(
+            UpdateOne(
+                {"series_key": key},
+                {
+                    "$setOnInsert": {
+                        "name": sample["name"],
+                        "source": sample["source"],
+                        "namespace": sample.get("namespace"),
+                        "cluster": sample.get("cluster"),
+                        "labels": labels,
+                        "label_keys": sorted(labels),
+                    },
+                    "$min": {"first_seen": entry["first"]},
+                    "$max": {"last_seen": entry["last"]},
+                },
+                upsert=True,
+            )
+        )
+    if operations:
+        db.series.bulk_write(operations, ordered=False)
+    return len(operations)